@@ -0,0 +1,195 @@
+"""Replay a frontend-like query mix against the API and report latency per endpoint.
+
+Usage: python -m benchmarks.load_test [--base-url URL | --in-process] [--requests N] [--concurrency C]
+
+Each simulated user picks a scenario by weight (first listing page, district
+and price filters, keyword search, keyset paging, deep offset paging, listing
+detail, location tree) and the harness reports p50/p95/p99 latency and
+throughput per endpoint and per scenario. Filter values come from the
+synthetic dataset (benchmarks.synthetic_data), so run the generator first.
+Repeated queries hit the server's result cache as they would in production;
+start the server with RESULT_CACHE_TTL=0 to measure uncached queries only.
+--in-process runs the app inside this process against DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.synthetic_data import DISTRICTS, ADJECTIVES, ROOMS, STATUSES
+from src.utils.url_builder import format_location_name
+
+DISTRICT_SLUGS = [format_location_name(name) for name, *_ in DISTRICTS]
+KEYWORDS = [adjective.lower() for adjective in ADJECTIVES] + ['metro', 'havuz', 'otopark', 'krediye uygun']
+# Frontend sayfa boyutu
+PAGE_SIZE = 12
+# Detay sayfası senaryosu için ısınmada toplanan ilan id'leri
+ID_SAMPLE_PAGES = 20
+
+def percentile(sorted_values: list, q: float) -> float:
+    """En yakın sıra yöntemiyle yüzdelik (sıralı liste)"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.property_ids = []
+        # (grup türü, ad) -> [(saniye, başarılı mı)]
+        self.samples = defaultdict(list)
+        self.scenarios = [
+            (self.first_page, 30),
+            (self.district_page, 20),
+            (self.filtered_page, 15),
+            (self.keyword_search, 8),
+            (self.keyset_paging, 7),
+            (self.deep_offset, 5),
+            (self.detail, 12),
+            (self.locations, 3),
+        ]
+
+    async def get(self, scenario: str, endpoint: str, path: str, params=None) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(path, params=params)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        elapsed = time.perf_counter() - started
+        self.samples[('endpoint', endpoint)].append((elapsed, ok))
+        self.samples[('scenario', scenario)].append((elapsed, ok))
+        return response
+
+    def status(self) -> str:
+        return self.rng.choices([s.value for s, _ in STATUSES], weights=[w for _, w in STATUSES])[0]
+
+    async def first_page(self):
+        await self.get('first_page', '/properties', '/properties', {'limit': PAGE_SIZE})
+
+    async def district_page(self):
+        params = {'district': self.rng.choice(DISTRICT_SLUGS), 'status': self.status(), 'limit': PAGE_SIZE}
+        await self.get('district_page', '/properties', '/properties', params)
+
+    async def filtered_page(self):
+        rooms, living_rooms = self.rng.choices([r for r, _ in ROOMS], weights=[w for _, w in ROOMS])[0]
+        status = self.status()
+        low = self.rng.choice([1, 2, 3, 5, 8]) * (1_000_000 if status == 'satilik' else 10_000)
+        params = {
+            'district': self.rng.choice(DISTRICT_SLUGS), 'status': status, 'category': 'konut',
+            'room_count': f"{rooms}+{living_rooms}", 'min_price': low, 'max_price': low * 3,
+            'count': 'estimate', 'limit': PAGE_SIZE,
+        }
+        await self.get('filtered_page', '/properties', '/properties', params)
+
+    async def keyword_search(self):
+        params = {'local_kw': self.rng.choice(KEYWORDS), 'limit': PAGE_SIZE}
+        await self.get('keyword_search', '/properties', '/properties', params)
+
+    async def keyset_paging(self):
+        """Sonsuz kaydırma: cursor ile 2-5 sayfa ilerler"""
+        cursor = ''
+        for _ in range(self.rng.randint(2, 5)):
+            response = await self.get('keyset_paging', '/properties', '/properties', {'cursor': cursor, 'limit': PAGE_SIZE})
+            cursor = response.json().get('next_cursor') if response is not None and response.status_code == 200 else None
+            if cursor is None:
+                break
+
+    async def deep_offset(self):
+        params = {'skip': self.rng.randint(10, 200) * PAGE_SIZE, 'limit': PAGE_SIZE}
+        await self.get('deep_offset', '/properties', '/properties', params)
+
+    async def detail(self):
+        if not self.property_ids:
+            return await self.first_page()
+        property_id = self.rng.choice(self.property_ids)
+        await self.get('detail', '/properties/{property_id}', f'/properties/{property_id}')
+
+    async def locations(self):
+        await self.get('locations', '/locations/{il}', '/locations/istanbul')
+
+    async def collect_ids(self) -> None:
+        """Detay senaryosu için farklı ilçelerden ilan id'leri toplar (ölçüme dahil değil)"""
+        for _ in range(ID_SAMPLE_PAGES):
+            response = await self.client.get('/properties', params={
+                'district': self.rng.choice(DISTRICT_SLUGS), 'limit': 50, 'count': 'none', 'cursor': ''
+            })
+            if response.status_code == 200:
+                self.property_ids.extend(item['id'] for item in response.json()['items'])
+
+    async def run(self, total: int, concurrency: int) -> float:
+        remaining = iter(range(total))
+        scenarios = [scenario for scenario, _ in self.scenarios]
+        weights = [weight for _, weight in self.scenarios]
+
+        async def user():
+            for _ in remaining:
+                await self.rng.choices(scenarios, weights=weights)[0]()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        groups = {}
+        for (kind, name), samples in sorted(self.samples.items()):
+            latencies = sorted(seconds for seconds, _ in samples)
+            groups.setdefault(kind, {})[name] = {
+                'requests': len(samples),
+                'errors': sum(1 for _, ok in samples if not ok),
+                'rps': round(len(samples) / elapsed, 2),
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            }
+        return {'elapsed_seconds': round(elapsed, 2), **groups}
+
+def print_report(report: dict) -> None:
+    print(f"elapsed: {report['elapsed_seconds']}s")
+    for kind in ('endpoint', 'scenario'):
+        print(f"\n{kind:<26} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, row in report.get(kind, {}).items():
+            print(f"{name:<26} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.1f} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+
+async def main_async(args) -> dict:
+    if args.in_process:
+        from src.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = 'http://load-test'
+    else:
+        transport = None
+        base_url = args.base_url
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=args.timeout) as client:
+        load_test = LoadTest(client, random.Random(args.seed))
+        await load_test.collect_ids()
+        elapsed = await load_test.run(args.requests, args.concurrency)
+        return load_test.report(elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:8000', help="API under test")
+    parser.add_argument('--in-process', action='store_true', help="run the app in this process instead of over HTTP")
+    parser.add_argument('--requests', type=int, default=2000, help="number of scenarios to run")
+    parser.add_argument('--concurrency', type=int, default=8, help="simulated concurrent users")
+    parser.add_argument('--timeout', type=float, default=30.0, help="request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=7, help="random seed of the query mix")
+    parser.add_argument('--json', help="also write the report to this file (to compare runs)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
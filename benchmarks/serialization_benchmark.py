@@ -0,0 +1,77 @@
+"""Compare /properties serialization paths at typical page sizes.
+
+Usage: python -m benchmarks.serialization_benchmark [--repeat N]
+
+The "pydantic" path mirrors the previous endpoint behaviour: build a
+PropertyCardResponse per row, wrap them in PaginatedResponse, let FastAPI
+revalidate the response model and encode it with jsonable_encoder +
+JSONResponse. The "fast" path is what /properties does now: plain dicts
+rendered by FastJSONResponse.
+"""
+import argparse
+import os
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+# src.main veritabanını import sırasında başlatır; benchmark için geçici SQLite kullan
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.main import PaginatedResponse, PropertyCardResponse
+from src.utils.serialization import FastJSONResponse, orjson
+
+PAGE_SIZES = (12, 100, 1000)
+
+def make_cards(count: int) -> list:
+    """Synthetic card rows shaped like utils.cards.build_cards output."""
+    now = datetime.now()
+    return [
+        {
+            'id': i,
+            'url': f"https://www.hepsiemlak.com/istanbul-besiktas-ortakoy-satilik/daire/{1000 + i}-{i}",
+            'title': f"Ortaköy'de Boğaz Manzaralı {i % 5 + 1}+1 Satılık Daire",
+            'price': 5_000_000.0 + i * 1000,
+            'currency': 'TRY',
+            'location': 'İstanbul / Beşiktaş / Ortaköy Mah.',
+            'status': 'satilik',
+            'property_type': 'konut',
+            'size': 80.0 + i % 200,
+            'room_count': f"{i % 5 + 1}+1",
+            'created_at': now - timedelta(minutes=i),
+            'features': ['3. Kat', '120 m²', '5 Yaşında'],
+            'images': [f"https://hecdn01.hemlak.com/mncropresize/182/137/ds01/{i}.jpg"],
+        }
+        for i in range(count)
+    ]
+
+def pydantic_path(cards: list) -> bytes:
+    items = [PropertyCardResponse(**card) for card in cards]
+    page = PaginatedResponse(items=items, total=len(cards), page=1, total_pages=1,
+                             has_next=False, has_previous=False)
+    # FastAPI response_model doğrulaması ve varsayılan JSON encoder
+    validated = PaginatedResponse.model_validate(page.model_dump())
+    return JSONResponse(jsonable_encoder(validated, exclude_unset=True)).body
+
+def fast_path(cards: list) -> bytes:
+    return FastJSONResponse({'items': cards, 'total': len(cards), 'page': 1, 'total_pages': 1,
+                             'has_next': False, 'has_previous': False}).body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help="iterations per measurement (scaled down for large pages)")
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+    print(f"{'page size':>10} {'pydantic ms':>12} {'fast ms':>10} {'speedup':>8}")
+    for size in PAGE_SIZES:
+        cards = make_cards(size)
+        number = max(1, args.repeat * 12 // size)
+        slow = min(timeit.repeat(lambda: pydantic_path(cards), number=number, repeat=3)) / number
+        fast = min(timeit.repeat(lambda: fast_path(cards), number=number, repeat=3)) / number
+        print(f"{size:>10} {slow * 1000:>12.3f} {fast * 1000:>10.3f} {slow / fast:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
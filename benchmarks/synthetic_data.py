@@ -0,0 +1,365 @@
+"""Fill the database with synthetic Istanbul listings for load testing.
+
+Usage: python -m benchmarks.synthetic_data --listings 1000000 [--sellers N] [--seed S]
+
+Writes to DATABASE_URL (SQLite or PostgreSQL) the same way the app does:
+properties with location/seller ids, search text and coordinates, their
+features and images, then rebuilds the facet, location, seller and market
+counters that ingestion normally keeps up to date. Listings are spread over
+districts by rough market share, priced from per-district m² prices and
+titled with Turkish strings, so filters and the FTS/geo indexes see a
+realistic distribution. Raw scraped data is not generated.
+"""
+import argparse
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from src.models.database import (
+    engine, init_db, Property, Feature, PropertyImage, Seller, property_features
+)
+from src.models.schemas import PropertyStatus, PropertyCategory
+from src.utils.counts import rebuild_facet_counts
+from src.utils.locations import LocationResolver, rebuild_location_counts, location_slug
+from src.utils.sellers import rebuild_seller_counts
+from src.utils.analytics import refresh_market_stats
+from src.utils.search import build_search_text, setup_search_index
+from src.utils.geo import encode_geohash, setup_geo_index
+
+SessionLocal = sessionmaker(bind=engine)
+
+PROVINCE = 'İstanbul'
+
+# (ilçe, merkez enlem, merkez boylam, satılık m² fiyatı TL, ilan payı, mahalleler)
+DISTRICTS = [
+    ('Esenyurt', 41.034, 28.680, 22000, 10, ['Pınar Mah.', 'Saadetdere Mah.', 'Yeşilkent Mah.', 'Güzelyurt Mah.']),
+    ('Kadıköy', 40.990, 29.029, 95000, 9, ['Moda Mah.', 'Caferağa Mah.', 'Fenerbahçe Mah.', 'Göztepe Mah.', 'Suadiye Mah.', 'Erenköy Mah.']),
+    ('Üsküdar', 41.023, 29.015, 75000, 7, ['Altunizade Mah.', 'Acıbadem Mah.', 'Kuzguncuk Mah.', 'Beylerbeyi Mah.', 'Çengelköy Mah.']),
+    ('Beylikdüzü', 40.982, 28.640, 35000, 7, ['Adnan Kahveci Mah.', 'Cumhuriyet Mah.', 'Yakuplu Mah.', 'Kavaklı Mah.']),
+    ('Beşiktaş', 41.043, 29.007, 120000, 6, ['Ortaköy Mah.', 'Levent Mah.', 'Etiler Mah.', 'Bebek Mah.', 'Akat Mah.', 'Arnavutköy Mah.']),
+    ('Şişli', 41.060, 28.987, 85000, 6, ['Teşvikiye Mah.', 'Mecidiyeköy Mah.', 'Fulya Mah.', 'Esentepe Mah.', 'Cumhuriyet Mah.']),
+    ('Ataşehir', 40.984, 29.107, 65000, 6, ['Atatürk Mah.', 'Barbaros Mah.', 'Küçükbakkalköy Mah.', 'İçerenköy Mah.']),
+    ('Maltepe', 40.935, 29.155, 55000, 6, ['Bağlarbaşı Mah.', 'Cevizli Mah.', 'Feyzullah Mah.', 'İdealtepe Mah.']),
+    ('Pendik', 40.876, 29.233, 38000, 6, ['Kurtköy Mah.', 'Yenişehir Mah.', 'Çamçeşme Mah.', 'Batı Mah.']),
+    ('Başakşehir', 41.093, 28.802, 40000, 6, ['Bahçeşehir 1. Kısım Mah.', 'Kayabaşı Mah.', 'Başak Mah.', 'Ziya Gökalp Mah.']),
+    ('Küçükçekmece', 41.000, 28.780, 35000, 6, ['Atakent Mah.', 'Halkalı Merkez Mah.', 'Cennet Mah.', 'Tevfikbey Mah.']),
+    ('Kartal', 40.889, 29.190, 45000, 5, ['Kordonboyu Mah.', 'Atalar Mah.', 'Uğur Mumcu Mah.', 'Soğanlık Mah.']),
+    ('Bahçelievler', 41.000, 28.860, 40000, 5, ['Şirinevler Mah.', 'Yenibosna Merkez Mah.', 'Siyavuşpaşa Mah.', 'Bahçelievler Mah.']),
+    ('Sarıyer', 41.167, 29.050, 110000, 4, ['Tarabya Mah.', 'Yeniköy Mah.', 'Emirgan Mah.', 'Maslak Mah.', 'İstinye Mah.']),
+    ('Beyoğlu', 41.037, 28.977, 70000, 4, ['Cihangir Mah.', 'Kuloğlu Mah.', 'Kasımpaşa Mah.', 'Hacıahmet Mah.']),
+    ('Bakırköy', 40.980, 28.872, 90000, 4, ['Ataköy 1. Kısım Mah.', 'Yeşilköy Mah.', 'Florya Mah.', 'Kartaltepe Mah.']),
+]
+
+STATUSES = [(PropertyStatus.SATILIK, 70), (PropertyStatus.KIRALIK, 30)]
+# (kategori, URL'deki tip, başlıktaki tip, pay)
+TYPES = [
+    (PropertyCategory.KONUT, 'daire', 'Daire', 70),
+    (PropertyCategory.KONUT, 'residence', 'Rezidans', 8),
+    (PropertyCategory.KONUT, 'villa', 'Villa', 3),
+    (PropertyCategory.KONUT, 'mustakil-ev', 'Müstakil Ev', 4),
+    (PropertyCategory.ISYERI, 'dukkan-magaza', 'Dükkan', 5),
+    (PropertyCategory.ISYERI, 'ofis-buro', 'Ofis', 5),
+    (PropertyCategory.ARSA, 'arsa', 'Arsa', 5),
+]
+ROOMS = [((1, 1), 15), ((2, 1), 35), ((3, 1), 32), ((4, 1), 10), ((5, 2), 5), ((1, 0), 3)]
+DETACHED_ROOMS = [((3, 1), 20), ((4, 1), 40), ((5, 2), 30), ((6, 2), 10)]
+DETACHED_TYPES = {'villa', 'mustakil-ev'}
+# Kira aylık; m² satış fiyatının kabaca 1/220'si
+RENT_RATIO = 220
+
+ADJECTIVES = [
+    'Deniz Manzaralı', 'Metroya Yakın', 'Site İçinde', 'Yeni Binada', 'Bahçeli', 'Asansörlü', 'Otoparklı',
+    'Geniş', 'Masrafsız', 'Krediye Uygun', 'Ara Kat', 'Lüks', 'Fırsat', 'Acil', 'Sahibinden',
+]
+SENTENCES = [
+    'Metroya 5 dakika yürüme mesafesindedir.',
+    'Site içerisinde havuz, spor salonu ve 7/24 güvenlik mevcuttur.',
+    'Kombili, ankastre mutfaklı ve ebeveyn banyolu.',
+    'Krediye uygundur, tapu kat mülkiyetlidir.',
+    'Okullara, hastanelere ve alışveriş merkezlerine yakındır.',
+    'Geniş balkondan deniz manzarası görülmektedir.',
+    'Yerden ısıtma ve akıllı ev sistemi bulunmaktadır.',
+    'Kapalı otopark ve jeneratör mevcuttur.',
+    'Bina depreme dayanıklı yönetmeliğe göre yapılmıştır.',
+    'Çarşıya ve sahile yürüme mesafesindedir.',
+    'Boya badanası yeni yapılmış, taşınmaya hazırdır.',
+    'Minibüs ve otobüs duraklarına yakındır.',
+]
+HEATING = ['Kombi (Doğalgaz)', 'Merkezi (Pay Ölçer)', 'Yerden Isıtma', 'Klima', 'Soba']
+SURNAMES = [
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+    'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek',
+]
+AGENCY_SUFFIXES = ['Emlak', 'Gayrimenkul', 'Gayrimenkul Yatırım Danışmanlığı', 'Emlak Ofisi', 'Yapı ve Emlak']
+MEMBERSHIPS = [('Gold', 15), ('Silver', 25), ('Standart', 60)]
+
+# Satıcıların bu kadarı yereldir (tek ilçede ilan verir)
+LOCAL_SELLER_RATIO = 0.8
+# Ofis büyüklüğü Zipf dağılımı: k. büyük ofisin ağırlığı 1/k^üs
+SELLER_ZIPF_EXPONENT = 0.7
+GEOCODED_RATIO = 0.7
+DELISTED_RATIO = 0.05
+MAX_AGE_DAYS = 180
+# İlçe merkezinden mahalle merkezine ve mahalle içindeki dağılım (derece)
+NEIGHBORHOOD_SPREAD = 0.02
+LISTING_SPREAD = 0.004
+
+_search_parts = {}
+
+def search_text(*parts: str) -> str:
+    """build_search_text ile aynı sonuç; parçalar tekrarlandığı için her parça bir kez sadeleştirilir"""
+    folded = []
+    for part in parts:
+        if part not in _search_parts:
+            _search_parts[part] = build_search_text(part)
+        if _search_parts[part]:
+            folded.append(_search_parts[part])
+    return ' '.join(folded)
+
+def weighted(rng: random.Random, items):
+    return rng.choices([item for item, _ in items], weights=[weight for _, weight in items])[0]
+
+class SyntheticCatalog:
+    """Lokasyon, satıcı ve özellik kayıtlarını oluşturur; ilan üretimi bunların id'lerini kullanır"""
+
+    def __init__(self, rng: random.Random, seller_count: int):
+        self.rng = rng
+        self.seller_count = seller_count
+        self.neighborhoods = []
+        self.district_weights = []
+        self.local_sellers = {}
+        self.global_sellers = []
+        self._cum_weights = {}
+        self.feature_ids = {}
+
+    def create_locations(self, db) -> None:
+        resolver = LocationResolver(db)
+        for name, lat, lon, ppsqm, share, neighborhoods in DISTRICTS:
+            for neighborhood in neighborhoods:
+                ids = resolver.resolve(f"{PROVINCE} / {name} / {neighborhood}")
+                self.neighborhoods.append({
+                    'district': name,
+                    'neighborhood': neighborhood,
+                    'district_slug': location_slug(name),
+                    'neighborhood_slug': location_slug(neighborhood),
+                    'lat': lat + self.rng.uniform(-NEIGHBORHOOD_SPREAD, NEIGHBORHOOD_SPREAD),
+                    'lon': lon + self.rng.uniform(-NEIGHBORHOOD_SPREAD, NEIGHBORHOOD_SPREAD),
+                    # Mahalleler arasında ilçe ortalamasının ±%25'i
+                    'ppsqm': ppsqm * self.rng.uniform(0.75, 1.25),
+                    **ids,
+                })
+                self.district_weights.append(share / len(neighborhoods))
+        db.commit()
+
+    def create_sellers(self, connection) -> None:
+        first_id = (connection.execute(select(func.max(Seller.id))).scalar() or 0) + 1
+        rows = []
+        for index in range(self.seller_count):
+            seller_id = first_id + index
+            district = self.rng.choice(DISTRICTS)[0]
+            name = f"{self.rng.choice(SURNAMES)} {district} {self.rng.choice(AGENCY_SUFFIXES)}"
+            rows.append({
+                'id': seller_id,
+                'name': name,
+                'company': name,
+                'phone': f"0 (212) {self.rng.randint(200, 999)} {self.rng.randint(10, 99)} {self.rng.randint(10, 99)}",
+                'membership_status': weighted(self.rng, MEMBERSHIPS),
+                'profile_url': f"https://www.hepsiemlak.com/emlak-ofisi/{location_slug(name)}-{seller_id}",
+                'listing_count': 0,
+            })
+            if self.rng.random() < LOCAL_SELLER_RATIO:
+                self.local_sellers.setdefault(district, []).append(seller_id)
+            else:
+                self.global_sellers.append(seller_id)
+        connection.execute(insert(Seller.__table__), rows)
+        if not self.global_sellers:
+            self.global_sellers.append(first_id)
+
+    def seller_for(self, district: str) -> int:
+        """Büyük ofisler daha çok ilan verir (Zipf benzeri dağılım)"""
+        pool = self.local_sellers.get(district) if self.rng.random() < LOCAL_SELLER_RATIO else None
+        pool = pool or self.global_sellers
+        if len(pool) not in self._cum_weights:
+            self._cum_weights[len(pool)] = list(itertools.accumulate(
+                1 / (rank + 1) ** SELLER_ZIPF_EXPONENT for rank in range(len(pool))
+            ))
+        return self.rng.choices(pool, cum_weights=self._cum_weights[len(pool)])[0]
+
+    def feature_id(self, connection, name: str) -> int:
+        if name not in self.feature_ids:
+            feature_id = connection.execute(select(Feature.id).where(Feature.name == name)).scalar()
+            if feature_id is None:
+                feature_id = connection.execute(insert(Feature.__table__).values(name=name)).inserted_primary_key[0]
+            self.feature_ids[name] = feature_id
+        return self.feature_ids[name]
+
+def floor_text(floor: int) -> str:
+    if floor < 0:
+        return 'Bodrum Kat'
+    if floor == 0:
+        return 'Giriş Katı'
+    return f"{floor}. Kat"
+
+def make_listing(rng: random.Random, catalog: SyntheticCatalog, property_id: int, now: datetime):
+    """Tek ilanın properties satırı, özellik isimleri ve resim URL'leri"""
+    place = rng.choices(catalog.neighborhoods, weights=catalog.district_weights)[0]
+    status = weighted(rng, STATUSES)
+    category, type_slug, type_name = weighted(rng, [((c, s, n), w) for c, s, n, w in TYPES])
+    seller_id = catalog.seller_for(place['district'])
+
+    if category != PropertyCategory.KONUT:
+        rooms, living_rooms = None, None
+    else:
+        rooms, living_rooms = weighted(rng, DETACHED_ROOMS if type_slug in DETACHED_TYPES else ROOMS)
+    if category == PropertyCategory.ARSA:
+        size = round(rng.lognormvariate(math.log(600), 0.6))
+    elif rooms is not None:
+        size = round(max(35, rng.gauss(30 + rooms * 30, 15)))
+    else:
+        size = round(rng.lognormvariate(math.log(120), 0.5))
+    floor = rng.choice([-1, 0, 0, 1, 1, 2, 2, 3, 3, 4, 5, 6, 8, 10, 15]) if category != PropertyCategory.ARSA else None
+    building_age = min(int(rng.expovariate(1 / 12)), 60) if category != PropertyCategory.ARSA else None
+
+    ppsqm = place['ppsqm'] * rng.lognormvariate(0, 0.25) * (0.3 if category == PropertyCategory.ARSA else 1)
+    if status == PropertyStatus.KIRALIK:
+        price = round(size * ppsqm / RENT_RATIO, -2)
+        status_word = 'Kiralık'
+    else:
+        price = round(size * ppsqm, -4)
+        status_word = 'Satılık'
+
+    room_text = f"{rooms}+{living_rooms}" if rooms is not None else ''
+    title_parts = [place['district'], place['neighborhood'].replace(' Mah.', ''), *rng.sample(ADJECTIVES, rng.randint(1, 2)), room_text, status_word, type_name]
+    title = ' '.join(part for part in title_parts if part)
+    sentences = rng.sample(SENTENCES, rng.randint(3, 6))
+    description = ' '.join(sentences)
+
+    created_at = now - timedelta(days=min(rng.expovariate(1 / 45), MAX_AGE_DAYS), seconds=rng.randint(0, 86400))
+    delisted = rng.random() < DELISTED_RATIO
+    last_seen_at = created_at + (now - created_at) * (rng.uniform(0.3, 0.9) if delisted else 1)
+    district_slug = place['district_slug']
+    external_id = f"{9000 + seller_id}-{property_id}"
+
+    row = {
+        'id': property_id,
+        'external_id': external_id,
+        'title': title,
+        'price': price,
+        'currency': 'TRY',
+        'location': f"{PROVINCE} / {place['district']} / {place['neighborhood']}",
+        'description': description,
+        'status': status,
+        'property_type': category,
+        'size': size,
+        'room_count': rooms,
+        'living_room_count': living_rooms,
+        'floor': floor,
+        'building_age': building_age,
+        'heating_type': rng.choice(HEATING) if category != PropertyCategory.ARSA else None,
+        'bathroom_count': str(rng.choice([1, 1, 2, 2, 3])) if category == PropertyCategory.KONUT else None,
+        'balcony': rng.choice(['Var', 'Var', 'Yok']) if category == PropertyCategory.KONUT else None,
+        'furnished': rng.choice(['Eşyalı', 'Eşyasız', 'Eşyasız']) if category == PropertyCategory.KONUT else None,
+        'url': f"https://www.hepsiemlak.com/istanbul-{district_slug}-{place['neighborhood_slug']}-{status.value}/{type_slug}/{external_id}",
+        'created_at': created_at,
+        'updated_at': last_seen_at,
+        'search_text': search_text(*title_parts, *sentences),
+        'first_seen_at': created_at,
+        'last_seen_at': last_seen_at,
+        'last_search_url': f"https://www.hepsiemlak.com/{district_slug}-{status.value}",
+        'delisted_at': last_seen_at if delisted else None,
+        'latitude': None,
+        'longitude': None,
+        'geohash': None,
+        'geocoded_at': None,
+        'seller_id': seller_id,
+        'province_id': place['province_id'],
+        'district_id': place['district_id'],
+        'neighborhood_id': place['neighborhood_id'],
+    }
+    if rng.random() < GEOCODED_RATIO:
+        lat = place['lat'] + rng.gauss(0, LISTING_SPREAD)
+        lon = place['lon'] + rng.gauss(0, LISTING_SPREAD)
+        row.update(latitude=lat, longitude=lon, geohash=encode_geohash(lat, lon), geocoded_at=last_seen_at)
+
+    features = [f"{size} m²"]
+    if room_text:
+        features.insert(0, room_text)
+    if building_age is not None:
+        features.append('Sıfır Bina' if building_age == 0 else f"{building_age} Yaşında")
+    if floor is not None:
+        features.append(floor_text(floor))
+    images = [
+        f"https://hecdn01.hemlak.com/mncropresize/182/137/ds01/{property_id % 10}/{property_id % 100}/{property_id}_{index}.jpg"
+        for index in range(rng.randint(1, 3))
+    ]
+    return row, features, images
+
+def generate(listing_count: int, seller_count: int, batch_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    init_db()
+    with engine.begin() as connection:
+        setup_search_index(connection)
+        setup_geo_index(connection)
+
+    catalog = SyntheticCatalog(rng, seller_count)
+    db = SessionLocal()
+    try:
+        catalog.create_locations(db)
+    finally:
+        db.close()
+    with engine.begin() as connection:
+        catalog.create_sellers(connection)
+        first_id = (connection.execute(select(func.max(Property.id))).scalar() or 0) + 1
+
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    for batch_start in range(0, listing_count, batch_size):
+        properties, links, images = [], [], []
+        with engine.begin() as connection:
+            for property_id in range(first_id + batch_start, first_id + min(batch_start + batch_size, listing_count)):
+                row, feature_names, image_urls = make_listing(rng, catalog, property_id, now)
+                properties.append(row)
+                links.extend({'property_id': property_id, 'feature_id': catalog.feature_id(connection, name)} for name in feature_names)
+                images.extend(
+                    {'property_id': property_id, 'url': url, 'is_primary': index == 0}
+                    for index, url in enumerate(image_urls)
+                )
+            connection.execute(insert(Property.__table__), properties)
+            connection.execute(insert(property_features), links)
+            connection.execute(insert(PropertyImage.__table__), images)
+        done = min(batch_start + batch_size, listing_count)
+        elapsed = time.perf_counter() - started
+        print(f"{done:>10} listings  {done / elapsed:>8.0f}/s", flush=True)
+
+    # Ingestion'ın artımlı tuttuğu sayaçlar tek seferde baştan hesaplanır
+    print("rebuilding counters...", flush=True)
+    with engine.begin() as connection:
+        rebuild_facet_counts(connection, live_only=True)
+        rebuild_location_counts(connection, live_only=True)
+        rebuild_seller_counts(connection)
+        # Planlayıcı tahminleri (count=estimate) güncel istatistiklere dayanır
+        connection.execute(text("ANALYZE"))
+    db = SessionLocal()
+    try:
+        refresh_market_stats(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"done: {listing_count} listings, {seller_count} sellers in {time.perf_counter() - started:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--listings', type=int, default=100_000, help="number of listings to add")
+    parser.add_argument('--sellers', type=int, default=None, help="number of agencies (default: listings / 50)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="listings per insert transaction")
+    parser.add_argument('--seed', type=int, default=42, help="random seed; the same seed gives the same dataset")
+    args = parser.parse_args()
+    generate(args.listings, args.sellers or max(10, args.listings // 50), args.batch_size, args.seed)
+
+if __name__ == '__main__':
+    main()
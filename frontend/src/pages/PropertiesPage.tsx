@@ -29,19 +29,23 @@ interface Property {
   url: string;
   title?: string;
   price?: number;
+  currency?: string;
   location?: string;
+  room_count?: string;
+  size?: number;
   description?: string;
   created_at?: string;
   features: string[];
   images: string[];
-  seller_info: {
+  seller_info?: {
     name?: string;
     company?: string;
     phone?: string;
     membership_status?: string;
     profile_url?: string;
+    logo_url?: string;
   };
-  raw_data?: any;  // Backend'den gelen ham veriyi saklamak için
+  raw_data?: any;  // Sadece fields=raw_data istendiğinde gelir
 }
 
 interface FilterParams {
@@ -48,6 +48,7 @@ interface PropertyDetail {
     phone?: string;
     membership_status?: string;
     profile_url?: string;
+    logo_url?: string;
   };
   raw_data?: {
     danısman_adi?: string;
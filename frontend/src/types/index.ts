@@ -22,6 +22,7 @@ export interface LocationData {
     iller: string[];
     ilceler: { [key: string]: string[] };  // il -> ilçeler
     mahalleler: { [key: string]: string[] };  // ilçe -> mahalleler
+    ilan_sayilari?: { [key: string]: number };  // 'il / ilçe / mahalle' -> ilan sayısı
 }
 
 export interface CategoryData {
@@ -45,6 +46,7 @@ export interface Property {
         phone?: string;
         membership_status?: string;
         profile_url?: string;
+        logo_url?: string;
     };
     raw_data?: any;
 }
@@ -56,4 +58,5 @@ export interface PaginatedResponse {
     total_pages: number;
     has_next: boolean;
     has_previous: boolean;
+    next_cursor?: string | null;
 } 
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""Typed attribute columns with backfill
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-02-10 10:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the card parsers as of this revision (src.utils.normalizer);
+# migrations must not depend on application code that keeps changing.
+CURRENCY_CODES = {
+    'TL': 'TRY', 'TRY': 'TRY', '₺': 'TRY', 'USD': 'USD', '$': 'USD', 'DOLAR': 'USD',
+    'EUR': 'EUR', '€': 'EUR', 'EURO': 'EUR', 'GBP': 'GBP', '£': 'GBP',
+}
+GROUND_FLOOR_NAMES = ('zemin', 'giris', 'bahce')
+NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+TURKISH_FOLD = str.maketrans('İığüşöçĞÜŞÖÇ', 'iigusocgusoc')
+
+def fold_turkish(text):
+    return re.sub(r'\s+', ' ', text.translate(TURKISH_FOLD).lower()).strip()
+
+def parse_number(text):
+    match = NUMBER_RE.search(text)
+    if not match:
+        return None
+    number = match.group(0)
+    number = number.replace('.', '').replace(',', '.') if ',' in number else number.replace('.', '')
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+def parse_currency(text):
+    if not text or parse_number(text) is None:
+        return None
+    for token in re.findall(r'[A-Za-z]+|[₺$€£]', text):
+        code = CURRENCY_CODES.get(token.upper())
+        if code:
+            return code
+    return 'TRY'
+
+def parse_room_count(text):
+    if not text:
+        return None, None
+    folded = fold_turkish(text)
+    if 'studyo' in folded:
+        return 1, 0
+    numbers = re.findall(r'\d+(?:[.,]5)?', folded)
+    if not numbers:
+        return None, None
+    rooms = int(float(numbers[0].replace(',', '.')))
+    living_rooms = int(float(numbers[1].replace(',', '.'))) if len(numbers) > 1 else 0
+    return rooms, living_rooms
+
+def parse_floor(text):
+    if not text:
+        return None
+    folded = fold_turkish(text)
+    number = re.search(r'-?\d+', folded)
+    if folded.startswith('kot') or 'bodrum' in folded:
+        return -(abs(int(number.group(0))) if number else 1)
+    if number:
+        return int(number.group(0))
+    if any(name in folded for name in GROUND_FLOOR_NAMES):
+        return 0
+    return None
+
+def parse_building_age(text):
+    if not text:
+        return None
+    folded = fold_turkish(text)
+    if 'sifir' in folded or 'yeni' in folded:
+        return 0
+    number = re.search(r'\d+', folded)
+    return int(number.group(0)) if number else None
+
+def typed_attributes(raw):
+    room_count, living_room_count = parse_room_count(raw.get('oda_sayisi'))
+    size = raw.get('metrekare')
+    return {
+        'currency': parse_currency(raw.get('fiyat')),
+        'size': parse_number(size) if size else None,
+        'room_count': room_count,
+        'living_room_count': living_room_count,
+        'floor': parse_floor(raw.get('kat')),
+        'building_age': parse_building_age(raw.get('bina_yasi')),
+    }
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('raw_data', sa.JSON),
+    sa.column('price', sa.Float),
+    sa.column('currency', sa.String),
+    sa.column('size', sa.Float),
+    sa.column('room_count', sa.Integer),
+    sa.column('living_room_count', sa.Integer),
+    sa.column('floor', sa.Integer),
+    sa.column('building_age', sa.Integer),
+)
+
+def backfill_attributes(connection) -> None:
+    """Populate typed columns from raw_data in id-ordered batches."""
+    update_stmt = (
+        properties.update()
+        .where(properties.c.id == sa.bindparam('_id'))
+        .values(
+            currency=sa.bindparam('currency'),
+            size=sa.bindparam('size'),
+            room_count=sa.bindparam('room_count'),
+            living_room_count=sa.bindparam('living_room_count'),
+            floor=sa.bindparam('floor'),
+            building_age=sa.bindparam('building_age'),
+        )
+    )
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(properties.c.id, properties.c.raw_data)
+            .where(properties.c.id > last_id)
+            .order_by(properties.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            params.append({'_id': row.id, **typed_attributes(row.raw_data or {})})
+
+        connection.execute(update_stmt, params)
+        last_id = rows[-1].id
+
+def upgrade() -> None:
+    # Metin kolonlarını tipli kolonlara çevir (şu ana kadar hiç yazılmadılar)
+    op.alter_column('properties', 'room_count', type_=sa.Integer(),
+                    postgresql_using="NULLIF(room_count, '')::integer")
+    op.alter_column('properties', 'floor', type_=sa.Integer(),
+                    postgresql_using="NULLIF(floor, '')::integer")
+    op.alter_column('properties', 'building_age', type_=sa.Integer(),
+                    postgresql_using="NULLIF(building_age, '')::integer")
+    op.alter_column('properties', 'currency', type_=sa.String(3))
+    op.add_column('properties', sa.Column('living_room_count', sa.Integer(), nullable=True))
+
+    backfill_attributes(op.get_bind())
+
+    # Filtrelere uygun indexler
+    op.create_index('ix_properties_size', 'properties', ['size'])
+    op.create_index('ix_properties_rooms', 'properties', ['room_count', 'living_room_count'])
+    op.create_index('ix_properties_floor', 'properties', ['floor'])
+    op.create_index('ix_properties_building_age', 'properties', ['building_age'])
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_building_age', 'properties')
+    op.drop_index('ix_properties_floor', 'properties')
+    op.drop_index('ix_properties_rooms', 'properties')
+    op.drop_index('ix_properties_size', 'properties')
+
+    op.drop_column('properties', 'living_room_count')
+    op.alter_column('properties', 'currency', type_=sa.String())
+    op.alter_column('properties', 'building_age', type_=sa.String())
+    op.alter_column('properties', 'floor', type_=sa.String())
+    op.alter_column('properties', 'room_count', type_=sa.String())
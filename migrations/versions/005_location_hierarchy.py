@@ -0,0 +1,158 @@
+"""Location hierarchy table with indexed foreign keys
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-02-11 10:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+PROVINCE = 1
+DISTRICT = 2
+NEIGHBORHOOD = 3
+
+# Frozen copy of the location parsing and slug rules as of this revision
+# (src.utils.locations, src.utils.url_builder.format_location_name).
+SLUG_REPLACEMENTS = {
+    'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c',
+    'İ': 'i', 'Ğ': 'g', 'Ü': 'u', 'Ş': 's', 'Ö': 'o', 'Ç': 'c',
+    'â': 'a', 'î': 'i', 'û': 'u', 'ê': 'e', 'ô': 'o',
+    'Â': 'a', 'Î': 'i', 'Û': 'u', 'Ê': 'e', 'Ô': 'o'
+}
+
+def location_slug(name):
+    slug = name.lower()
+    for old, new in SLUG_REPLACEMENTS.items():
+        slug = slug.replace(old, new)
+    slug = re.sub(r'[^a-z0-9\s-]', '', slug)
+    slug = re.sub(r'\s+', '-', slug.strip())
+    return re.sub(r'-+', '-', slug)
+
+def parse_location(konum):
+    if not konum:
+        return None, None, None
+    parts = [p.strip() for p in konum.split('/') if p.strip()]
+    parts += [None] * (3 - len(parts))
+    return parts[0], parts[1], parts[2]
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('location', sa.String),
+    sa.column('province_id', sa.Integer),
+    sa.column('district_id', sa.Integer),
+    sa.column('neighborhood_id', sa.Integer),
+)
+
+locations = sa.table(
+    'locations',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('slug', sa.String),
+    sa.column('level', sa.Integer),
+    sa.column('parent_id', sa.Integer),
+)
+
+def backfill_locations(connection) -> None:
+    """Resolve every property's location string into the locations table in batches."""
+    cache = {}
+
+    def get_or_create(name, level, parent_id):
+        key = (level, parent_id, location_slug(name))
+        if key not in cache:
+            cache[key] = connection.execute(
+                locations.insert()
+                .values(name=name, slug=key[2], level=level, parent_id=parent_id)
+                .returning(locations.c.id)
+            ).scalar_one()
+        return cache[key]
+
+    update_stmt = (
+        properties.update()
+        .where(properties.c.id == sa.bindparam('_id'))
+        .values(
+            province_id=sa.bindparam('province_id'),
+            district_id=sa.bindparam('district_id'),
+            neighborhood_id=sa.bindparam('neighborhood_id'),
+        )
+    )
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(properties.c.id, properties.c.location)
+            .where(properties.c.id > last_id)
+            .order_by(properties.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            il, ilce, mahalle = parse_location(row.location)
+            ids = {'_id': row.id, 'province_id': None, 'district_id': None, 'neighborhood_id': None}
+            if il:
+                ids['province_id'] = get_or_create(il, PROVINCE, None)
+            if il and ilce:
+                ids['district_id'] = get_or_create(ilce, DISTRICT, ids['province_id'])
+            if il and ilce and mahalle:
+                ids['neighborhood_id'] = get_or_create(mahalle, NEIGHBORHOOD, ids['district_id'])
+            params.append(ids)
+
+        connection.execute(update_stmt, params)
+        last_id = rows[-1].id
+
+def upgrade() -> None:
+    op.create_table(
+        'locations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('slug', sa.String(), nullable=True),
+        sa.Column('level', sa.Integer(), nullable=True),
+        sa.Column('parent_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['parent_id'], ['locations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('parent_id', 'slug', name='uq_locations_parent_slug')
+    )
+    op.create_index('ix_locations_parent_id', 'locations', ['parent_id'])
+    op.create_index('ix_locations_level_slug', 'locations', ['level', 'slug'])
+
+    op.add_column('properties', sa.Column('province_id', sa.Integer(), nullable=True))
+    op.add_column('properties', sa.Column('district_id', sa.Integer(), nullable=True))
+    op.add_column('properties', sa.Column('neighborhood_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_properties_province_id', 'properties', 'locations', ['province_id'], ['id'])
+    op.create_foreign_key('fk_properties_district_id', 'properties', 'locations', ['district_id'], ['id'])
+    op.create_foreign_key('fk_properties_neighborhood_id', 'properties', 'locations', ['neighborhood_id'], ['id'])
+
+    backfill_locations(op.get_bind())
+
+    op.create_index('ix_properties_province_id', 'properties', ['province_id'])
+    op.create_index('ix_properties_district_id', 'properties', ['district_id'])
+    op.create_index('ix_properties_neighborhood_id', 'properties', ['neighborhood_id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_neighborhood_id', 'properties')
+    op.drop_index('ix_properties_district_id', 'properties')
+    op.drop_index('ix_properties_province_id', 'properties')
+    op.drop_constraint('fk_properties_neighborhood_id', 'properties', type_='foreignkey')
+    op.drop_constraint('fk_properties_district_id', 'properties', type_='foreignkey')
+    op.drop_constraint('fk_properties_province_id', 'properties', type_='foreignkey')
+    op.drop_column('properties', 'neighborhood_id')
+    op.drop_column('properties', 'district_id')
+    op.drop_column('properties', 'province_id')
+
+    op.drop_index('ix_locations_level_slug', 'locations')
+    op.drop_index('ix_locations_parent_id', 'locations')
+    op.drop_table('locations')
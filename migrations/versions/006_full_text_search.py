@@ -0,0 +1,103 @@
+"""Turkish-folded search column with full-text index
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-02-12 10:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the search text rules and index DDL as of this revision (src.utils.search)
+TURKISH_FOLD = str.maketrans('İığüşöçĞÜŞÖÇ', 'iigusocgusoc')
+
+SQLITE_FTS_SETUP = [
+    """CREATE VIRTUAL TABLE properties_fts USING fts5(
+        search_text, content='properties', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_ai AFTER INSERT ON properties BEGIN
+        INSERT INTO properties_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_ad AFTER DELETE ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_au AFTER UPDATE OF search_text ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO properties_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    "INSERT INTO properties_fts(properties_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_properties_search_text ON properties "
+    "USING GIN (to_tsvector('simple', coalesce(search_text, '')))"
+)
+
+def build_search_text(*parts):
+    folded = ' '.join(p for p in parts if p).translate(TURKISH_FOLD).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', folded).strip()
+
+def setup_search_index(connection) -> None:
+    """PostgreSQL: tsvector GIN index; SQLite: FTS5 table kept in sync by triggers."""
+    if connection.dialect.name == 'sqlite':
+        exists = connection.execute(
+            sa.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'properties_fts'")
+        ).first()
+        if not exists:
+            for statement in SQLITE_FTS_SETUP:
+                connection.execute(sa.text(statement))
+    elif connection.dialect.name == 'postgresql':
+        connection.execute(sa.text(POSTGRES_SEARCH_INDEX))
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('description', sa.String),
+    sa.column('search_text', sa.String),
+)
+
+def backfill_search_text(connection) -> None:
+    """Build search_text for existing rows in id-ordered batches."""
+    update_stmt = (
+        properties.update()
+        .where(properties.c.id == sa.bindparam('_id'))
+        .values(search_text=sa.bindparam('search_text'))
+    )
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(properties.c.id, properties.c.title, properties.c.description)
+            .where(properties.c.id > last_id)
+            .order_by(properties.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        connection.execute(update_stmt, [
+            {'_id': row.id, 'search_text': build_search_text(row.title, row.description)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+def upgrade() -> None:
+    op.add_column('properties', sa.Column('search_text', sa.String(), nullable=True))
+    backfill_search_text(op.get_bind())
+    # PostgreSQL: tsvector GIN indexi, SQLite: FTS5 tablosu ve tetikleyiciler
+    setup_search_index(op.get_bind())
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_properties_search_text")
+    op.drop_column('properties', 'search_text')
@@ -0,0 +1,99 @@
+"""Explicit listing status and canonical category columns
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-02-13 10:00:00.000000
+
+"""
+from urllib.parse import urlparse
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the status/category rules as of this revision (src.utils.url_builder)
+STATUS_VALUES = ('satilik', 'kiralik')
+CATEGORY_VALUES = {'konut', 'arsa', 'isyeri', 'devremulk', 'turistik-isletme'}
+CATEGORY_SLUGS = {
+    'konut': 'konut', 'daire': 'konut', 'residence': 'konut', 'villa': 'konut',
+    'mustakil-ev': 'konut', 'yazlik': 'konut', 'ciftlik-evi': 'konut',
+    'arsa': 'arsa', 'muhtelif-arsa': 'arsa', 'imarli-konut': 'arsa', 'imarli-ticari': 'arsa',
+    'konutticaret': 'arsa', 'ozel-kullanim': 'arsa', 'tarla': 'arsa',
+    'isyeri': 'isyeri', 'dukkan': 'isyeri', 'plaza': 'isyeri', 'ofis': 'isyeri',
+    'depo': 'isyeri', 'cafe': 'isyeri',
+    'devremulk': 'devremulk',
+    'turistik-isletme': 'turistik-isletme', 'turistik': 'turistik-isletme',
+}
+
+def classify_listing_url(url):
+    """Status and category values from a listing URL; unrecognised subtypes give category None."""
+    segments = [s for s in urlparse(url.lower()).path.split('/') if s]
+    for index, segment in enumerate(segments):
+        status = next((v for v in STATUS_VALUES if segment == v or segment.endswith(f"-{v}")), None)
+        if status:
+            if index + 1 >= len(segments):
+                return status, 'konut'
+            slug = segments[index + 1]
+            return status, CATEGORY_SLUGS.get(slug) or CATEGORY_SLUGS.get(slug.split('-')[0])
+    return None, None
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('url', sa.String),
+    sa.column('status', sa.String),
+    sa.column('property_type', sa.String),
+)
+
+def backfill_status_and_category(connection) -> None:
+    """Derive status from each URL and canonicalize property_type in batches."""
+    update_stmt = (
+        properties.update()
+        .where(properties.c.id == sa.bindparam('_id'))
+        .values(status=sa.bindparam('status'), property_type=sa.bindparam('property_type'))
+    )
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(properties.c.id, properties.c.url, properties.c.property_type)
+            .where(properties.c.id > last_id)
+            .order_by(properties.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            status, category = classify_listing_url(row.url or '')
+            # Kayıtlı kategori geçerliyse koru, değilse URL'den gelen kategoriyi kullan
+            property_type = row.property_type if row.property_type in CATEGORY_VALUES else (category or 'konut')
+            params.append({'_id': row.id, 'status': status, 'property_type': property_type})
+
+        connection.execute(update_stmt, params)
+        last_id = rows[-1].id
+
+def upgrade() -> None:
+    op.add_column('properties', sa.Column('status', sa.String(32), nullable=True))
+    op.alter_column('properties', 'property_type', type_=sa.String(32))
+
+    backfill_status_and_category(op.get_bind())
+
+    op.create_index(
+        'ix_properties_status_type_created',
+        'properties',
+        ['status', 'property_type', 'created_at']
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_status_type_created', 'properties')
+    op.alter_column('properties', 'property_type', type_=sa.String())
+    op.drop_column('properties', 'status')
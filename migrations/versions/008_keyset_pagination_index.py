@@ -0,0 +1,20 @@
+"""Add (created_at, id) index for keyset pagination
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-02-14 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index('ix_properties_created_at_id', 'properties', ['created_at', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_created_at_id', 'properties')
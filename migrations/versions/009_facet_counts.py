@@ -0,0 +1,47 @@
+"""Facet counters for estimated listing counts
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-02-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+BACKFILL_FACET_COUNTS = """
+    INSERT INTO property_facet_counts (status, property_type, province_id, district_id, count)
+    SELECT status, property_type, province_id, district_id, COUNT(*)
+    FROM properties
+    GROUP BY status, property_type, province_id, district_id
+"""
+
+def upgrade() -> None:
+    op.create_table(
+        'property_facet_counts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(32), nullable=True),
+        sa.Column('property_type', sa.String(32), nullable=True),
+        sa.Column('province_id', sa.Integer(), nullable=True),
+        sa.Column('district_id', sa.Integer(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_property_facet_counts_dims',
+        'property_facet_counts',
+        ['status', 'property_type', 'province_id', 'district_id'],
+        unique=True
+    )
+
+    # Mevcut ilanlardan sayaçları hesapla
+    op.execute(BACKFILL_FACET_COUNTS)
+
+def downgrade() -> None:
+    op.drop_index('ix_property_facet_counts_dims', 'property_facet_counts')
+    op.drop_table('property_facet_counts')
@@ -0,0 +1,32 @@
+"""Listing counts on the location tree
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-02-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+BACKFILL_LOCATION_COUNTS = """
+    UPDATE locations SET listing_count = CASE level
+        WHEN 1 THEN (SELECT COUNT(*) FROM properties WHERE properties.province_id = locations.id)
+        WHEN 2 THEN (SELECT COUNT(*) FROM properties WHERE properties.district_id = locations.id)
+        ELSE (SELECT COUNT(*) FROM properties WHERE properties.neighborhood_id = locations.id)
+    END
+"""
+
+def upgrade() -> None:
+    op.add_column('locations', sa.Column('listing_count', sa.Integer(), nullable=True, server_default='0'))
+
+    # Mevcut ilanlardan düğüm sayılarını hesapla
+    op.execute(BACKFILL_LOCATION_COUNTS)
+
+def downgrade() -> None:
+    op.drop_column('locations', 'listing_count')
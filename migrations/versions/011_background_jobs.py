@@ -0,0 +1,39 @@
+"""Background jobs with resumable progress
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-02-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(32), nullable=True),
+        sa.Column('status', sa.String(16), nullable=True),
+        sa.Column('last_id', sa.Integer(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('processed', sa.Integer(), nullable=True),
+        sa.Column('updated', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_background_jobs_kind', 'background_jobs', ['kind'])
+    op.create_index('ix_background_jobs_status', 'background_jobs', ['status'])
+
+def downgrade() -> None:
+    op.drop_index('ix_background_jobs_status', 'background_jobs')
+    op.drop_index('ix_background_jobs_kind', 'background_jobs')
+    op.drop_table('background_jobs')
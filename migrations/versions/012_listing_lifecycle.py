@@ -0,0 +1,74 @@
+"""Listing lifecycle: seen timestamps, delisting and archive
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-02-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('properties', sa.Column('first_seen_at', sa.DateTime(), nullable=True))
+    op.add_column('properties', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+    op.add_column('properties', sa.Column('last_search_url', sa.String(), nullable=True))
+    op.add_column('properties', sa.Column('delisted_at', sa.DateTime(), nullable=True))
+
+    # Mevcut ilanlar yayında kabul edilir; görülme tarihleri oluşturma/güncelleme tarihinden başlar
+    op.execute("UPDATE properties SET first_seen_at = created_at, last_seen_at = COALESCE(updated_at, created_at)")
+
+    op.create_index('ix_properties_last_seen_at', 'properties', ['last_seen_at'])
+    op.create_index('ix_properties_last_search_url', 'properties', ['last_search_url'])
+    op.create_index('ix_properties_delisted_at', 'properties', ['delisted_at'])
+    op.create_index(
+        'ix_properties_live_created_at_id',
+        'properties',
+        ['created_at', 'id'],
+        postgresql_where=sa.text('delisted_at IS NULL'),
+        sqlite_where=sa.text('delisted_at IS NULL')
+    )
+
+    op.create_table(
+        'properties_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('currency', sa.String(3), nullable=True),
+        sa.Column('location', sa.String(), nullable=True),
+        sa.Column('status', sa.String(32), nullable=True),
+        sa.Column('property_type', sa.String(32), nullable=True),
+        sa.Column('size', sa.Float(), nullable=True),
+        sa.Column('room_count', sa.Integer(), nullable=True),
+        sa.Column('living_room_count', sa.Integer(), nullable=True),
+        sa.Column('province_id', sa.Integer(), nullable=True),
+        sa.Column('district_id', sa.Integer(), nullable=True),
+        sa.Column('neighborhood_id', sa.Integer(), nullable=True),
+        sa.Column('seller_id', sa.Integer(), nullable=True),
+        sa.Column('raw_data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=True),
+        sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+        sa.Column('delisted_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_properties_archive_url', 'properties_archive', ['url'])
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_archive_url', 'properties_archive')
+    op.drop_table('properties_archive')
+    op.drop_index('ix_properties_live_created_at_id', 'properties')
+    op.drop_index('ix_properties_delisted_at', 'properties')
+    op.drop_index('ix_properties_last_search_url', 'properties')
+    op.drop_index('ix_properties_last_seen_at', 'properties')
+    op.drop_column('properties', 'delisted_at')
+    op.drop_column('properties', 'last_search_url')
+    op.drop_column('properties', 'last_seen_at')
+    op.drop_column('properties', 'first_seen_at')
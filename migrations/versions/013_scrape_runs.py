@@ -0,0 +1,47 @@
+"""Scrape runs with per-run listing snapshots
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-02-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'scrape_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('search_url', sa.String(), nullable=True),
+        sa.Column('status', sa.String(16), nullable=True),
+        sa.Column('complete', sa.Boolean(), nullable=True),
+        sa.Column('listing_count', sa.Integer(), nullable=True),
+        sa.Column('new_count', sa.Integer(), nullable=True),
+        sa.Column('updated_count', sa.Integer(), nullable=True),
+        sa.Column('unchanged_count', sa.Integer(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scrape_runs_search_url_id', 'scrape_runs', ['search_url', 'id'])
+
+    op.create_table(
+        'scrape_run_listings',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('currency', sa.String(3), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['scrape_runs.id']),
+        sa.PrimaryKeyConstraint('run_id', 'property_id')
+    )
+
+def downgrade() -> None:
+    op.drop_table('scrape_run_listings')
+    op.drop_index('ix_scrape_runs_search_url_id', 'scrape_runs')
+    op.drop_table('scrape_runs')
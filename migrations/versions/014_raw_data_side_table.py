@@ -0,0 +1,222 @@
+"""Move raw_data to a compressed side table
+
+Revision ID: 014
+Revises: 013
+Create Date: 2025-02-20 10:00:00.000000
+
+"""
+from datetime import datetime
+import hashlib
+import json
+import struct
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    import zstandard
+except ImportError:  # zstandard opsiyonel; yoksa zlib kullanılır
+    zstandard = None
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the raw data storage format as of this revision (src.utils.raw_store).
+# The first byte of a blob names its encoding; dictionary blobs carry a 4-byte dictionary id.
+RAW_JSON = 0
+RAW_ZLIB = 1
+RAW_ZSTD = 2
+RAW_ZSTD_DICT = 3
+ZSTD_LEVEL = 10
+DICTIONARY_SIZE = 16 * 1024
+MIN_TRAINING_SAMPLES = 500
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('raw_data', sa.JSON),
+    sa.column('raw_hash', sa.String),
+)
+
+property_raw_data = sa.table(
+    'property_raw_data',
+    sa.column('property_id', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+archive = sa.table(
+    'properties_archive',
+    sa.column('id', sa.Integer),
+    sa.column('raw_data', sa.JSON),
+    sa.column('raw_blob', sa.LargeBinary),
+)
+
+dictionaries = sa.table(
+    'raw_data_dictionaries',
+    sa.column('id', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+    sa.column('created_at', sa.DateTime),
+)
+
+def canonical_json(data) -> bytes:
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def raw_data_hash(data) -> str:
+    return hashlib.sha1(canonical_json(data)).hexdigest()
+
+class RawCodec:
+    """Encodes raw listing JSON the way the application reads it (zstd with a trained dictionary, zstd, or zlib)."""
+
+    def __init__(self):
+        self.dictionaries = {}
+        self.active_id = None
+
+    def train(self, connection, samples) -> None:
+        payloads = [canonical_json(sample) for sample in samples]
+        if zstandard is None or len(payloads) < MIN_TRAINING_SAMPLES:
+            return
+        dictionary = zstandard.train_dictionary(DICTIONARY_SIZE, payloads)
+        self.active_id = connection.execute(
+            dictionaries.insert().values(data=dictionary.as_bytes(), created_at=datetime.utcnow())
+            .returning(dictionaries.c.id)
+        ).scalar_one()
+        self.dictionaries[self.active_id] = dictionary
+
+    def load(self, connection) -> None:
+        if zstandard is None:
+            return
+        for row in connection.execute(sa.select(dictionaries.c.id, dictionaries.c.data)):
+            self.dictionaries[row.id] = zstandard.ZstdCompressionDict(row.data)
+
+    def encode(self, data) -> bytes:
+        payload = canonical_json(data)
+        if self.active_id is not None:
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self.dictionaries[self.active_id])
+            return bytes([RAW_ZSTD_DICT]) + struct.pack('>I', self.active_id) + compressor.compress(payload)
+        if zstandard is None:
+            return bytes([RAW_ZLIB]) + zlib.compress(payload, 6)
+        return bytes([RAW_ZSTD]) + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+
+    def decode(self, blob: bytes):
+        codec, body = blob[0], blob[1:]
+        if codec == RAW_JSON:
+            payload = body
+        elif codec == RAW_ZLIB:
+            payload = zlib.decompress(body)
+        elif zstandard is None:
+            raise ValueError("zstd ile sıkıştırılmış veri için zstandard paketi gerekli")
+        elif codec == RAW_ZSTD:
+            payload = zstandard.ZstdDecompressor().decompress(body)
+        elif codec == RAW_ZSTD_DICT:
+            dictionary_id = struct.unpack('>I', body[:4])[0]
+            payload = zstandard.ZstdDecompressor(dict_data=self.dictionaries[dictionary_id]).decompress(body[4:])
+        else:
+            raise ValueError(f"Bilinmeyen sıkıştırma kodlaması: {codec}")
+        return json.loads(payload)
+
+def iter_batches(connection, key, value):
+    """Yield key-ordered batches of (key, value) rows that have a value."""
+    last_key = 0
+    while True:
+        rows = connection.execute(
+            sa.select(key, value)
+            .where(key > last_key)
+            .order_by(key)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        last_key = rows[-1][0]
+        rows = [row for row in rows if row[1]]
+        if rows:
+            yield rows
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    op.create_table(
+        'raw_data_dictionaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'property_raw_data',
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id']),
+        sa.PrimaryKeyConstraint('property_id')
+    )
+    if connection.dialect.name == 'postgresql':
+        # Veri zaten sıkıştırılmış; TOAST'un tekrar sıkıştırmayı denemesini engelle
+        op.execute("ALTER TABLE property_raw_data ALTER COLUMN data SET STORAGE EXTERNAL")
+    op.add_column('properties', sa.Column('raw_hash', sa.String(40), nullable=True))
+
+    # Son kayıtlardan sıkıştırma sözlüğü eğit (zstandard kuruluysa ve yeterli örnek varsa)
+    raw_codec = RawCodec()
+    samples = connection.execute(
+        sa.select(properties.c.raw_data)
+        .where(properties.c.raw_data.isnot(None))
+        .order_by(properties.c.id.desc())
+        .limit(MIN_TRAINING_SAMPLES * 4)
+    ).scalars().all()
+    raw_codec.train(connection, samples)
+
+    for rows in iter_batches(connection, properties.c.id, properties.c.raw_data):
+        connection.execute(property_raw_data.insert(), [
+            {'property_id': row.id, 'data': raw_codec.encode(row.raw_data)} for row in rows
+        ])
+        connection.execute(
+            properties.update().where(properties.c.id == sa.bindparam('_id')).values(raw_hash=sa.bindparam('raw_hash')),
+            [{'_id': row.id, 'raw_hash': raw_data_hash(row.raw_data)} for row in rows]
+        )
+
+    # properties satırları daralır; PostgreSQL'de alan VACUUM FULL ile geri kazanılır
+    with op.batch_alter_table('properties') as batch_op:
+        batch_op.drop_column('raw_data')
+
+    # Arşivdeki ham veri de aynı sıkıştırılmış biçime çevrilir
+    op.add_column('properties_archive', sa.Column('raw_blob', sa.LargeBinary(), nullable=True))
+    for rows in iter_batches(connection, archive.c.id, archive.c.raw_data):
+        connection.execute(
+            archive.update().where(archive.c.id == sa.bindparam('_id')).values(raw_blob=sa.bindparam('raw_blob')),
+            [{'_id': row.id, 'raw_blob': raw_codec.encode(row.raw_data)} for row in rows]
+        )
+    with op.batch_alter_table('properties_archive') as batch_op:
+        batch_op.drop_column('raw_data')
+        batch_op.alter_column('raw_blob', new_column_name='raw_data')
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    raw_codec = RawCodec()
+    raw_codec.load(connection)
+
+    op.add_column('properties', sa.Column('raw_data', sa.JSON(), nullable=True))
+    for rows in iter_batches(connection, property_raw_data.c.property_id, property_raw_data.c.data):
+        connection.execute(
+            properties.update().where(properties.c.id == sa.bindparam('_id')).values(raw_data=sa.bindparam('raw_data')),
+            [{'_id': row.property_id, 'raw_data': raw_codec.decode(row.data)} for row in rows]
+        )
+
+    op.add_column('properties_archive', sa.Column('raw_json', sa.JSON(), nullable=True))
+    archive_blob = sa.table('properties_archive', sa.column('id', sa.Integer), sa.column('raw_data', sa.LargeBinary), sa.column('raw_json', sa.JSON))
+    for rows in iter_batches(connection, archive_blob.c.id, archive_blob.c.raw_data):
+        connection.execute(
+            archive_blob.update().where(archive_blob.c.id == sa.bindparam('_id')).values(raw_json=sa.bindparam('raw_json')),
+            [{'_id': row.id, 'raw_json': raw_codec.decode(row.raw_data)} for row in rows]
+        )
+    with op.batch_alter_table('properties_archive') as batch_op:
+        batch_op.drop_column('raw_data')
+        batch_op.alter_column('raw_json', new_column_name='raw_data')
+
+    with op.batch_alter_table('properties') as batch_op:
+        batch_op.drop_column('raw_hash')
+    op.drop_table('property_raw_data')
+    op.drop_table('raw_data_dictionaries')
@@ -0,0 +1,157 @@
+"""Seller dimension deduplicated by profile URL
+
+Revision ID: 015
+Revises: 014
+Create Date: 2025-02-21 10:00:00.000000
+
+"""
+import json
+import struct
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    import zstandard
+except ImportError:  # zstandard opsiyonel; yoksa zlib kullanılır
+    zstandard = None
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('seller_id', sa.Integer),
+)
+
+property_raw_data = sa.table(
+    'property_raw_data',
+    sa.column('property_id', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+dictionaries = sa.table(
+    'raw_data_dictionaries',
+    sa.column('id', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+sellers = sa.table(
+    'sellers',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('company', sa.String),
+    sa.column('phone', sa.String),
+    sa.column('profile_url', sa.String),
+    sa.column('logo_url', sa.String),
+    sa.column('listing_count', sa.Integer),
+)
+
+REBUILD_SELLER_COUNTS = """
+    UPDATE sellers SET listing_count = (
+        SELECT COUNT(*) FROM properties
+        WHERE properties.seller_id = sellers.id AND properties.delisted_at IS NULL
+    )
+"""
+
+def decode_raw(blob: bytes, zstd_dictionaries: dict):
+    """Frozen reader for the raw data format written by revision 014."""
+    codec, body = blob[0], blob[1:]
+    if codec == 0:
+        payload = body
+    elif codec == 1:
+        payload = zlib.decompress(body)
+    elif zstandard is None:
+        raise ValueError("zstd ile sıkıştırılmış veri için zstandard paketi gerekli")
+    elif codec == 2:
+        payload = zstandard.ZstdDecompressor().decompress(body)
+    else:
+        dictionary_id = struct.unpack('>I', body[:4])[0]
+        payload = zstandard.ZstdDecompressor(dict_data=zstd_dictionaries[dictionary_id]).decompress(body[4:])
+    return json.loads(payload)
+
+def seller_fields(listing: dict):
+    """Office fields of a listing card; the office row never takes the consultant's name."""
+    profile_url = listing.get('emlak_ofisi_url')
+    if not profile_url:
+        return None
+    phones = listing.get('telefon_numaralari') or []
+    return {
+        'profile_url': profile_url,
+        'company': listing.get('emlak_ofisi') or None,
+        'name': listing.get('emlak_ofisi') or None,
+        'phone': phones[0] if phones else None,
+        'logo_url': listing.get('emlak_ofisi_logo') or None,
+    }
+
+def backfill_sellers(connection) -> None:
+    """Create sellers from stored raw listing data and link properties in batches."""
+    zstd_dictionaries = {}
+    if zstandard is not None:
+        for row in connection.execute(sa.select(dictionaries.c.id, dictionaries.c.data)):
+            zstd_dictionaries[row.id] = zstandard.ZstdCompressionDict(row.data)
+    seller_ids = {}
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(property_raw_data.c.property_id, property_raw_data.c.data)
+            .where(property_raw_data.c.property_id > last_id)
+            .order_by(property_raw_data.c.property_id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].property_id
+
+        links = {}
+        incoming = {}
+        for row in rows:
+            fields = seller_fields(decode_raw(row.data, zstd_dictionaries)) if row.data else None
+            if fields:
+                links[row.property_id] = fields['profile_url']
+                # Aynı ofis birden çok ilanda geçer; dolu alanlar birleştirilir
+                incoming.setdefault(fields['profile_url'], {}).update({k: v for k, v in fields.items() if v})
+
+        missing = [url for url in incoming if url not in seller_ids]
+        if missing:
+            seller_ids.update(connection.execute(
+                sa.select(sellers.c.profile_url, sellers.c.id).where(sellers.c.profile_url.in_(missing))
+            ).all())
+            new_rows = [
+                dict({column: incoming[url].get(column) for column in ('profile_url', 'company', 'name', 'phone', 'logo_url')}, listing_count=0)
+                for url in missing if url not in seller_ids
+            ]
+            if new_rows:
+                connection.execute(sellers.insert(), new_rows)
+                seller_ids.update(connection.execute(
+                    sa.select(sellers.c.profile_url, sellers.c.id).where(sellers.c.profile_url.in_(missing))
+                ).all())
+
+        if links:
+            connection.execute(
+                properties.update().where(properties.c.id == sa.bindparam('_id')).values(seller_id=sa.bindparam('seller_id')),
+                [{'_id': property_id, 'seller_id': seller_ids[url]} for property_id, url in links.items()]
+            )
+
+def upgrade() -> None:
+    op.add_column('sellers', sa.Column('logo_url', sa.String(), nullable=True))
+    op.add_column('sellers', sa.Column('listing_count', sa.Integer(), nullable=True, server_default='0'))
+    op.create_index('ix_sellers_profile_url', 'sellers', ['profile_url'], unique=True)
+    op.create_index('ix_properties_seller_id', 'properties', ['seller_id'])
+
+    backfill_sellers(op.get_bind())
+    op.execute(REBUILD_SELLER_COUNTS)
+
+def downgrade() -> None:
+    op.drop_index('ix_properties_seller_id', 'properties')
+    op.drop_index('ix_sellers_profile_url', 'sellers')
+    op.drop_column('sellers', 'listing_count')
+    op.drop_column('sellers', 'logo_url')
@@ -0,0 +1,41 @@
+"""Archive of fetched search result pages
+
+Revision ID: 016
+Revises: 015
+Create Date: 2025-02-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Sayfa içerikleri PAGE_ARCHIVE_DIR altında sha256 adıyla tutulur; tablo sadece metadata içerir
+    op.create_table(
+        'page_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(64), nullable=True),
+        sa.Column('url', sa.String(), nullable=True),
+        sa.Column('search_url', sa.String(), nullable=True),
+        sa.Column('run_id', sa.Integer(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['scrape_runs.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_page_archive_sha256', 'page_archive', ['sha256'])
+    op.create_index('ix_page_archive_search_url', 'page_archive', ['search_url'])
+    op.create_index('ix_page_archive_run_id', 'page_archive', ['run_id'])
+    op.create_index('ix_page_archive_fetched_at', 'page_archive', ['fetched_at'])
+
+def downgrade() -> None:
+    op.drop_index('ix_page_archive_fetched_at', 'page_archive')
+    op.drop_index('ix_page_archive_run_id', 'page_archive')
+    op.drop_index('ix_page_archive_search_url', 'page_archive')
+    op.drop_index('ix_page_archive_sha256', 'page_archive')
+    op.drop_table('page_archive')
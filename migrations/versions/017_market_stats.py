@@ -0,0 +1,135 @@
+"""Precomputed market statistics per district, category and room count
+
+Revision ID: 017
+Revises: 016
+Create Date: 2025-02-23 10:00:00.000000
+
+"""
+from datetime import datetime
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+MARKET_CURRENCY = 'TRY'
+
+market_stats = sa.table(
+    'market_stats',
+    *(sa.column(name, sa.String) for name in ('status', 'property_type', 'period')),
+    *(sa.column(name, sa.Integer) for name in ('district_id', 'room_count', 'listing_count', 'ppsqm_count')),
+    *(sa.column(name, sa.Float) for name in (
+        'price_sum', 'ppsqm_sum', 'price_p25', 'price_median', 'price_p75', 'ppsqm_median'
+    )),
+    sa.column('refreshed_at', sa.DateTime),
+)
+
+def listing_source(name: str):
+    return sa.table(
+        name,
+        *(sa.column(column, sa.String) for column in ('status', 'property_type', 'currency')),
+        *(sa.column(column, sa.Integer) for column in ('district_id', 'room_count')),
+        *(sa.column(column, sa.Float) for column in ('price', 'size')),
+        *(sa.column(column, sa.DateTime) for column in ('first_seen_at', 'created_at', 'delisted_at')),
+    )
+
+def quantile(values: list, q: float):
+    """Linear interpolation between closest ranks (numpy.percentile default) on sorted values."""
+    position = q * (len(values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2)
+
+def refresh_market_stats(connection) -> None:
+    """Frozen copy of src.utils.analytics.refresh_market_stats as of this revision.
+
+    Rows are grouped by district (or all), room count (or all) and either
+    live listings (period NULL) or the month first seen, over live/delisted
+    listings and the archive.
+    """
+    def source(table, live):
+        return sa.select(
+            table.c.status, table.c.property_type, table.c.district_id, table.c.room_count,
+            sa.func.coalesce(table.c.first_seen_at, table.c.created_at).label('seen_at'),
+            table.c.price, table.c.size, live.label('live')
+        ).where(
+            table.c.district_id.isnot(None),
+            table.c.status.isnot(None),
+            table.c.property_type.isnot(None),
+            table.c.price > 0,
+            (table.c.currency == MARKET_CURRENCY) | table.c.currency.is_(None)
+        )
+
+    properties = listing_source('properties')
+    archive = listing_source('properties_archive')
+    rows = connection.execute(sa.union_all(
+        source(properties, properties.c.delisted_at.is_(None)),
+        source(archive, sa.literal(False))
+    )).all()
+
+    groups = {}
+    for row in rows:
+        period = row.seen_at.strftime('%Y-%m') if row.seen_at else None
+        ppsqm = row.price / row.size if row.size and row.size > 0 else None
+        for district_id in (row.district_id, None):
+            for room_count in ({row.room_count, None} if row.room_count is not None else {None}):
+                for key_period in ([None] if row.live else []) + ([period] if period else []):
+                    key = (row.status, row.property_type, district_id, room_count, key_period)
+                    groups.setdefault(key, []).append((row.price, ppsqm))
+
+    now = datetime.utcnow()
+    records = []
+    for (status, property_type, district_id, room_count, period), values in groups.items():
+        prices = sorted(price for price, _ in values)
+        ppsqms = sorted(ppsqm for _, ppsqm in values if ppsqm is not None)
+        records.append({
+            'status': status, 'property_type': property_type, 'district_id': district_id,
+            'room_count': room_count, 'period': period,
+            'listing_count': len(prices), 'price_sum': float(sum(prices)),
+            'ppsqm_sum': float(sum(ppsqms)), 'ppsqm_count': len(ppsqms),
+            'price_p25': quantile(prices, 0.25), 'price_median': quantile(prices, 0.5),
+            'price_p75': quantile(prices, 0.75),
+            'ppsqm_median': quantile(ppsqms, 0.5) if ppsqms else None,
+            'refreshed_at': now,
+        })
+
+    connection.execute(market_stats.delete())
+    for start in range(0, len(records), 1000):
+        connection.execute(market_stats.insert(), records[start:start + 1000])
+
+def upgrade() -> None:
+    op.create_table(
+        'market_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(32), nullable=True),
+        sa.Column('property_type', sa.String(32), nullable=True),
+        sa.Column('district_id', sa.Integer(), nullable=True),
+        sa.Column('room_count', sa.Integer(), nullable=True),
+        sa.Column('period', sa.String(7), nullable=True),
+        sa.Column('listing_count', sa.Integer(), nullable=True),
+        sa.Column('price_sum', sa.Float(), nullable=True),
+        sa.Column('ppsqm_sum', sa.Float(), nullable=True),
+        sa.Column('ppsqm_count', sa.Integer(), nullable=True),
+        sa.Column('price_p25', sa.Float(), nullable=True),
+        sa.Column('price_median', sa.Float(), nullable=True),
+        sa.Column('price_p75', sa.Float(), nullable=True),
+        sa.Column('ppsqm_median', sa.Float(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_market_stats_dims',
+        'market_stats',
+        ['status', 'property_type', 'district_id', 'room_count', 'period']
+    )
+    # Mevcut ilanlardan ilk hesaplama
+    refresh_market_stats(op.get_bind())
+
+def downgrade() -> None:
+    op.drop_index('ix_market_stats_dims', 'market_stats')
+    op.drop_table('market_stats')
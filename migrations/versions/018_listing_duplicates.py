@@ -0,0 +1,213 @@
+"""MinHash signatures and LSH buckets for cross-agency duplicate detection
+
+Revision ID: 018
+Revises: 017
+Create Date: 2025-02-24 10:00:00.000000
+
+"""
+from datetime import datetime
+from urllib.parse import urlparse
+import hashlib
+import posixpath
+import re
+import zlib
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+# Frozen copy of the MinHash/LSH parameters and fingerprint rules as of this revision
+# (src.utils.dedup). Signatures are stored, so these must match what the application writes.
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.6
+SIZE_TOLERANCE = 0.1
+MAX_CANDIDATES = 500
+TITLE_STOPWORDS = {
+    'satilik', 'kiralik', 'daire', 'ev', 'evi', 'emlak', 'sahibinden', 'acil',
+    'firsat', 'ile', 've', 'den', 'dan', 'da', 'de', 'bir', 'cok',
+}
+TURKISH_FOLD = str.maketrans('İığüşöçĞÜŞÖÇ', 'iigusocgusoc')
+
+MINHASH_SEED = 20250224
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(MINHASH_SEED)
+PERM_A = _rng.integers(1, 1 << 29, NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+
+properties = sa.table(
+    'properties',
+    sa.column('id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('district_id', sa.Integer),
+    sa.column('neighborhood_id', sa.Integer),
+    sa.column('size', sa.Float),
+    sa.column('room_count', sa.Integer),
+    sa.column('living_room_count', sa.Integer),
+    sa.column('floor', sa.Integer),
+)
+
+property_images = sa.table(
+    'property_images',
+    sa.column('property_id', sa.Integer),
+    sa.column('url', sa.String),
+    sa.column('is_primary', sa.Boolean),
+)
+
+signatures = sa.table(
+    'listing_signatures',
+    sa.column('property_id', sa.Integer),
+    sa.column('signature', sa.LargeBinary),
+    sa.column('cluster_id', sa.Integer),
+    sa.column('updated_at', sa.DateTime),
+)
+
+buckets_table = sa.table(
+    'listing_lsh_buckets',
+    sa.column('band', sa.Integer),
+    sa.column('bucket', sa.BigInteger),
+    sa.column('property_id', sa.Integer),
+)
+
+def listing_tokens(row, image_url):
+    folded = (row.title or '').translate(TURKISH_FOLD).lower()
+    words = [w for w in re.sub(r'[^a-z0-9]+', ' ', folded).split() if len(w) > 2 and w not in TITLE_STOPWORDS]
+    tokens = {f"t:{word}" for word in words}
+    tokens.update(f"t:{first}_{second}" for first, second in zip(words, words[1:]))
+    if row.district_id is not None:
+        tokens.add(f"d:{row.district_id}")
+    if row.neighborhood_id is not None:
+        tokens.add(f"n:{row.neighborhood_id}")
+    if row.size:
+        tokens.add(f"m2:{int(round(row.size / 5))}")
+    if row.room_count is not None:
+        tokens.add(f"r:{row.room_count}+{row.living_room_count or 0}")
+    if row.floor is not None:
+        tokens.add(f"k:{row.floor}")
+    if image_url:
+        tokens.add(f"img:{posixpath.basename(urlparse(image_url).path)}")
+    return tokens
+
+def minhash(tokens):
+    if not tokens:
+        return None
+    hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens))
+    permuted = (hashes[:, None] * PERM_A + PERM_B) % MERSENNE_PRIME
+    return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+def band_buckets(signature):
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+def compatible(row, candidate) -> bool:
+    if row.room_count is not None and candidate.room_count is not None and row.room_count != candidate.room_count:
+        return False
+    if row.district_id is not None and candidate.district_id is not None and row.district_id != candidate.district_id:
+        return False
+    if row.size and candidate.size:
+        return abs(row.size - candidate.size) <= SIZE_TOLERANCE * max(row.size, candidate.size)
+    return True
+
+def index_listing(connection, row, image_url) -> None:
+    """Insert one listing's signature and buckets, merging it into the clusters of matching candidates."""
+    signature = minhash(listing_tokens(row, image_url))
+    if signature is None:
+        return
+    signature_bytes = signature.tobytes()
+    buckets = band_buckets(signature)
+
+    candidate_ids = connection.execute(
+        sa.select(buckets_table.c.property_id).where(
+            sa.or_(*[sa.and_(buckets_table.c.band == band, buckets_table.c.bucket == bucket) for band, bucket in buckets])
+        ).distinct().limit(MAX_CANDIDATES)
+    ).scalars().all()
+
+    matched_clusters = set()
+    if candidate_ids:
+        candidates = connection.execute(
+            sa.select(
+                signatures.c.signature, signatures.c.cluster_id,
+                properties.c.room_count, properties.c.district_id, properties.c.size
+            ).join(properties, properties.c.id == signatures.c.property_id).where(
+                signatures.c.property_id.in_(candidate_ids)
+            )
+        ).all()
+        own = np.frombuffer(signature_bytes, dtype=np.uint32)
+        for candidate in candidates:
+            similarity = float(np.mean(own == np.frombuffer(candidate.signature, dtype=np.uint32)))
+            if compatible(row, candidate) and similarity >= DUPLICATE_THRESHOLD:
+                matched_clusters.add(candidate.cluster_id)
+
+    cluster_id = min(matched_clusters | {row.id})
+    if matched_clusters - {cluster_id}:
+        connection.execute(signatures.update().where(
+            signatures.c.cluster_id.in_(matched_clusters - {cluster_id})
+        ).values(cluster_id=cluster_id))
+
+    connection.execute(signatures.insert().values(
+        property_id=row.id, signature=signature_bytes, cluster_id=cluster_id, updated_at=datetime.utcnow()
+    ))
+    connection.execute(buckets_table.insert(), [
+        {'band': band, 'bucket': bucket, 'property_id': row.id} for band, bucket in buckets
+    ])
+
+def rebuild_duplicate_index(connection) -> None:
+    """Index existing listings in id order, reading only the fingerprint columns."""
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(properties).where(properties.c.id > last_id).order_by(properties.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        images = dict(connection.execute(
+            sa.select(property_images.c.property_id, property_images.c.url).where(
+                property_images.c.property_id.in_([row.id for row in rows]),
+                property_images.c.is_primary.is_(True)
+            )
+        ).all())
+        for row in rows:
+            index_listing(connection, row, images.get(row.id))
+
+def upgrade() -> None:
+    op.create_table(
+        'listing_signatures',
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=True),
+        sa.Column('cluster_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id']),
+        sa.PrimaryKeyConstraint('property_id')
+    )
+    op.create_index('ix_listing_signatures_cluster_id', 'listing_signatures', ['cluster_id'])
+    op.create_table(
+        'listing_lsh_buckets',
+        sa.Column('band', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id']),
+        sa.PrimaryKeyConstraint('band', 'bucket', 'property_id')
+    )
+    op.create_index('ix_listing_lsh_buckets_property_id', 'listing_lsh_buckets', ['property_id'])
+    # Mevcut ilanlar indekse eklenir; eşleşme aramaları kovalar üzerinden yapılır
+    rebuild_duplicate_index(op.get_bind())
+
+def downgrade() -> None:
+    op.drop_index('ix_listing_lsh_buckets_property_id', 'listing_lsh_buckets')
+    op.drop_table('listing_lsh_buckets')
+    op.drop_index('ix_listing_signatures_cluster_id', 'listing_signatures')
+    op.drop_table('listing_signatures')
@@ -0,0 +1,67 @@
+"""Listing coordinates with a spatial index
+
+Revision ID: 019
+Revises: 018
+Create Date: 2025-02-25 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of the spatial index DDL as of this revision (src.utils.geo)
+SQLITE_RTREE_SETUP = [
+    "CREATE VIRTUAL TABLE property_geo_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    """CREATE TRIGGER IF NOT EXISTS properties_geo_ai AFTER INSERT ON properties
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO property_geo_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_geo_ad AFTER DELETE ON properties BEGIN
+        DELETE FROM property_geo_rtree WHERE id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_geo_au AFTER UPDATE OF latitude, longitude ON properties BEGIN
+        DELETE FROM property_geo_rtree WHERE id = old.id;
+        INSERT INTO property_geo_rtree SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END""",
+]
+
+POSTGRES_GEOHASH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_properties_geohash ON properties (geohash text_pattern_ops)"
+)
+
+def setup_geo_index(connection) -> None:
+    """SQLite: R*Tree table kept in sync by triggers; PostgreSQL: geohash prefix index."""
+    if connection.dialect.name == 'sqlite':
+        exists = connection.execute(
+            sa.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'property_geo_rtree'")
+        ).first()
+        if not exists:
+            for statement in SQLITE_RTREE_SETUP:
+                connection.execute(sa.text(statement))
+    elif connection.dialect.name == 'postgresql':
+        connection.execute(sa.text(POSTGRES_GEOHASH_INDEX))
+
+def upgrade() -> None:
+    op.add_column('properties', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('properties', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('properties', sa.Column('geohash', sa.String(12), nullable=True))
+    op.add_column('properties', sa.Column('geocoded_at', sa.DateTime(), nullable=True))
+    op.add_column('properties_archive', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('properties_archive', sa.Column('longitude', sa.Float(), nullable=True))
+    # PostgreSQL: geohash önek indexi, SQLite: R*Tree tablosu ve tetikleyiciler
+    setup_geo_index(op.get_bind())
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_properties_geohash")
+    op.drop_column('properties_archive', 'longitude')
+    op.drop_column('properties_archive', 'latitude')
+    op.drop_column('properties', 'geocoded_at')
+    op.drop_column('properties', 'geohash')
+    op.drop_column('properties', 'longitude')
+    op.drop_column('properties', 'latitude')
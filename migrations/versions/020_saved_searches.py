@@ -0,0 +1,51 @@
+"""Saved searches and notification outbox
+
+Revision ID: 020
+Revises: 019
+Create Date: 2025-02-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'saved_searches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('owner', sa.String(), nullable=True),
+        sa.Column('filters', sa.JSON(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_saved_searches_owner', 'saved_searches', ['owner'])
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('saved_search_id', sa.Integer(), nullable=True),
+        sa.Column('property_id', sa.Integer(), nullable=True),
+        sa.Column('event', sa.String(20), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('previous_price', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['saved_search_id'], ['saved_searches.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notification_outbox_saved_search_id', 'notification_outbox', ['saved_search_id'])
+    op.create_index('ix_notification_outbox_pending', 'notification_outbox', ['sent_at', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_pending', 'notification_outbox')
+    op.drop_index('ix_notification_outbox_saved_search_id', 'notification_outbox')
+    op.drop_table('notification_outbox')
+    op.drop_index('ix_saved_searches_owner', 'saved_searches')
+    op.drop_table('saved_searches')
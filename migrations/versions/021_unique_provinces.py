@@ -0,0 +1,184 @@
+"""Unique province slugs (parent_id IS NULL is not covered by uq_locations_parent_slug)
+
+Revision ID: 021
+Revises: 020
+Create Date: 2025-02-27 10:00:00.000000
+
+"""
+from datetime import datetime
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+PROVINCE = 1
+DISTRICT = 2
+NEIGHBORHOOD = 3
+
+LEVEL_COLUMNS = {PROVINCE: 'province_id', DISTRICT: 'district_id', NEIGHBORHOOD: 'neighborhood_id'}
+
+REBUILD_LIVE_COUNTS = [
+    """UPDATE locations SET listing_count = CASE level
+        WHEN 1 THEN (SELECT COUNT(*) FROM properties WHERE properties.province_id = locations.id AND properties.delisted_at IS NULL)
+        WHEN 2 THEN (SELECT COUNT(*) FROM properties WHERE properties.district_id = locations.id AND properties.delisted_at IS NULL)
+        ELSE (SELECT COUNT(*) FROM properties WHERE properties.neighborhood_id = locations.id AND properties.delisted_at IS NULL)
+    END""",
+    "DELETE FROM property_facet_counts",
+    """INSERT INTO property_facet_counts (status, property_type, province_id, district_id, count)
+       SELECT status, property_type, province_id, district_id, COUNT(*)
+       FROM properties
+       WHERE delisted_at IS NULL
+       GROUP BY status, property_type, province_id, district_id""",
+]
+
+MARKET_CURRENCY = 'TRY'
+
+market_stats = sa.table(
+    'market_stats',
+    *(sa.column(name, sa.String) for name in ('status', 'property_type', 'period')),
+    *(sa.column(name, sa.Integer) for name in ('district_id', 'room_count', 'listing_count', 'ppsqm_count')),
+    *(sa.column(name, sa.Float) for name in (
+        'price_sum', 'ppsqm_sum', 'price_p25', 'price_median', 'price_p75', 'ppsqm_median'
+    )),
+    sa.column('refreshed_at', sa.DateTime),
+)
+
+def listing_source(name: str):
+    return sa.table(
+        name,
+        *(sa.column(column, sa.String) for column in ('status', 'property_type', 'currency')),
+        *(sa.column(column, sa.Integer) for column in ('district_id', 'room_count')),
+        *(sa.column(column, sa.Float) for column in ('price', 'size')),
+        *(sa.column(column, sa.DateTime) for column in ('first_seen_at', 'created_at', 'delisted_at')),
+    )
+
+def quantile(values: list, q: float):
+    """Linear interpolation between closest ranks (numpy.percentile default) on sorted values."""
+    position = q * (len(values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2)
+
+def refresh_market_stats(connection) -> None:
+    """Frozen copy of src.utils.analytics.refresh_market_stats as of this revision (same as 017).
+
+    Rows are grouped by district (or all), room count (or all) and either
+    live listings (period NULL) or the month first seen, over live/delisted
+    listings and the archive.
+    """
+    def source(table, live):
+        return sa.select(
+            table.c.status, table.c.property_type, table.c.district_id, table.c.room_count,
+            sa.func.coalesce(table.c.first_seen_at, table.c.created_at).label('seen_at'),
+            table.c.price, table.c.size, live.label('live')
+        ).where(
+            table.c.district_id.isnot(None),
+            table.c.status.isnot(None),
+            table.c.property_type.isnot(None),
+            table.c.price > 0,
+            (table.c.currency == MARKET_CURRENCY) | table.c.currency.is_(None)
+        )
+
+    properties = listing_source('properties')
+    archive = listing_source('properties_archive')
+    rows = connection.execute(sa.union_all(
+        source(properties, properties.c.delisted_at.is_(None)),
+        source(archive, sa.literal(False))
+    )).all()
+
+    groups = {}
+    for row in rows:
+        period = row.seen_at.strftime('%Y-%m') if row.seen_at else None
+        ppsqm = row.price / row.size if row.size and row.size > 0 else None
+        for district_id in (row.district_id, None):
+            for room_count in ({row.room_count, None} if row.room_count is not None else {None}):
+                for key_period in ([None] if row.live else []) + ([period] if period else []):
+                    key = (row.status, row.property_type, district_id, room_count, key_period)
+                    groups.setdefault(key, []).append((row.price, ppsqm))
+
+    now = datetime.utcnow()
+    records = []
+    for (status, property_type, district_id, room_count, period), values in groups.items():
+        prices = sorted(price for price, _ in values)
+        ppsqms = sorted(ppsqm for _, ppsqm in values if ppsqm is not None)
+        records.append({
+            'status': status, 'property_type': property_type, 'district_id': district_id,
+            'room_count': room_count, 'period': period,
+            'listing_count': len(prices), 'price_sum': float(sum(prices)),
+            'ppsqm_sum': float(sum(ppsqms)), 'ppsqm_count': len(ppsqms),
+            'price_p25': quantile(prices, 0.25), 'price_median': quantile(prices, 0.5),
+            'price_p75': quantile(prices, 0.75),
+            'ppsqm_median': quantile(ppsqms, 0.5) if ppsqms else None,
+            'refreshed_at': now,
+        })
+
+    connection.execute(market_stats.delete())
+    for start in range(0, len(records), 1000):
+        connection.execute(market_stats.insert(), records[start:start + 1000])
+
+
+def merge_location(connection, duplicate_id: int, keep_id: int, level: int) -> None:
+    """Move listings and children of a duplicate location onto the kept one, then delete it.
+
+    Children whose slug already exists under the kept location are merged
+    recursively so that uq_locations_parent_slug is never violated.
+    """
+    kept_children = dict(connection.execute(
+        sa.text("SELECT slug, id FROM locations WHERE parent_id = :id"), {'id': keep_id}
+    ).all())
+    children = connection.execute(
+        sa.text("SELECT id, slug FROM locations WHERE parent_id = :id"), {'id': duplicate_id}
+    ).all()
+    for child_id, slug in children:
+        if slug in kept_children:
+            merge_location(connection, child_id, kept_children[slug], level + 1)
+        else:
+            connection.execute(
+                sa.text("UPDATE locations SET parent_id = :keep WHERE id = :id"), {'keep': keep_id, 'id': child_id}
+            )
+
+    column = LEVEL_COLUMNS[level]
+    for table in ('properties', 'properties_archive'):
+        connection.execute(
+            sa.text(f"UPDATE {table} SET {column} = :keep WHERE {column} = :duplicate"),
+            {'keep': keep_id, 'duplicate': duplicate_id}
+        )
+    connection.execute(sa.text("DELETE FROM locations WHERE id = :id"), {'id': duplicate_id})
+
+def merge_duplicate_provinces(connection) -> int:
+    """Merge provinces inserted twice by concurrent resolvers into the oldest row."""
+    rows = connection.execute(sa.text(
+        "SELECT slug, id FROM locations WHERE parent_id IS NULL ORDER BY slug, id"
+    )).all()
+    kept = {}
+    merged = 0
+    for slug, location_id in rows:
+        if slug not in kept:
+            kept[slug] = location_id
+            continue
+        merge_location(connection, location_id, kept[slug], PROVINCE)
+        merged += 1
+    return merged
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    if merge_duplicate_provinces(connection):
+        # Birleşen düğümlerin sayaçları ve ilçe bazlı istatistikler baştan hesaplanır
+        for statement in REBUILD_LIVE_COUNTS:
+            connection.execute(sa.text(statement))
+        refresh_market_stats(connection)
+
+    op.create_index(
+        'uq_locations_province_slug', 'locations', ['slug'], unique=True,
+        postgresql_where=sa.text('parent_id IS NULL'),
+        sqlite_where=sa.text('parent_id IS NULL')
+    )
+
+def downgrade() -> None:
+    op.drop_index('uq_locations_province_slug', 'locations')
@@ -0,0 +1,47 @@
+"""NULL-safe unique index on facet counters for concurrent upserts
+
+Revision ID: 022
+Revises: 021
+Create Date: 2025-02-28 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022'
+down_revision = '021'
+branch_labels = None
+depends_on = None
+
+DIMS = "COALESCE(status, ''), COALESCE(property_type, ''), COALESCE(province_id, -1), COALESCE(district_id, -1)"
+
+# Eşzamanlı ingestion'ın oluşturduğu mükerrer 'tümü' (NULL) satırları en eski satırda toplanır
+MERGE_DUPLICATES = [
+    f"""UPDATE property_facet_counts SET count = (
+            SELECT SUM(duplicate.count) FROM property_facet_counts duplicate
+            WHERE COALESCE(duplicate.status, '') = COALESCE(property_facet_counts.status, '')
+              AND COALESCE(duplicate.property_type, '') = COALESCE(property_facet_counts.property_type, '')
+              AND COALESCE(duplicate.province_id, -1) = COALESCE(property_facet_counts.province_id, -1)
+              AND COALESCE(duplicate.district_id, -1) = COALESCE(property_facet_counts.district_id, -1)
+        )
+        WHERE id IN (SELECT MIN(id) FROM property_facet_counts GROUP BY {DIMS})""",
+    f"""DELETE FROM property_facet_counts
+        WHERE id NOT IN (SELECT MIN(id) FROM property_facet_counts GROUP BY {DIMS})""",
+]
+
+def upgrade() -> None:
+    for statement in MERGE_DUPLICATES:
+        op.execute(statement)
+    op.create_index(
+        'uq_property_facet_counts_dims',
+        'property_facet_counts',
+        [
+            sa.text("COALESCE(status, '')"), sa.text("COALESCE(property_type, '')"),
+            sa.text("COALESCE(province_id, -1)"), sa.text("COALESCE(district_id, -1)"),
+        ],
+        unique=True
+    )
+
+def downgrade() -> None:
+    op.drop_index('uq_property_facet_counts_dims', 'property_facet_counts')
@@ -0,0 +1,54 @@
+"""NULL-safe unique index on market statistics for concurrent upserts
+
+Revision ID: 023
+Revises: 022
+Create Date: 2025-03-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023'
+down_revision = '022'
+branch_labels = None
+depends_on = None
+
+DIMS = (
+    "COALESCE(status, ''), COALESCE(property_type, ''), COALESCE(district_id, -1), "
+    "COALESCE(room_count, -1), COALESCE(period, '')"
+)
+SAME_DIMS = """
+    COALESCE(duplicate.status, '') = COALESCE(market_stats.status, '')
+    AND COALESCE(duplicate.property_type, '') = COALESCE(market_stats.property_type, '')
+    AND COALESCE(duplicate.district_id, -1) = COALESCE(market_stats.district_id, -1)
+    AND COALESCE(duplicate.room_count, -1) = COALESCE(market_stats.room_count, -1)
+    AND COALESCE(duplicate.period, '') = COALESCE(market_stats.period, '')
+"""
+SUMMED = ('listing_count', 'price_sum', 'ppsqm_sum', 'ppsqm_count')
+
+# Eşzamanlı ingestion'ın oluşturduğu mükerrer satırların toplamları en eski satırda birleştirilir;
+# yüzdelikler bir sonraki toplu yenilemede yeniden hesaplanır
+MERGE_DUPLICATES = [
+    "UPDATE market_stats SET "
+    + ", ".join(f"{name} = (SELECT SUM(duplicate.{name}) FROM market_stats duplicate WHERE {SAME_DIMS})" for name in SUMMED)
+    + f" WHERE id IN (SELECT MIN(id) FROM market_stats GROUP BY {DIMS})",
+    f"DELETE FROM market_stats WHERE id NOT IN (SELECT MIN(id) FROM market_stats GROUP BY {DIMS})",
+]
+
+def upgrade() -> None:
+    for statement in MERGE_DUPLICATES:
+        op.execute(statement)
+    op.create_index(
+        'uq_market_stats_dims',
+        'market_stats',
+        [
+            sa.text("COALESCE(status, '')"), sa.text("COALESCE(property_type, '')"),
+            sa.text("COALESCE(district_id, -1)"), sa.text("COALESCE(room_count, -1)"),
+            sa.text("COALESCE(period, '')"),
+        ],
+        unique=True
+    )
+
+def downgrade() -> None:
+    op.drop_index('uq_market_stats_dims', 'market_stats')
@@ -0,0 +1,108 @@
+"""Enrich live listings with data that is only on their ad-detail pages.
+
+Usage: python -m src.enrich [--limit N] [--search-url URL] [--retry]
+                            [--delay SECONDS]
+
+Each listing's detail page is opened with the same browser setup the
+scraper uses. The map location is read from the page's __NUXT__ state and
+stored as latitude/longitude plus a geohash. This feeds the spatial index
+used by the bbox/radius filters of /properties. Listings are processed
+newest first and checked once. Listings whose owner hid the map are marked
+as checked and are skipped unless --retry is given.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy.orm import sessionmaker
+
+from .models.database import engine, Property
+from .scrapers.detail_parser import parse_map_location
+from .scrapers.source_scraper import SourceScraper
+from .utils.geo import coordinate_values
+from .utils.lifecycle import live_only
+from .utils.result_cache import ResultCache, listing_tags
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Bu kadar ilanda bir commit edilir ve ilgili sonuç önbelleği silinir
+COMMIT_EVERY = 20
+
+def select_listings(db, args) -> list:
+    """Konumu henüz alınmamış yayındaki ilanlar, en yeni önce"""
+    query = live_only(db.query(Property.id, Property.url, Property.location, Property.property_type))
+    if args.retry:
+        query = query.filter(Property.latitude.is_(None))
+    else:
+        query = query.filter(Property.geocoded_at.is_(None))
+    if args.search_url:
+        query = query.filter(Property.last_search_url == args.search_url)
+    return query.order_by(Property.created_at.desc(), Property.id.desc()).limit(args.limit).all()
+
+def enrich(args) -> Dict[str, int]:
+    db = SessionLocal()
+    result_cache = ResultCache(os.getenv("RESULT_CACHE_PATH", "./result_cache.db"))
+    totals = {'listings': 0, 'located': 0, 'hidden': 0, 'failed': 0}
+    scraper = None
+    try:
+        rows = select_listings(db, args)
+        logger.info(f"Konumu alınacak ilan sayısı: {len(rows)}")
+        if not rows:
+            return totals
+
+        scraper = SourceScraper()
+        touched_tags = set()
+        for index, row in enumerate(rows, start=1):
+            totals['listings'] += 1
+            html = scraper.get_detail_source(row.url)
+            if html is None:
+                # Sayfa alınamadıysa ilan işaretlenmez, sonraki çalıştırmada tekrar denenir
+                totals['failed'] += 1
+            else:
+                location = parse_map_location(html)
+                totals['located' if location else 'hidden'] += 1
+                db.query(Property).filter(Property.id == row.id).update(
+                    {**coordinate_values(location), 'geocoded_at': datetime.now(), 'updated_at': Property.updated_at},
+                    synchronize_session=False
+                )
+                if location:
+                    touched_tags.add(listing_tags(row.location, row.property_type))
+
+            if index % COMMIT_EVERY == 0 or index == len(rows):
+                db.commit()
+                result_cache.invalidate(touched_tags)
+                touched_tags.clear()
+            time.sleep(args.delay)
+        return totals
+    finally:
+        if scraper is not None:
+            scraper.quit_driver()
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrich listings from their ad-detail pages")
+    parser.add_argument('--limit', type=int, default=200, help="Maximum number of listings to visit")
+    parser.add_argument('--search-url', help="Only listings last seen by this search")
+    parser.add_argument('--retry', action='store_true', help="Also revisit listings checked before without a location")
+    parser.add_argument('--delay', type=float, default=2.0, help="Seconds to wait between detail pages")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    totals = enrich(args)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Zenginleştirme tamamlandı ({elapsed:.1f} sn). İlan: {totals['listings']}, "
+        f"Konumlu: {totals['located']}, Konum gizli: {totals['hidden']}, Hatalı: {totals['failed']}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Depends, Request
+from fastapi.responses import Response, StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional, Union
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from datetime import datetime, timedelta
 import uvicorn
+from prometheus_client import CONTENT_TYPE_LATEST
 from pydantic import BaseModel, HttpUrl
-from .models.database import init_db, Property, Feature, PropertyImage, Seller, SearchHistory
+from .models.database import init_db, Property, Seller, SearchHistory, BackgroundJob, ScrapeRun, SavedSearch, NotificationOutbox
 from .scrapers.source_scraper import SourceScraper
+from .scrapers.pipeline import pipeline_stats
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, text
 import os
+import time
+import threading
 from dotenv import load_dotenv
 import logging
 from sqlalchemy import or_, cast, String, func
@@ -17,10 +23,40 @@ from .models.schemas import (
     PropertyStatus, 
     PropertyCategory, 
     ScrapeRequest, 
+    SavedSearchCreate,
+    NotificationAck,
     LocationResponse, 
     CategoryResponse
 )
-from .utils.url_builder import create_hepsiemlak_url
+from .utils.url_builder import create_hepsiemlak_url, classify_listing_url
+from .utils.jobs import RECLASSIFY, start_or_resume_job, run_reclassify_job, is_job_active, job_to_dict
+from .utils.normalizer import format_room_count
+from .utils.search import setup_search_index
+from .utils.geo import setup_geo_index
+from .utils.counts import CountCache, filter_key, exact_count, facet_estimate, planner_estimate
+from .utils.cards import CARD_EXTRA_FIELDS, card_columns, build_cards
+from .utils.serialization import FastJSONResponse
+from .utils.pagination import encode_cursor, apply_keyset
+from .utils.locations import location_slug, location_tree
+from .utils.lifecycle import live_only, archive_delisted
+from .utils.runs import RUN_COMPLETED, RUN_FAILED, start_run, snapshot_run, run_diff
+from .utils.raw_store import raw_codec, load_raw_data
+from .utils.sellers import seller_to_dict
+from .utils.filters import FilterError, property_filters, apply_property_filters, normalize_category
+from .utils.export import EXPORT_MEDIA_TYPES, export_formats, stream_export
+from .utils.ingest import save_listings
+from .utils.page_archive import archive_page
+from .utils.dedup import duplicate_clusters, listing_duplicates
+from .utils.alerts import validate_saved_search, saved_search_to_dict, notification_to_dict
+from .utils.analytics import (
+    refresh_market_stats, resolve_district, market_total, market_by_district, market_by_rooms, market_trend
+)
+from .utils.result_cache import ResultCache, cache_key, ANY
+from .utils.metrics import API_REQUEST_SECONDS, API_PHASE_SECONDS, render_metrics
+from .utils.profiling import (
+    PROFILE_ID_HEADER, REQUEST_SAMPLE_INTERVAL, TRUE_VALUES, StackSampler, profile_requested, request_profile_id, run_profile_id,
+    profile_path, save_profile, list_profiles
+)
 
 load_dotenv()
 
@@ -42,11 +78,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Endpoint başına istek süresi; etiket ham path değil route şablonudur.
+
+    PROFILE_REQUESTS açıksa ve X-Profile: 1 başlığı veya ?profile=1 ile
+    istenirse istek süresince event loop thread'i örneklenir ve profil id'si
+    X-Profile-Id ile döner.
+    """
+    started = time.perf_counter()
+    if PROFILE_REQUESTS and profile_requested(request.headers, request.query_params):
+        # Async endpoint'ler event loop thread'inde çalışır; diğer thread'ler profile girmez
+        sampler = StackSampler(REQUEST_SAMPLE_INTERVAL, [threading.get_ident()]).start()
+        try:
+            response = await call_next(request)
+        finally:
+            # Sampler thread'inin beklenmesi ve dosya yazımı event loop'u bloklamasın
+            await run_in_threadpool(sampler.stop)
+        profile_id = request_profile_id()
+        await run_in_threadpool(save_profile, profile_id, sampler)
+        response.headers[PROFILE_ID_HEADER] = profile_id
+    else:
+        response = await call_next(request)
+    route = request.scope.get('route')
+    endpoint = route.path if route is not None else 'unmatched'
+    API_REQUEST_SECONDS.labels(
+        endpoint=endpoint, method=request.method, status=str(response.status_code)
+    ).observe(time.perf_counter() - started)
+    return response
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hepsiemlak.db")
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# /properties sonuç önbelleği; SQLite dosyası sayesinde tüm worker'lar aynı önbelleği paylaşır
+result_cache = ResultCache(
+    os.getenv("RESULT_CACHE_PATH", "./result_cache.db"),
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000")),
+    ttl_seconds=int(os.getenv("RESULT_CACHE_TTL", "300"))
+)
+# Kesin sayımlar süreç içinde tutulur; tazelik sonuç önbelleğinin paylaşılan nesil sayacıyla kontrol edilir
+count_cache = CountCache(ttl_seconds=result_cache.ttl_seconds, generation=result_cache.generation)
+
+# İstek başına profil (X-Profile / ?profile=1) varsayılan kapalı; her profil diske bir dosya yazar
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() in TRUE_VALUES
+
+# Bu kadar gündür yayında olmayan ilanlar arşiv tablosuna taşınır
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -57,6 +137,9 @@ def get_db():
 
 # Initialize database
 init_db()
+with engine.begin() as connection:
+    setup_search_index(connection)
+    setup_geo_index(connection)
 
 # Pydantic models for request/response
 class PropertyBase(BaseModel):
@@ -89,28 +172,71 @@ class PropertyResponse(BaseModel):
             datetime: lambda v: v.isoformat() if v else None
         }
 
+class PropertyCardResponse(BaseModel):
+    """Lean projection used by the listing grid; extras are opt-in via fields=.
+
+    Documents the /properties schema; rows are built by utils.cards and
+    serialized directly without pydantic validation.
+    """
+    id: int
+    url: str
+    title: Optional[str] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    location: Optional[str] = None
+    status: Optional[str] = None
+    property_type: Optional[str] = None
+    size: Optional[float] = None
+    room_count: Optional[str] = None
+    created_at: Optional[datetime] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    features: List[str] = []
+    images: List[str] = []
+    description: Optional[str] = None
+    seller_info: Optional[dict] = None
+    raw_data: Optional[dict] = None
+
 class PaginatedResponse(BaseModel):
-    items: List[PropertyResponse]
-    total: int
-    page: int
-    total_pages: int
+    items: List[PropertyCardResponse]
+    total: Optional[int] = None
+    page: Optional[int] = None
+    total_pages: Optional[int] = None
     has_next: bool
     has_previous: bool
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
 
-async def scrape_and_save_listings(search_url: str, kategori: PropertyCategory, db: Session):
+def invalidate_listing_caches(touched_tags):
+    """Ingestion commit'lerinden sonra sayım önbelleğini ve etkilenen sonuç önbelleklerini temizler."""
+    count_cache.invalidate()
+    result_cache.invalidate(touched_tags)
+
+async def scrape_and_save_listings(
+    search_url: str,
+    kategori: PropertyCategory,
+    db: Session,
+    durum: Optional[PropertyStatus] = None,
+    profile: bool = False
+):
     """Background task to scrape and save listings."""
     logger.info(f"Scraping başlıyor: {search_url}")
+    # Pipeline thread'leri dahil tüm thread'ler örneklenir; parse worker süreçleri profile girmez
+    sampler = StackSampler().start() if profile else None
     logger.info(f"Seçilen kategori: {kategori.value}")
     
+    # İlan durumu istekten, yoksa arama URL'inden belirlenir
+    status = durum or classify_listing_url(search_url)[0]
+    # Bu taramada görülmeyen ilanlar last_seen_at < crawl_started olarak kalır
+    crawl_started = datetime.now()
+    
     scraper = None
+    run = None
     try:
-        scraper = SourceScraper()
-        # Get all listings from search results with pagination
-        listings = scraper.search_listings_with_pagination(search_url, use_pagination=True)
-        logger.info(f"Bulunan ilan sayısı: {len(listings)}")
+        # Tarama kaydı; görülen ilanların anlık görüntüsü sonunda bu kayda bağlanır
+        run = start_run(db, search_url, crawl_started)
         
         # Seçilen kategoriye göre property type belirle
         property_type = kategori.value
@@ -118,6 +244,31 @@ async def scrape_and_save_listings(search_url: str, kategori: PropertyCategory,
         logger.info(f"Search URL: {search_url}")
         logger.info(f"Property type: {property_type}")
         
+        result = {'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        
+        def persist(batch):
+            # Pipeline'ın persist aşaması (ayrı thread): tarama sürerken sayfalar arşivlenir, ilanlar toplu kaydedilir
+            for page, _ in batch:
+                archive_page(db, page.url, page.html, search_url=search_url, run_id=run.id, fetched_at=page.fetched_at)
+            batch_result = save_listings(
+                db, [listing for _, page_listings in batch for listing in page_listings],
+                property_type, status, search_url, crawl_started, on_commit=invalidate_listing_caches
+            )
+            for key, value in batch_result.items():
+                result[key] += value
+        
+        scraper = SourceScraper()
+        # Get all listings from search results with pagination
+        listings = scraper.search_listings_with_pagination(search_url, use_pagination=True, persist=persist)
+        # Yayından kalkma taraması sadece son sayfaya kadar eksiksiz taramalarda yapılır;
+        # parse edilemeyen sayfadaki ilanlar görülmemiş sayılacağından böyle bir tarama eksik kabul edilir
+        parse_failures = getattr(scraper, 'last_parse_failures', 0)
+        crawl_complete = getattr(scraper, 'last_crawl_complete', False) and not parse_failures
+        if parse_failures:
+            logger.warning(f"{parse_failures} sayfa parse edilemedi; yayından kalkma taraması atlanıyor")
+        logger.info(f"Bulunan ilan sayısı: {len(listings)}")
+        logger.info(f"Pipeline istatistikleri: {scraper.last_pipeline_stats}")
+        
         # Save search history
         search_history = SearchHistory(
             search_url=search_url,
@@ -129,166 +280,66 @@ async def scrape_and_save_listings(search_url: str, kategori: PropertyCategory,
         )
         db.add(search_history)
         
-        # Önce tüm özellikleri topla
-        all_features = set()
-        for listing_data in listings:
-            if 'ozellikler' in listing_data:
-                all_features.update(listing_data['ozellikler'])
-        
-        # Özellikleri kaydet veya var olanları bul
-        feature_dict = {}
-        for feature_name in all_features:
-            feature = db.query(Feature).filter_by(name=feature_name).first()
-            if not feature:
-                feature = Feature(name=feature_name)
-                db.add(feature)
-        
-        # Commit features first
+        # İlanlar tarama sırasında kaydedildi; eksiksiz ve hatasız taramada görülmeyenler yayından kaldırılır
+        save_listings(
+            db, [], property_type, status, search_url, crawl_started,
+            sweep=crawl_complete and not result['failed'], on_commit=invalidate_listing_caches
+        )
+        
+        # Görülen ilanların anlık görüntüsü (önceki taramayla fark için)
         try:
+            run.listing_count = snapshot_run(db, run, crawl_started)
+            run.new_count = result['new']
+            run.updated_count = result['updated']
+            run.unchanged_count = result['unchanged']
+            run.complete = crawl_complete
+            run.status = RUN_COMPLETED
+            run.finished_at = datetime.now()
             db.commit()
         except Exception as e:
-            logger.error(f"Feature commit hatası: {str(e)}")
+            logger.error(f"Tarama kaydı hatası: {str(e)}")
             db.rollback()
-            return
-            
-        # Refresh feature dictionary after commit
-        for feature_name in all_features:
-            feature = db.query(Feature).filter_by(name=feature_name).first()
-            feature_dict[feature_name] = feature
         
-        # Save or update listings
-        total_new = 0
-        total_updated = 0
-        total_unchanged = 0
+        # Yeterli ham veri biriktiyse sıkıştırma sözlüğünü eğit
+        try:
+            if raw_codec.maybe_train(db):
+                db.commit()
+        except Exception as e:
+            logger.error(f"Sözlük eğitimi hatası: {str(e)}")
+            db.rollback()
         
-        for listing_data in listings:
-            try:
-                # URL'e göre mevcut ilanı kontrol et
-                existing_property = db.query(Property).filter_by(url=listing_data['url']).first()
-                
-                # Fiyatı parse et
-                price_str = listing_data.get('fiyat', '0')
-                try:
-                    price_str = price_str.replace('TL', '').replace('.', '').replace(',', '.').strip()
-                    price = float(price_str)
-                except:
-                    logger.error(f"Fiyat dönüştürme hatası: {price_str}")
-                    price = 0.0
-
-                if existing_property:
-                    # İlan varsa, güncelleme gerekiyor mu kontrol et
-                    needs_update = False
-                    
-                    # Fiyat değişmiş mi?
-                    if existing_property.price != price:
-                        needs_update = True
-                        existing_property.price = price
-                    
-                    # Başlık değişmiş mi?
-                    if existing_property.title != listing_data.get('baslik'):
-                        needs_update = True
-                        existing_property.title = listing_data.get('baslik', '')
-                    
-                    # Konum değişmiş mi?
-                    if existing_property.location != listing_data.get('konum'):
-                        needs_update = True
-                        existing_property.location = listing_data.get('konum', '')
-                    
-                    # Property type değişmiş mi?
-                    if existing_property.property_type != property_type:
-                        needs_update = True
-                        existing_property.property_type = property_type
-                    
-                    # Raw data değişmiş mi?
-                    if existing_property.raw_data != listing_data:
-                        needs_update = True
-                        existing_property.raw_data = listing_data
-                    
-                    if needs_update:
-                        # Özellikleri güncelle
-                        existing_property.features.clear()
-                        if 'ozellikler' in listing_data:
-                            for feature_name in listing_data['ozellikler']:
-                                if feature_name in feature_dict:
-                                    existing_property.features.append(feature_dict[feature_name])
-                        
-                        # Resimleri güncelle
-                        existing_property.images.clear()
-                        if listing_data.get('resim'):
-                            image = PropertyImage(
-                                url=listing_data['resim'],
-                                is_primary=True
-                            )
-                            existing_property.images.append(image)
-                        
-                        existing_property.updated_at = datetime.now()
-                        db.add(existing_property)
-                        total_updated += 1
-                        logger.info(f"İlan güncellendi: {listing_data['url']}")
-                    else:
-                        total_unchanged += 1
-                        logger.info(f"İlan değişmemiş: {listing_data['url']}")
-                
-                else:
-                    # Yeni ilan oluştur
-                    new_property = Property(
-                        url=listing_data['url'],
-                        title=listing_data.get('baslik', ''),
-                        price=price,
-                        location=listing_data.get('konum', ''),
-                        property_type=property_type,  # URL'den tespit edilen kategori
-                        raw_data=listing_data,
-                        created_at=datetime.now(),
-                        updated_at=datetime.now()
-                    )
-                    
-                    logger.info(f"Yeni ilan ekleniyor - URL: {listing_data['url']}, Type: {property_type}")
-                    
-                    # Özellikleri ekle
-                    if 'ozellikler' in listing_data:
-                        for feature_name in listing_data['ozellikler']:
-                            if feature_name in feature_dict:
-                                new_property.features.append(feature_dict[feature_name])
-                    
-                    # Resmi ekle
-                    if listing_data.get('resim'):
-                        image = PropertyImage(
-                            url=listing_data['resim'],
-                            is_primary=True
-                        )
-                        new_property.images.append(image)
-                    
-                    db.add(new_property)
-                    total_new += 1
-                    logger.info(f"Yeni ilan eklendi: {listing_data['url']}")
-                
-                # Her 50 işlemde bir commit yap
-                if (total_new + total_updated) % 50 == 0:
-                    db.commit()
-                    logger.info(f"Ara commit yapıldı. Yeni: {total_new}, Güncellenen: {total_updated}, Değişmeyen: {total_unchanged}")
-                
-            except Exception as e:
-                logger.error(f"İlan işlenirken hata: {str(e)}")
-                continue
+        # Uzun süredir yayında olmayan ilanları arşive taşı
+        try:
+            archive_delisted(db, datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS))
+        except Exception as e:
+            logger.error(f"Arşivleme hatası: {str(e)}")
+            db.rollback()
         
-        # Final commit
+        # Piyasa istatistiklerinin yüzdeliklerini yeniden hesapla
         try:
+            refresh_market_stats(db)
             db.commit()
-            logger.info(f"İşlem tamamlandı. Yeni: {total_new}, Güncellenen: {total_updated}, Değişmeyen: {total_unchanged}")
         except Exception as e:
-            logger.error(f"Final commit hatası: {str(e)}")
+            logger.error(f"Piyasa istatistiği yenileme hatası: {str(e)}")
             db.rollback()
         
     except Exception as e:
         logger.error(f"Genel hata: {str(e)}")
         db.rollback()
+        if run is not None:
+            run.status = RUN_FAILED
+            run.finished_at = datetime.now()
+            db.commit()
     finally:
         if scraper and hasattr(scraper, 'driver'):
             try:
-                scraper.driver.quit()
-                logger.info("WebDriver başarıyla kapatıldı")
+                scraper.quit_driver()
             except Exception as e:
                 logger.error(f"WebDriver kapatılırken hata: {str(e)}")
+        if sampler is not None:
+            sampler.stop()
+            if run is not None:
+                save_profile(run_profile_id(run.id), sampler)
         
     logger.info("İşlem tamamlandı")
 
@@ -330,7 +381,9 @@ async def start_scraping(
             scrape_and_save_listings, 
             search_url=search_url,
             kategori=kategori,
-            db=db
+            db=db,
+            durum=request.durum,
+            profile=request.profile
         )
         
         return {
@@ -344,138 +397,121 @@ async def start_scraping(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/properties", response_model=PaginatedResponse)
+@app.get("/properties", response_model=PaginatedResponse, response_class=FastJSONResponse)
 async def get_properties(
     skip: int = Query(0, description="Number of records to skip"),
     limit: int = Query(12, description="Number of records to return"),
-    local_kw: str = Query('', description="Local keyword"),
-    min_price: Optional[float] = Query(None, description="Minimum price"),
-    max_price: Optional[float] = Query(None, description="Maximum price"),
-    category: str = Query('', description="Property category (konut, arsa, isyeri)"),
-    province: str = Query('', description="Province (il)"),
-    district: str = Query('', description="District (ilçe)"),
-    neighborhood: str = Query('', description="Neighborhood (mahalle)"),
-    status: str = Query('', description="Property status (satilik/kiralik)"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from next_cursor; pass an empty value to start keyset pagination"),
+    count: Optional[str] = Query(None, description="Total count mode: exact, estimate or none (default: exact with skip, none with cursor)"),
+    fields: str = Query('', description="Comma-separated extra fields: description, seller_info, raw_data"),
+    filters: Dict[str, Any] = Depends(property_filters),
     db: Session = Depends(get_db)
 ):
     """Get all properties with optional filters."""
     try:
         logger.info(f"Received request with params: skip={skip}, limit={limit}, "
-                   f"local_kw={local_kw}, min_price={min_price}, max_price={max_price}, "
-                   f"category={category}, province={province}, district={district}, "
-                   f"neighborhood={neighborhood}, status={status}")
+                   f"filters={filters}, cursor={cursor}, count={count}")
         
-        # Base query with eager loading of relationships
-        query = db.query(Property).options(
-            joinedload(Property.features),
-            joinedload(Property.images),
-            joinedload(Property.seller)
-        )
+        # cursor verilmişse (boş da olsa) keyset sayfalama kullanılır
+        use_keyset = cursor is not None
+        count_mode = count or ('none' if use_keyset else 'exact')
+        if count_mode not in ('exact', 'estimate', 'none'):
+            raise HTTPException(status_code=400, detail=f"Invalid count mode: {count}")
+        
+        extra_fields = {f.strip() for f in fields.split(',') if f.strip()}
+        if not extra_fields.issubset(CARD_EXTRA_FIELDS):
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(sorted(extra_fields - CARD_EXTRA_FIELDS))}")
+        
+        # Aynı filtre ve sayfa için önbellekteki yanıt doğrudan döndürülür
+        page_key = cache_key(filter_key(filters), skip, limit, cursor, count_mode, sorted(extra_fields))
+        cached = result_cache.get(page_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        # Sorgudan önce alınır; sorgu sürerken bir yazım olursa yanıt önbelleğe yazılmaz
+        cache_generation = result_cache.generation()
         
-        # Apply filters
+        # Önbellek etiketleri: ingestion bu ilçe/kategoriye yazınca girdi silinir
+        district = filters['district']
+        district_tag = location_slug(district.split('-')[0]) if district else ANY
+        category_tag = normalize_category(filters['category'].lower()) if filters['category'] else ANY
+        
+        # Süre metriği: veritabanı işi (filtre, sayım, sayfa, kartlar) ve JSON'a çevirme ayrı ölçülür
+        query_started = time.perf_counter()
+        
+        # Base query: sadece yayındaki ilanlar
+        query = live_only(db.query(Property))
+        
+        # Apply filters; keyset modunda sıralama tarihe göre kalır
         try:
-            if local_kw:
-                query = query.filter(Property.title.ilike(f"%{local_kw}%"))
-            
-            if min_price is not None:
-                query = query.filter(Property.price >= min_price)
-            
-            if max_price is not None:
-                if min_price is not None and max_price < min_price:
-                    raise HTTPException(status_code=400, detail="Maximum price cannot be less than minimum price")
-                query = query.filter(Property.price <= max_price)
-            
-            # Kategori filtresi
-            if category:
-                logger.info(f"Filtering by category: {category}")
-                # Frontend'den gelen kategori değerini normalize et
-                normalized_category = category.replace('-', '')  # 'is-yeri' -> 'isyeri'
-                query = query.filter(Property.property_type == normalized_category)
-                # Debug için tüm property type'ları logla
-                all_types = db.query(Property.property_type).distinct().all()
-                logger.info(f"Available property types: {[t[0] for t in all_types]}")
-                logger.info(f"Normalized category: {normalized_category}")
-            
-            # İl filtresi
-            if province:
-                query = query.filter(Property.location.ilike(f"%{province}%"))
-            
-            # İlçe filtresi
-            if district:
-                logger.info(f"Filtering by district: {district}")
-                # URL'den gelen ilçe adını temizle (örn: "beykoz-satilik" -> "beykoz")
-                clean_district = district.split('-')[0] if '-' in district else district
-                query = query.filter(Property.location.ilike(f"%{clean_district}%"))
-                logger.info(f"Clean district name: {clean_district}")
-            
-            # Durum filtresi (satilik/kiralik)
-            if status:
-                logger.info(f"Filtering by status: {status}")
-                # URL'den durum bilgisini al
-                query = query.filter(Property.url.ilike(f"%-{status}/%"))
-            
-            # Mahalle filtresi
-            if neighborhood:
-                query = query.filter(Property.location.ilike(f"%{neighborhood}%"))
-                
+            query, facet_conditions = apply_property_filters(db, query, filters, ranked=not use_keyset)
+        except FilterError as filter_error:
+            raise HTTPException(status_code=400, detail=str(filter_error))
         except Exception as filter_error:
             logger.error(f"Error applying filters: {str(filter_error)}")
             raise HTTPException(status_code=400, detail=f"Invalid filter parameters: {str(filter_error)}")
             
         try:
-            # Execute query with pagination
-            total = query.count()
-            properties = query.order_by(Property.created_at.desc()).offset(skip).limit(limit).all()
+            # Toplam sayı: kesin değer önbellekten, tahmin facet sayaçlarından veya planlayıcıdan
+            total = None
+            if count_mode == 'estimate':
+                total = facet_estimate(db, filters, facet_conditions)
+                if total is None:
+                    total = planner_estimate(db, query)
+            if count_mode == 'exact' or (count_mode == 'estimate' and total is None):
+                total = exact_count(count_cache, query, filters)
+            
+            # Execute query with pagination: ORM nesnesi yerine sadece kart kolonları
+            query = query.with_entities(*card_columns(extra_fields))
+            query = query.order_by(Property.created_at.desc(), Property.id.desc())
+            if use_keyset:
+                # (created_at, id) indexi üzerinden cursor'dan devam et; derin sayfalar da ilk sayfa kadar ucuz
+                if cursor:
+                    query = apply_keyset(query, cursor)
+            else:
+                query = query.offset(skip)
+            
+            # Sonraki sayfanın varlığını count olmadan anlamak için bir fazla satır çek
+            properties = query.limit(limit + 1).all()
+            has_next = len(properties) > limit
+            properties = properties[:limit]
             logger.info(f"Found {total} properties in total, returning {len(properties)} properties")
+        except ValueError as cursor_error:
+            raise HTTPException(status_code=400, detail=str(cursor_error))
         except Exception as query_error:
             logger.error(f"Error executing query: {str(query_error)}")
             raise HTTPException(status_code=500, detail=f"Database query error: {str(query_error)}")
         
-        # Convert to response model
-        response_items = []
-        for prop in properties:
-            try:
-                raw_data = prop.raw_data or {}
-                seller_info = {}
-                if prop.seller:
-                    seller_info = {
-                        'name': prop.seller.name,
-                        'company': prop.seller.company,
-                        'phone': prop.seller.phone,
-                        'membership_status': prop.seller.membership_status,
-                        'profile_url': prop.seller.profile_url
-                    }
-                
-                property_response = PropertyResponse(
-                    id=prop.id,
-                    url=prop.url,
-                    title=prop.title or raw_data.get('baslik'),
-                    price=prop.price,
-                    location=prop.location or raw_data.get('konum'),
-                    description=prop.description or raw_data.get('description'),
-                    created_at=prop.created_at,
-                    features=[f.name for f in prop.features] if prop.features else [],
-                    images=[img.url for img in prop.images] if prop.images else [],
-                    seller_info=seller_info,
-                    raw_data=raw_data
-                )
-                response_items.append(property_response)
-            except Exception as prop_error:
-                logger.error(f"Error processing property {prop.id}: {str(prop_error)}")
-                continue
+        # Kart satırları doğrudan projeksiyondan kurulur; pydantic doğrulaması atlanır
+        response_items = build_cards(db, properties, extra_fields)
+        serialization_started = time.perf_counter()
+        API_PHASE_SECONDS.labels(endpoint='/properties', phase='query').observe(serialization_started - query_started)
 
         # Calculate pagination info
-        current_page = skip // limit + 1
-        total_pages = (total + limit - 1) // limit
+        if use_keyset:
+            response = FastJSONResponse({
+                'items': response_items,
+                'total': total,
+                'has_next': has_next,
+                'has_previous': bool(cursor),
+                'next_cursor': encode_cursor(properties[-1].created_at, properties[-1].id) if has_next else None
+            })
+        else:
+            current_page = skip // limit + 1
+            total_pages = (total + limit - 1) // limit if total is not None else None
             
-        return PaginatedResponse(
-            items=response_items,
-            total=total,
-            page=current_page,
-            total_pages=total_pages,
-            has_next=current_page < total_pages,
-            has_previous=current_page > 1
-        )
+            response = FastJSONResponse({
+                'items': response_items,
+                'total': total,
+                'page': current_page,
+                'total_pages': total_pages,
+                'has_next': has_next,
+                'has_previous': current_page > 1
+            })
+        API_PHASE_SECONDS.labels(endpoint='/properties', phase='serialization').observe(time.perf_counter() - serialization_started)
+        
+        if cache_generation is not None:
+            result_cache.set(page_key, response.body, district_tag, category_tag, cache_generation)
+        return response
         
     except HTTPException as http_error:
         logger.error(f"HTTP error in get_properties: {str(http_error)}")
@@ -486,6 +522,35 @@ async def get_properties(
     finally:
         db.close()
 
+@app.get("/export")
+async def export_properties(
+    format: str = Query('ndjson', description="Export format: ndjson, csv or parquet (requires pyarrow)"),
+    filters: Dict[str, Any] = Depends(property_filters),
+    db: Session = Depends(get_db)
+):
+    """Stream all properties matching the /properties filters in chunks from a server-side cursor."""
+    try:
+        if format not in export_formats():
+            raise HTTPException(status_code=400, detail=f"Invalid export format: {format}. Available: {', '.join(export_formats())}")
+        
+        def build_query(session: Session):
+            return apply_property_filters(session, live_only(session.query(Property)), filters, ranked=False)[0]
+        
+        # Filtreler akış başlamadan doğrulanır (sorgu çalıştırılmaz)
+        try:
+            build_query(db)
+        except FilterError as filter_error:
+            raise HTTPException(status_code=400, detail=str(filter_error))
+        
+        filename = f"properties-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"
+        return StreamingResponse(
+            stream_export(SessionLocal, build_query, format),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    finally:
+        db.close()
+
 @app.get("/properties/{property_id}", response_model=PropertyResponse)
 async def get_property(property_id: int, db: Session = Depends(get_db)):
     """Get a specific property by ID."""
@@ -502,7 +567,8 @@ async def get_property(property_id: int, db: Session = Depends(get_db)):
 
         # Convert to response model
         try:
-            raw_data = property.raw_data or {}
+            # Ham veri sadece detay sayfasında, ayrı tablodan yüklenir
+            raw_data = load_raw_data(db, [property.id]).get(property.id, {})
             
             # Seller info
             seller_info = {}
@@ -512,12 +578,13 @@ async def get_property(property_id: int, db: Session = Depends(get_db)):
                     'company': property.seller.company,
                     'phone': property.seller.phone,
                     'membership_status': property.seller.membership_status,
-                    'profile_url': property.seller.profile_url
+                    'profile_url': property.seller.profile_url,
+                    'logo_url': property.seller.logo_url
                 }
             
             # Property details
             details = {
-                'room_count': property.room_count or raw_data.get('oda_sayisi'),
+                'room_count': format_room_count(property.room_count, property.living_room_count) or raw_data.get('oda_sayisi'),
                 'size': property.size or raw_data.get('metrekare'),
                 'floor': property.floor or raw_data.get('kat'),
                 'building_age': property.building_age or raw_data.get('bina_yasi'),
@@ -525,7 +592,9 @@ async def get_property(property_id: int, db: Session = Depends(get_db)):
                 'bathroom_count': property.bathroom_count or raw_data.get('banyo_sayisi'),
                 'balcony': property.balcony or raw_data.get('balkon'),
                 'furnished': property.furnished or raw_data.get('esyali'),
-                'property_type': property.property_type or raw_data.get('ilan_tipi')
+                'property_type': property.property_type or raw_data.get('ilan_tipi'),
+                'latitude': property.latitude,
+                'longitude': property.longitude
             }
             
             property_response = PropertyResponse(
@@ -574,91 +643,315 @@ async def get_categories():
 
 @app.get("/locations/{il}", response_model=LocationResponse)
 async def get_locations(il: str, db: Session = Depends(get_db)):
-    """Get all locations for a specific province."""
+    """Get the location tree and listing counts of a specific province."""
     try:
-        # İl bazlı lokasyonları getir
-        locations = db.query(Property.location).distinct().all()
-        
-        iller = set()
-        ilceler = {}
-        mahalleler = {}
-        
-        for loc in locations:
-            if loc[0]:
-                parts = [p.strip() for p in loc[0].split('/')]
-                
-                if len(parts) >= 1:
-                    iller.add(parts[0])
-                    if parts[0] not in ilceler:
-                        ilceler[parts[0]] = set()
-                
-                if len(parts) >= 2:
-                    ilceler[parts[0]].add(parts[1])
-                    if parts[1] not in mahalleler:
-                        mahalleler[parts[1]] = set()
-                
-                if len(parts) >= 3:
-                    mahalleler[parts[1]].add(parts[2])
-        
-        # Set'leri list'e çevir
-        return {
-            "iller": sorted(list(iller)),
-            "ilceler": {k: sorted(list(v)) for k, v in ilceler.items()},
-            "mahalleler": {k: sorted(list(v)) for k, v in mahalleler.items()}
-        }
+        # Sadece istenen ilin alt ağacı, ingestion'ın güncel tuttuğu sayaçlarla
+        return location_tree(db, il)
         
     except Exception as e:
         logger.error(f"Lokasyonlar getirilirken hata: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/update-property-types")
-async def update_property_types(db: Session = Depends(get_db)):
-    """Update property types based on URLs."""
+def invalidate_result_caches():
+    """Toplu kategori değişikliklerinden sonra tüm sonuç önbelleklerini temizler."""
+    count_cache.invalidate()
+    result_cache.clear()
+
+@app.post("/update-property-types", status_code=202)
+async def update_property_types(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Start (or resume) a background job that reclassifies property types based on URLs."""
     try:
-        # Tüm property'leri getir
-        properties = db.query(Property).all()
-        updated_count = 0
-        
-        for prop in properties:
-            old_type = prop.property_type
-            new_type = None
-            
-            # URL'den kategori bilgisini çıkar
-            url_parts = prop.url.lower().split('/')
-            
-            # URL formatı: .../beykoz-satilik/isyeri gibi veya .../isyeri-bina, .../dukkan-magaza gibi
-            if len(url_parts) >= 2:
-                last_part = url_parts[-1].split('?')[0]  # Query parametrelerini kaldır
-                last_part = last_part.split('-')[0]  # Alt kategorileri kaldır (isyeri-bina -> isyeri)
-                
-                if last_part == 'arsa':
-                    new_type = 'arsa'
-                elif last_part in ['isyeri', 'dukkan', 'plaza', 'ofis', 'depo', 'cafe']:
-                    new_type = 'isyeri'
-                elif last_part == 'devremulk':
-                    new_type = 'devremulk'
-                elif last_part == 'turistik-isletme':
-                    new_type = 'turistik-isletme'
-                else:
-                    new_type = 'konut'
-            else:
-                new_type = 'konut'
-            
-            if old_type != new_type:
-                prop.property_type = new_type
-                updated_count += 1
-                logger.info(f"Property type updated: {old_type} -> {new_type} for URL: {prop.url}")
+        job = start_or_resume_job(db, RECLASSIFY)
+        if not is_job_active(job):
+            background_tasks.add_task(
+                run_reclassify_job,
+                SessionLocal,
+                job.id,
+                on_commit=invalidate_result_caches
+            )
+        return {"message": "Reclassification job started", "job": job_to_dict(job)}
         
+    except Exception as e:
+        logger.error(f"Error starting property type update: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        db.close()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Get status and progress of a background job."""
+    try:
+        job = db.get(BackgroundJob, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job_to_dict(job)
+    finally:
+        db.close()
+
+@app.get("/sellers")
+async def get_sellers(
+    skip: int = Query(0, description="Number of records to skip"),
+    limit: int = Query(50, description="Number of records to return"),
+    q: str = Query('', description="Search in agency and consultant names"),
+    db: Session = Depends(get_db)
+):
+    """Get real estate agencies ordered by their live listing counts."""
+    try:
+        query = db.query(Seller)
+        if q:
+            pattern = f"%{q}%"
+            query = query.filter(or_(Seller.company.ilike(pattern), Seller.name.ilike(pattern)))
+        sellers = query.order_by(Seller.listing_count.desc(), Seller.id).offset(skip).limit(limit).all()
+        return {"items": [seller_to_dict(seller) for seller in sellers]}
+    finally:
+        db.close()
+
+@app.get("/duplicates")
+async def get_duplicates(
+    skip: int = Query(0, description="Number of clusters to skip"),
+    limit: int = Query(50, description="Number of clusters to return"),
+    min_size: int = Query(2, description="Minimum number of live listings in a cluster"),
+    db: Session = Depends(get_db)
+):
+    """Get clusters of live listings detected as the same property listed by several agencies."""
+    try:
+        return duplicate_clusters(db, skip, limit, min_size)
+    finally:
+        db.close()
+
+@app.get("/properties/{property_id}/duplicates")
+async def get_property_duplicates(property_id: int, db: Session = Depends(get_db)):
+    """Get the other live listings in the duplicate cluster of a property."""
+    try:
+        if db.get(Property, property_id) is None:
+            raise HTTPException(status_code=404, detail="Property not found")
+        result = listing_duplicates(db, property_id)
+        return result or {"property_id": property_id, "cluster_id": None, "duplicates": []}
+    finally:
+        db.close()
+
+def pending_notification_counts(db: Session, search_ids: List[int]) -> Dict[int, int]:
+    """Number of unsent notifications per saved search."""
+    if not search_ids:
+        return {}
+    return dict(db.query(NotificationOutbox.saved_search_id, func.count(NotificationOutbox.id)).filter(
+        NotificationOutbox.saved_search_id.in_(search_ids),
+        NotificationOutbox.sent_at.is_(None)
+    ).group_by(NotificationOutbox.saved_search_id).all())
+
+@app.post("/saved-searches", status_code=201)
+async def create_saved_search(request: SavedSearchCreate, db: Session = Depends(get_db)):
+    """Save /properties filters; new and changed listings matching them are queued as notifications."""
+    try:
+        try:
+            filters = validate_saved_search(db, request.filters)
+        except FilterError as filter_error:
+            raise HTTPException(status_code=400, detail=str(filter_error))
+        search = SavedSearch(name=request.name, owner=request.owner, filters=filters, updated_at=datetime.utcnow())
+        db.add(search)
         db.commit()
-        return {"message": f"Updated {updated_count} properties"}
-        
+        return saved_search_to_dict(search)
+    finally:
+        db.close()
+
+@app.get("/saved-searches")
+async def get_saved_searches(
+    owner: str = Query('', description="Only saved searches of this owner"),
+    db: Session = Depends(get_db)
+):
+    """Get active saved searches with their pending notification counts."""
+    try:
+        query = db.query(SavedSearch).filter(SavedSearch.active.is_(True))
+        if owner:
+            query = query.filter(SavedSearch.owner == owner)
+        searches = query.order_by(SavedSearch.id).all()
+        pending = pending_notification_counts(db, [search.id for search in searches])
+        return {"items": [saved_search_to_dict(search, pending.get(search.id, 0)) for search in searches]}
+    finally:
+        db.close()
+
+@app.delete("/saved-searches/{search_id}")
+async def delete_saved_search(search_id: int, db: Session = Depends(get_db)):
+    """Deactivate a saved search; it stops matching new listings."""
+    try:
+        search = db.get(SavedSearch, search_id)
+        if search is None or not search.active:
+            raise HTTPException(status_code=404, detail="Saved search not found")
+        search.active = False
+        search.updated_at = datetime.utcnow()
+        db.commit()
+        return {"message": "Saved search deleted", "id": search_id}
+    finally:
+        db.close()
+
+@app.get("/notifications")
+async def get_notifications(
+    saved_search_id: Optional[int] = Query(None, description="Only notifications of this saved search"),
+    pending: bool = Query(True, description="Only notifications that were not acknowledged yet"),
+    limit: int = Query(100, description="Number of notifications to return"),
+    db: Session = Depends(get_db)
+):
+    """Get notifications from the outbox, oldest first, for a delivery worker or the frontend."""
+    try:
+        query = db.query(NotificationOutbox, Property.url, Property.title).outerjoin(
+            Property, Property.id == NotificationOutbox.property_id
+        )
+        if saved_search_id is not None:
+            query = query.filter(NotificationOutbox.saved_search_id == saved_search_id)
+        if pending:
+            query = query.filter(NotificationOutbox.sent_at.is_(None))
+        rows = query.order_by(NotificationOutbox.id).limit(limit).all()
+        return {"items": [notification_to_dict(notification, url, title) for notification, url, title in rows]}
+    finally:
+        db.close()
+
+@app.post("/notifications/ack")
+async def acknowledge_notifications(request: NotificationAck, db: Session = Depends(get_db)):
+    """Mark delivered notifications as sent so they leave the outbox."""
+    try:
+        updated = db.query(NotificationOutbox).filter(
+            NotificationOutbox.id.in_(request.ids),
+            NotificationOutbox.sent_at.is_(None)
+        ).update({NotificationOutbox.sent_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return {"acknowledged": updated}
+    finally:
+        db.close()
+
+@app.get("/runs/{run_id}/diff")
+async def get_run_diff(
+    run_id: int,
+    limit: int = Query(1000, description="Maximum number of listings returned per set"),
+    db: Session = Depends(get_db)
+):
+    """Get new, removed and price-changed listings of a scrape run compared to the previous complete run of the same search.
+
+    Removed listings are only reported (removed_reported) when the run itself crawled every page.
+    """
+    try:
+        run = db.get(ScrapeRun, run_id)
+        if run is None:
+            raise HTTPException(status_code=404, detail="Run not found")
+        return run_diff(db, run, limit)
+    finally:
+        db.close()
+
+def market_district(db: Session, district: str, province: str):
+    """Resolve an optional district name for the analytics endpoints; 404 if unknown."""
+    if not district:
+        return None
+    location = resolve_district(db, district.split('-')[0], province)
+    if location is None:
+        raise HTTPException(status_code=404, detail="District not found")
+    return location
+
+@app.get("/analytics/districts")
+async def get_district_analytics(
+    status: PropertyStatus = Query(PropertyStatus.SATILIK, description="Listing status"),
+    category: PropertyCategory = Query(PropertyCategory.KONUT, description="Property category"),
+    rooms: Optional[int] = Query(None, description="Room count (3+1 -> 3)"),
+    db: Session = Depends(get_db)
+):
+    """Get price and price per m² statistics of live listings per district."""
+    try:
+        return {
+            "status": status,
+            "category": category,
+            "room_count": rooms,
+            "total": market_total(db, status, category, None, rooms),
+            "items": market_by_district(db, status, category, rooms)
+        }
+    finally:
+        db.close()
+
+@app.get("/analytics/rooms")
+async def get_room_analytics(
+    status: PropertyStatus = Query(PropertyStatus.SATILIK, description="Listing status"),
+    category: PropertyCategory = Query(PropertyCategory.KONUT, description="Property category"),
+    district: str = Query('', description="District (ilçe)"),
+    province: str = Query('', description="Province (il) used to disambiguate the district"),
+    db: Session = Depends(get_db)
+):
+    """Get price and price per m² statistics of live listings per room count."""
+    try:
+        location = market_district(db, district, province)
+        district_id = location.id if location else None
+        return {
+            "status": status,
+            "category": category,
+            "district": location.name if location else None,
+            "total": market_total(db, status, category, district_id, None),
+            "items": market_by_rooms(db, status, category, district_id)
+        }
+    finally:
+        db.close()
+
+@app.get("/analytics/trends")
+async def get_trend_analytics(
+    status: PropertyStatus = Query(PropertyStatus.SATILIK, description="Listing status"),
+    category: PropertyCategory = Query(PropertyCategory.KONUT, description="Property category"),
+    district: str = Query('', description="District (ilçe)"),
+    province: str = Query('', description="Province (il) used to disambiguate the district"),
+    rooms: Optional[int] = Query(None, description="Room count (3+1 -> 3)"),
+    db: Session = Depends(get_db)
+):
+    """Get monthly supply and price statistics of listings by the month they were first seen."""
+    try:
+        location = market_district(db, district, province)
+        return {
+            "status": status,
+            "category": category,
+            "district": location.name if location else None,
+            "room_count": rooms,
+            "items": market_trend(db, status, category, location.id if location else None, rooms)
+        }
+    finally:
+        db.close()
+
+@app.post("/analytics/refresh")
+async def refresh_analytics(db: Session = Depends(get_db)):
+    """Recompute market statistics, including percentiles, from all listings."""
+    try:
+        rows = refresh_market_stats(db)
+        db.commit()
+        return {"message": "Market statistics refreshed", "rows": rows}
     except Exception as e:
-        logger.error(f"Error updating property types: {str(e)}")
+        logger.error(f"Piyasa istatistiği yenileme hatası: {str(e)}")
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         db.close()
 
+@app.get("/scrape/pipelines")
+async def get_scrape_pipelines():
+    """Queue depth and utilization of each stage of the running scrape pipelines."""
+    return {"pipelines": pipeline_stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics for scraping, ingestion and API latency."""
+    # Content-Type başlıkta verilir; media_type olarak verilince charset iki kez eklenir
+    return Response(content=render_metrics(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+@app.get("/profiles")
+async def get_profiles():
+    """List stored CPU profiles of requests and scrape runs, newest first."""
+    return {"items": list_profiles()}
+
+@app.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download a profile as folded stacks (input of flamegraph.pl or speedscope)."""
+    path = profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get hit/miss metrics of the shared /properties result cache."""
+    return result_cache.stats()
+
 @app.get("/debug/property-types")
 async def get_property_types(db: Session = Depends(get_db)):
     """Get all unique property types for debugging."""
@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, JSON, Table
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, JSON, Table, Index, UniqueConstraint, Enum, Boolean, LargeBinary, BigInteger
+from sqlalchemy import func, literal_column
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import List
+from .schemas import PropertyStatus, PropertyCategory
 import os
 from dotenv import load_dotenv
 
@@ -13,6 +15,25 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hepsiemlak.db")
 engine = create_engine(DATABASE_URL)
 Base = declarative_base()
 
+def enum_column_type(enum_class):
+    """Enum değerlerini (ör. 'satilik') VARCHAR olarak saklayan kolon tipi"""
+    return Enum(
+        enum_class,
+        native_enum=False,
+        create_constraint=False,
+        length=32,
+        values_callable=lambda members: [m.value for m in members]
+    )
+
+# Sayaç tablolarında boyutun NULL değeri 'tümü' anlamına gelir; NULL'lar UNIQUE indekste
+# birbirinden farklı sayıldığından benzersizlik NULL yerine bu değerlerle sağlanır
+NULL_TEXT = "''"
+NULL_ID = '-1'
+
+def null_safe(column, sentinel: str):
+    """Benzersiz indeks ifadesi; ON CONFLICT hedefi aynı ifadeleri indeksten okur"""
+    return func.coalesce(column, literal_column(sentinel))
+
 # Many-to-many relationship table for property features
 property_features = Table(
     'property_features',
@@ -28,14 +49,16 @@ class Property(Base):
     external_id = Column(String, unique=True, index=True)
     title = Column(String, index=True)
     price = Column(Float, index=True)
-    currency = Column(String)
+    currency = Column(String(3))  # ISO 4217 kodu (TRY, USD, EUR)
     location = Column(String, index=True)
     description = Column(String)
-    property_type = Column(String)
-    size = Column(Float)
-    room_count = Column(String)
-    floor = Column(String)
-    building_age = Column(String)
+    status = Column(enum_column_type(PropertyStatus))  # satilik / kiralik
+    property_type = Column(enum_column_type(PropertyCategory))
+    size = Column(Float, index=True)  # m²
+    room_count = Column(Integer)  # 3+1 -> 3
+    living_room_count = Column(Integer)  # 3+1 -> 1
+    floor = Column(Integer, index=True)  # Zemin/giriş 0, bodrum/kot negatif
+    building_age = Column(Integer, index=True)
     heating_type = Column(String)
     bathroom_count = Column(String)
     balcony = Column(String)
@@ -43,13 +66,119 @@ class Property(Base):
     url = Column(String, unique=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    raw_data = Column(JSON)  # Store the complete raw data
+    raw_hash = Column(String(40))  # Ham verinin özeti; veri property_raw_data tablosunda sıkıştırılmış tutulur
+    search_text = Column(String)  # Türkçe karakterleri sadeleştirilmiş başlık + açıklama (tam metin arama)
+    first_seen_at = Column(DateTime)  # İlanın ilk görüldüğü tarama
+    last_seen_at = Column(DateTime, index=True)  # İlanın son görüldüğü tarama (içerik değişmese de güncellenir)
+    last_search_url = Column(String, index=True)  # İlanı en son gören arama; yayından kalkma taraması bu kapsamda yapılır
+    delisted_at = Column(DateTime, index=True)  # Yayından kalktıysa tarih; NULL = yayında
+    latitude = Column(Float)  # İlan detayındaki harita konumu
+    longitude = Column(Float)
+    geohash = Column(String(12))  # Konum indexi: SQLite'ta R*Tree, PostgreSQL'de geohash önek indexi
+    geocoded_at = Column(DateTime)  # Detay sayfasından konumun en son alındığı zaman (konum gizliyse de dolar)
 
     # Relationships
     features = relationship('Feature', secondary=property_features, back_populates='properties')
     images = relationship('PropertyImage', back_populates='property')
     seller = relationship('Seller', back_populates='properties')
-    seller_id = Column(Integer, ForeignKey('sellers.id'))
+    raw_record = relationship('PropertyRawData', uselist=False, cascade='all, delete-orphan')
+    seller_id = Column(Integer, ForeignKey('sellers.id'), index=True)
+    province_id = Column(Integer, ForeignKey('locations.id'), index=True)
+    district_id = Column(Integer, ForeignKey('locations.id'), index=True)
+    neighborhood_id = Column(Integer, ForeignKey('locations.id'), index=True)
+
+    __table_args__ = (
+        Index('ix_properties_rooms', 'room_count', 'living_room_count'),
+        # İlan listesi sayfasının en sık sorgusu: durum + kategori, en yeni önce
+        Index('ix_properties_status_type_created', 'status', 'property_type', 'created_at'),
+        # Keyset sayfalama: ORDER BY created_at DESC, id DESC
+        Index('ix_properties_created_at_id', 'created_at', 'id'),
+        # Sadece yayındaki ilanlar: liste sorguları bu kısmi indeksi kullanır
+        Index(
+            'ix_properties_live_created_at_id', 'created_at', 'id',
+            postgresql_where=delisted_at.is_(None),
+            sqlite_where=delisted_at.is_(None)
+        ),
+    )
+
+class Location(Base):
+    __tablename__ = 'locations'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)  # Görünen isim (örn. 'Akat Mah.')
+    slug = Column(String)  # Karşılaştırma anahtarı (örn. 'akat-mah')
+    level = Column(Integer)  # 1: il, 2: ilçe, 3: mahalle
+    parent_id = Column(Integer, ForeignKey('locations.id'), index=True)
+    listing_count = Column(Integer, default=0)  # Ingestion sırasında artımlı güncellenir
+
+    __table_args__ = (
+        Index('ix_locations_level_slug', 'level', 'slug'),
+        UniqueConstraint('parent_id', 'slug', name='uq_locations_parent_slug'),
+        # İllerde parent_id NULL'dır ve NULL'lar yukarıdaki kısıtta birbirinden farklı sayılır
+        Index(
+            'uq_locations_province_slug', 'slug', unique=True,
+            postgresql_where=parent_id.is_(None),
+            sqlite_where=parent_id.is_(None)
+        ),
+    )
+
+class PropertyFacetCount(Base):
+    """Durum/kategori/il/ilçe bazında ingestion sırasında güncellenen ilan sayaçları"""
+    __tablename__ = 'property_facet_counts'
+
+    id = Column(Integer, primary_key=True)
+    status = Column(enum_column_type(PropertyStatus))
+    property_type = Column(enum_column_type(PropertyCategory))
+    province_id = Column(Integer)
+    district_id = Column(Integer)
+    count = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index('ix_property_facet_counts_dims', 'status', 'property_type', 'province_id', 'district_id', unique=True),
+        # Eşzamanlı ingestion'ın upsert hedefi; 'tümü' (NULL) satırları da tekil kalır
+        Index(
+            'uq_property_facet_counts_dims',
+            null_safe(status, NULL_TEXT), null_safe(property_type, NULL_TEXT),
+            null_safe(province_id, NULL_ID), null_safe(district_id, NULL_ID),
+            unique=True
+        ),
+    )
+
+class MarketStat(Base):
+    """Durum/kategori/ilçe/oda/dönem bazında piyasa istatistikleri.
+
+    district_id veya room_count NULL ise o boyutta 'tümü' satırıdır. period
+    NULL ise yayındaki ilanlar, 'YYYY-MM' ise o ay ilk görülen ilanlardır.
+    Sayı ve toplamlar ingestion sırasında artımlı, yüzdelikler toplu
+    yenilemede güncellenir.
+    """
+    __tablename__ = 'market_stats'
+
+    id = Column(Integer, primary_key=True)
+    status = Column(enum_column_type(PropertyStatus))
+    property_type = Column(enum_column_type(PropertyCategory))
+    district_id = Column(Integer)
+    room_count = Column(Integer)
+    period = Column(String(7))
+    listing_count = Column(Integer, default=0)
+    price_sum = Column(Float, default=0)
+    ppsqm_sum = Column(Float, default=0)  # m² fiyatı toplamı
+    ppsqm_count = Column(Integer, default=0)  # m² bilgisi olan ilan sayısı
+    price_p25 = Column(Float)
+    price_median = Column(Float)
+    price_p75 = Column(Float)
+    ppsqm_median = Column(Float)
+    refreshed_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_market_stats_dims', 'status', 'property_type', 'district_id', 'room_count', 'period'),
+        Index(
+            'uq_market_stats_dims',
+            null_safe(status, NULL_TEXT), null_safe(property_type, NULL_TEXT), null_safe(district_id, NULL_ID),
+            null_safe(room_count, NULL_ID), null_safe(period, NULL_TEXT),
+            unique=True
+        ),
+    )
 
 class Feature(Base):
     __tablename__ = 'features'
@@ -77,8 +206,10 @@ class Seller(Base):
     phone = Column(String)
     email = Column(String)
     membership_status = Column(String)  # Gold, Silver veya Standart üye
-    profile_url = Column(String)
+    profile_url = Column(String, unique=True, index=True)  # Emlak ofisi sayfası; tekilleştirme anahtarı
+    logo_url = Column(String)
     total_listings = Column(String)
+    listing_count = Column(Integer, default=0)  # Yayındaki ilan sayısı; ingestion sırasında artımlı güncellenir
     properties = relationship('Property', back_populates='seller')
 
 class SearchHistory(Base):
@@ -90,5 +221,156 @@ class SearchHistory(Base):
     results_count = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class PropertyRawData(Base):
+    """Ham ilan verisi; properties satırlarını dar tutmak için ayrı tabloda sıkıştırılmış saklanır"""
+    __tablename__ = 'property_raw_data'
+
+    property_id = Column(Integer, ForeignKey('properties.id'), primary_key=True)
+    data = Column(LargeBinary)  # İlk byte kodlama (json/zlib/zstd/zstd+sözlük), devamı içerik
+
+class RawDataDictionary(Base):
+    """Ham veri sıkıştırması için eğitilmiş zstd sözlükleri"""
+    __tablename__ = 'raw_data_dictionaries'
+
+    id = Column(Integer, primary_key=True)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PropertyArchive(Base):
+    """Uzun süredir yayında olmayan ilanların arşivi; sıcak tabloyu küçük tutar"""
+    __tablename__ = 'properties_archive'
+
+    id = Column(Integer, primary_key=True)  # Orijinal properties.id
+    url = Column(String, index=True)
+    title = Column(String)
+    price = Column(Float)
+    currency = Column(String(3))
+    location = Column(String)
+    status = Column(enum_column_type(PropertyStatus))
+    property_type = Column(enum_column_type(PropertyCategory))
+    size = Column(Float)
+    room_count = Column(Integer)
+    living_room_count = Column(Integer)
+    province_id = Column(Integer)
+    district_id = Column(Integer)
+    neighborhood_id = Column(Integer)
+    seller_id = Column(Integer)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    raw_data = Column(LargeBinary)  # property_raw_data'dan taşınan sıkıştırılmış ham veri
+    created_at = Column(DateTime)
+    first_seen_at = Column(DateTime)
+    last_seen_at = Column(DateTime)
+    delisted_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ScrapeRun(Base):
+    """Bir arama URL'inin tek bir taraması; görülen ilanlar scrape_run_listings'te tutulur"""
+    __tablename__ = 'scrape_runs'
+
+    id = Column(Integer, primary_key=True)
+    search_url = Column(String)
+    status = Column(String(16))  # running, completed, failed
+    complete = Column(Boolean, default=False)  # Tarama son sayfaya kadar eksiksiz tamamlandı mı
+    listing_count = Column(Integer, default=0)
+    new_count = Column(Integer, default=0)
+    updated_count = Column(Integer, default=0)
+    unchanged_count = Column(Integer, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # Aynı aramanın bir önceki taramasını bulmak için
+        Index('ix_scrape_runs_search_url_id', 'search_url', 'id'),
+    )
+
+class ArchivedPage(Base):
+    """Taramada çekilen arama sayfası; içerik sha256 adıyla sıkıştırılmış dosyada tutulur"""
+    __tablename__ = 'page_archive'
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), index=True)  # Aynı içerik bir kez saklanır
+    url = Column(String)
+    search_url = Column(String, index=True)
+    run_id = Column(Integer, ForeignKey('scrape_runs.id'), index=True)
+    size = Column(Integer)  # Sıkıştırılmamış boyut (byte)
+    fetched_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# Taramada görülen ilanların anlık görüntüsü; taramalar arası fark SQL join ile hesaplanır
+scrape_run_listings = Table(
+    'scrape_run_listings',
+    Base.metadata,
+    Column('run_id', Integer, ForeignKey('scrape_runs.id'), primary_key=True),
+    Column('property_id', Integer, primary_key=True),
+    Column('price', Float),
+    Column('currency', String(3))
+)
+
+class ListingSignature(Base):
+    """İlanın MinHash imzası ve ait olduğu mükerrer ilan kümesi.
+
+    cluster_id kümenin ilk (en küçük id'li) ilanıdır; tekil ilanlarda kendi id'si.
+    """
+    __tablename__ = 'listing_signatures'
+
+    property_id = Column(Integer, ForeignKey('properties.id'), primary_key=True)
+    signature = Column(LargeBinary)  # NUM_PERM adet uint32
+    cluster_id = Column(Integer, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# LSH bant özetleri; aynı bantta aynı özete düşen ilanlar mükerrer adayıdır
+listing_lsh_buckets = Table(
+    'listing_lsh_buckets',
+    Base.metadata,
+    Column('band', Integer, primary_key=True),
+    Column('bucket', BigInteger, primary_key=True),
+    Column('property_id', Integer, ForeignKey('properties.id'), primary_key=True, index=True)
+)
+
+class SavedSearch(Base):
+    """Kayıtlı arama; ingestion'da yeni/değişen ilanlar bu filtrelerle eşleştirilir"""
+    __tablename__ = 'saved_searches'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    owner = Column(String, index=True)
+    filters = Column(JSON)  # /properties filtre parametreleri
+    active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Eşleştirme indexi bu değişince yeniden kurulur
+
+class NotificationOutbox(Base):
+    """Gönderilmeyi bekleyen kayıtlı arama bildirimleri; sent_at NULL ise bekliyor"""
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True)
+    saved_search_id = Column(Integer, ForeignKey('saved_searches.id'), index=True)
+    property_id = Column(Integer)  # İlan sonradan arşive taşınabilir
+    event = Column(String(20))  # new, price_drop, matched
+    price = Column(Float)
+    previous_price = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_notification_outbox_pending', 'sent_at', 'id'),
+    )
+
+class BackgroundJob(Base):
+    """Uzun süren arka plan işlerinin ilerleme ve devam noktası kaydı"""
+    __tablename__ = 'background_jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), index=True)  # Örn. 'reclassify'
+    status = Column(String(16), index=True)  # pending, running, completed, failed
+    last_id = Column(Integer, default=0)  # İşlenen son properties.id; iş buradan devam eder
+    total = Column(Integer)
+    processed = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
 def init_db():
     Base.metadata.create_all(engine) 
\ No newline at end of file
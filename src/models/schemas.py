@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from pydantic import BaseModel
 
 class PropertyStatus(str, Enum):
@@ -18,11 +18,21 @@ class ScrapeRequest(BaseModel):
     durum: PropertyStatus
     kategori: Optional[PropertyCategory] = PropertyCategory.KONUT
     mahalleler: Optional[List[str]] = None
+    profile: bool = False  # Tarama için CPU profili çıkar (/profiles/run-<id>)
+
+class SavedSearchCreate(BaseModel):
+    name: str
+    owner: Optional[str] = None  # Bildirimin gideceği kullanıcı/kanal
+    filters: Dict[str, Any] = {}  # /properties filtre parametreleri
+
+class NotificationAck(BaseModel):
+    ids: List[int]  # Gönderilen bildirimler
 
 class LocationResponse(BaseModel):
     iller: List[str]
     ilceler: dict[str, List[str]]  # il -> ilçeler
     mahalleler: dict[str, List[str]]  # ilçe -> mahalleler
+    ilan_sayilari: dict[str, int] = {}  # 'il / ilçe / mahalle' yolu -> ilan sayısı
 
 class CategoryResponse(BaseModel):
     categories: List[PropertyCategory]
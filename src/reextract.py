@@ -0,0 +1,151 @@
+"""Re-extract listings from archived search pages, without network access.
+
+Usage: python -m src.reextract [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+                               [--search-url URL] [--run-id N]
+                               [--workers N] [--batch-size N]
+
+Archived pages are parsed in a process pool with the same driver-free card
+parser the live scraper uses, then fed through utils.ingest.save_listings in
+replay mode. Pages are processed newest first and each listing URL is only
+ingested once, so the newest archived copy of a listing wins. Fields that
+are only available by clicking in the browser (phone numbers etc.) are
+carried over from the stored raw data.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy.orm import sessionmaker
+
+from .models.database import engine, ArchivedPage, Property
+from .models.schemas import PropertyCategory
+from .scrapers.listing_parser import listing_path, merge_contacts, parse_listing_cards
+from .utils.ingest import save_listings
+from .utils.page_archive import load_page
+from .utils.raw_store import load_raw_data
+from .utils.result_cache import ResultCache
+from .utils.url_builder import classify_listing_url
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def parse_archived_page(sha256: str) -> List[Dict]:
+    """Worker süreçte çalışır: arşivdeki sayfayı açıp ilan kartlarını parse eder"""
+    try:
+        return parse_listing_cards(load_page(sha256))
+    except OSError as e:
+        logger.error(f"Arşiv sayfası okunamadı ({sha256}): {str(e)}")
+        return []
+
+def restore_interactive_fields(db, listings: List[Dict]) -> None:
+    """Sayfada bulunmayan telefon/danışman alanlarını kayıtlı ham veriden tamamlar"""
+    urls = [listing['url'] for listing in listings]
+    ids = dict(db.query(Property.url, Property.id).filter(Property.url.in_(urls)).all())
+    raw_data = load_raw_data(db, ids.values())
+    merge_contacts(listings, {listing_path(url): raw_data.get(id_, {}) for url, id_ in ids.items()})
+
+def select_pages(db, args) -> List[ArchivedPage]:
+    """Filtrelere uyan arşiv sayfaları, en yeni önce; aynı içerik bir kez işlenir"""
+    query = db.query(ArchivedPage)
+    if args.since:
+        query = query.filter(ArchivedPage.fetched_at >= args.since)
+    if args.until:
+        query = query.filter(ArchivedPage.fetched_at < args.until)
+    if args.search_url:
+        query = query.filter(ArchivedPage.search_url == args.search_url)
+    if args.run_id:
+        query = query.filter(ArchivedPage.run_id == args.run_id)
+
+    pages = []
+    seen_hashes = set()
+    for page in query.order_by(ArchivedPage.fetched_at.desc(), ArchivedPage.id.desc()):
+        if page.sha256 not in seen_hashes:
+            seen_hashes.add(page.sha256)
+            pages.append(page)
+    return pages
+
+def reextract(args) -> Dict[str, int]:
+    db = SessionLocal()
+    result_cache = ResultCache(os.getenv("RESULT_CACHE_PATH", "./result_cache.db"))
+    totals = {'pages': 0, 'listings': 0, 'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    try:
+        pages = select_pages(db, args)
+        logger.info(f"Yeniden çıkarılacak sayfa sayısı: {len(pages)}")
+
+        seen_urls = set()
+        batch: List[Dict] = []
+        batch_key = None
+        batch_seen_at = None
+
+        def flush():
+            if not batch:
+                return
+            search_url, _ = batch_key
+            status, category = classify_listing_url(search_url or '')
+            restore_interactive_fields(db, batch)
+            # Arama URL'inin kategorisi tanınmıyorsa ilan URL'leri belirler (save_listings)
+            result = save_listings(
+                db, batch, (category or PropertyCategory.KONUT).value, status, search_url, batch_seen_at,
+                replay=True, on_commit=result_cache.invalidate
+            )
+            for key, value in result.items():
+                totals[key] += value
+            totals['listings'] += len(batch)
+            batch.clear()
+
+        # Sonuçlar sırayla gelir; pencere boyutu bekleyen parse sonuçlarının belleğini sınırlar
+        window = args.workers * 8
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for offset in range(0, len(pages), window):
+                window_pages = pages[offset:offset + window]
+                parsed = executor.map(parse_archived_page, [page.sha256 for page in window_pages], chunksize=4)
+                for page, listings in zip(window_pages, parsed):
+                    totals['pages'] += 1
+                    key = (page.search_url, page.run_id)
+                    if key != batch_key or len(batch) >= args.batch_size:
+                        flush()
+                        batch_key = key
+                        batch_seen_at = page.fetched_at
+                    for listing in listings:
+                        # Daha yeni bir sayfada görülen ilan tekrar işlenmez
+                        if listing['url'] not in seen_urls:
+                            seen_urls.add(listing['url'])
+                            batch.append(listing)
+            flush()
+        return totals
+    finally:
+        db.close()
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, '%Y-%m-%d')
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract listings from the page archive")
+    parser.add_argument('--since', type=parse_date, help="Only pages fetched on or after this date")
+    parser.add_argument('--until', type=parse_date, help="Only pages fetched before this date")
+    parser.add_argument('--search-url', help="Only pages of this search")
+    parser.add_argument('--run-id', type=int, help="Only pages of this scrape run")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Parser processes")
+    parser.add_argument('--batch-size', type=int, default=500, help="Listings per ingestion batch")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    totals = reextract(args)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Yeniden çıkarım tamamlandı ({elapsed:.1f} sn). Sayfa: {totals['pages']}, İlan: {totals['listings']}, "
+        f"Yeni: {totals['new']}, Güncellenen: {totals['updated']}, Değişmeyen: {totals['unchanged']}, "
+        f"Hatalı: {totals['failed']}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ import logging
 import time
 from urllib.parse import urljoin
 import random
+from ..utils.metrics import PAGE_FETCH_SECONDS, scraper_label
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,9 +45,12 @@ class BaseScraper:
         
         try:
             await asyncio.sleep(self.rate_limit)
+            started = time.perf_counter()
             async with self.session.get(url, ssl=False) as response:
                 if response.status == 200:
-                    return await response.text()
+                    html = await response.text()
+                    PAGE_FETCH_SECONDS.labels(scraper=scraper_label(self)).observe(time.perf_counter() - started)
+                    return html
                 else:
                     logger.error(f"Error fetching {url}: Status code {response.status}")
                     return None
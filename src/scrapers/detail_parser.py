@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+NUXT_MARKER = 'window.__NUXT__='
+
+# İlan detayındaki harita konumu: M.mapLocation={lat:be,lon:bf} veya mapLocation:{lat:41.0,lon:29.0}
+MAP_LOCATION_PATTERN = re.compile(r'mapLocation[=:]\{lat:([^,}]+),lon:([^,}]+)\}')
+MAP_HIDDEN_PATTERN = re.compile(r'isMapHidden[=:]([^,;}]+)')
+NUMBER_PATTERN = re.compile(r'-?\d+(\.\d+)?([eE][-+]?\d+)?')
+
+def _skip_string(text: str, start: int) -> int:
+    """start'taki tırnakla başlayan string'in bittiği indeksten sonrasını döndürür"""
+    quote = text[start]
+    index = start + 1
+    while index < len(text):
+        char = text[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == quote:
+            return index + 1
+        index += 1
+    return index
+
+def _split_top_level(text: str, start: int, closing: str) -> Tuple[List[str], int]:
+    """start'tan itibaren en üst seviyedeki virgüllerle ayrılmış ifadeleri closing karakterine kadar toplar"""
+    items = []
+    depth = 0
+    item_start = start
+    index = start
+    while index < len(text):
+        char = text[index]
+        if char in '"\'':
+            index = _skip_string(text, index)
+            continue
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            if depth == 0:
+                if char == closing:
+                    items.append(text[item_start:index].strip())
+                    return [item for item in items if item], index
+                break
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(text[item_start:index].strip())
+            item_start = index + 1
+        index += 1
+    raise ValueError("NUXT durumu beklenmeyen biçimde sona erdi")
+
+def _literal(expression: str) -> Any:
+    """Basit JS değişmezini Python değerine çevirir; çözülemeyen ifadeler olduğu gibi döner"""
+    if expression in ('null', 'void 0', 'undefined'):
+        return None
+    if expression in ('true', 'false'):
+        return expression == 'true'
+    if NUMBER_PATTERN.fullmatch(expression):
+        return float(expression) if any(c in expression for c in '.eE') else int(expression)
+    if expression.startswith('"'):
+        try:
+            return json.loads(expression)
+        except ValueError:
+            return expression[1:-1]
+    return expression
+
+def parse_nuxt_state(html: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """window.__NUXT__=(function(a,b,...){...}(x,y,...)) yapısından gövdeyi ve parametre değerlerini çıkarır.
+
+    Nuxt, tekrar eden değerleri fonksiyon argümanı olarak geçirir; dönen
+    sözlük parametre adından (a, b, ..., be) argüman değerine eşlemedir.
+    """
+    start = html.find(NUXT_MARKER)
+    if start < 0:
+        return None
+    function_start = html.find('function(', start)
+    if function_start < 0:
+        return None
+    params, params_end = _split_top_level(html, function_start + len('function('), ')')
+    body_start = html.find('{', params_end)
+    # Fonksiyon gövdesinin kapanan parantezi, ardından argüman listesi
+    _, body_end = _split_top_level(html, body_start + 1, '}')
+    args_start = html.find('(', body_end)
+    args, _ = _split_top_level(html, args_start + 1, ')')
+    values = {name: _literal(arg) for name, arg in zip(params, args)}
+    return html[body_start + 1:body_end], values
+
+def _resolve(expression: str, values: Dict[str, Any]) -> Any:
+    expression = expression.strip()
+    return values[expression] if expression in values else _literal(expression)
+
+def parse_map_location(html: str) -> Optional[Tuple[float, float]]:
+    """İlan detay sayfasındaki harita konumunu (enlem, boylam) döndürür.
+
+    İlan sahibi haritayı gizlemişse veya konum yoksa None döner.
+    """
+    try:
+        state = parse_nuxt_state(html)
+    except ValueError as e:
+        logger.error(f"NUXT durumu parse edilemedi: {str(e)}")
+        return None
+    if state is None:
+        return None
+    body, values = state
+
+    hidden = MAP_HIDDEN_PATTERN.search(body)
+    if hidden and _resolve(hidden.group(1), values) is True:
+        return None
+
+    match = MAP_LOCATION_PATTERN.search(body)
+    if not match:
+        return None
+    try:
+        lat = float(_resolve(match.group(1), values))
+        lon = float(_resolve(match.group(2), values))
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return None
+    return lat, lon
@@ -4,6 +4,7 @@ from bs4 import BeautifulSoup
 import json
 import re
 from datetime import datetime
+from ..utils.metrics import PARSE_SECONDS, CARDS_PER_PAGE, scraper_label
 
 class HepsiEmlakScraper(BaseScraper):
     def __init__(self):
@@ -121,7 +122,9 @@ class HepsiEmlakScraper(BaseScraper):
         pages = await self.process_pagination(search_url, max_pages)
         
         for page_soup in pages:
-            page_listings = self._extract_listings_from_page(page_soup)
+            with PARSE_SECONDS.labels(scraper=scraper_label(self)).time():
+                page_listings = self._extract_listings_from_page(page_soup)
+            CARDS_PER_PAGE.labels(scraper=scraper_label(self)).observe(len(page_listings))
             listings.extend(page_listings)
             
         return listings
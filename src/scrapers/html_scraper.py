@@ -1,13 +1,16 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import json
 import time
 import random
 from datetime import datetime
+from ..utils.metrics import PAGE_FETCH_SECONDS, PARSE_SECONDS, CARDS_PER_PAGE, scraper_label
 
 class HTMLScraper:
-    def __init__(self):
+    def __init__(self, page_sink: Optional[Callable[[str, str], None]] = None):
+        # Çekilen her sayfanın (url, html) ile verildiği fonksiyon, örn. sayfa arşivi
+        self.page_sink = page_sink
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -49,12 +52,13 @@ class HTMLScraper:
             self.session.cookies.update(cookies)
             
             # Asıl isteği yap
-            response = self.session.get(
-                url,
-                timeout=30,
-                allow_redirects=True,
-                verify=True
-            )
+            with PAGE_FETCH_SECONDS.labels(scraper=scraper_label(self)).time():
+                response = self.session.get(
+                    url,
+                    timeout=30,
+                    allow_redirects=True,
+                    verify=True
+                )
             
             response.raise_for_status()
             
@@ -69,6 +73,10 @@ class HTMLScraper:
                 print(f"İçerik: {response.text[:500]}")
                 return None
             
+            # Sayfa arşivi (yeniden çıkarım için)
+            if self.page_sink is not None:
+                self.page_sink(url, response.text)
+            
             return response.text
         except requests.exceptions.RequestException as e:
             print(f"Sayfa kaynağı alınırken hata: {str(e)}")
@@ -83,11 +91,6 @@ class HTMLScraper:
         listings = []
         soup = BeautifulSoup(html, 'html.parser')
         
-        # Debug için HTML'i kaydet
-        with open('debug_page.html', 'w', encoding='utf-8') as f:
-            f.write(html)
-        print("Debug için sayfa kaynağı 'debug_page.html' dosyasına kaydedildi")
-        
         # İlan listesi container'ını bul
         listing_container = soup.find('ul', class_='list-items-container')
         if not listing_container:
@@ -214,7 +217,9 @@ class HTMLScraper:
                 break
 
             # İlanları parse et
-            page_listings = self.parse_listings(html)
+            with PARSE_SECONDS.labels(scraper=scraper_label(self)).time():
+                page_listings = self.parse_listings(html)
+            CARDS_PER_PAGE.labels(scraper=scraper_label(self)).observe(len(page_listings))
             if not page_listings:
                 print("Sayfada ilan bulunamadı")
                 break
@@ -0,0 +1,139 @@
+from bs4 import BeautifulSoup
+from typing import Any, List, Dict
+from urllib.parse import urlparse
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sadece tarayıcıda telefon butonuna tıklanınca yüklenen alanlar; arşivlenmiş sayfada bulunmaz
+INTERACTIVE_FIELDS = {
+    'telefon_numaralari': [],
+    'danısman_adi': "",
+    'ilan_no': "",
+}
+
+def find_listing_items(soup: BeautifulSoup) -> list:
+    """Arama sonuç sayfasındaki ilan kartlarını (li.listing-item) bulur"""
+    container = soup.select_one('ul.list-items-container')
+    if not container:
+        logger.error("İlan listesi container'ı bulunamadı")
+        return []
+    return container.select('li.listing-item')
+
+def parse_listing_card(item) -> Dict:
+    """Tek bir ilan kartını parse eder; WebDriver gerektirmez"""
+    listing = {}
+
+    # Başlık
+    title = item.select_one('h3')
+    if title:
+        listing['baslik'] = title.text.strip()
+
+    # Fiyat
+    price_elem = item.select_one('span.list-view-price')
+    if price_elem:
+        price = price_elem.text.strip()
+        currency = price_elem.select_one('span.currency')
+        currency_text = currency.text.strip() if currency else 'TL'
+        listing['fiyat'] = f"{price} {currency_text}"
+
+    # İlan tarihi
+    date_elem = item.select_one('span.list-view-date')
+    if date_elem:
+        listing['ilan_tarihi'] = date_elem.text.strip()
+
+    # Konum
+    location = item.select_one('span.list-view-location')
+    if location:
+        listing['konum'] = location.text.strip()
+
+    # İlan linki
+    link = item.select_one('a[href*="/istanbul-"]')
+    if link and link.get('href'):
+        listing['url'] = f"https://www.hepsiemlak.com{link['href']}"
+
+    # Resim
+    img = item.select_one('img.list-view-image')
+    if img and img.get('src'):
+        listing['resim'] = img['src']
+
+    # Özellikler
+    features = []
+
+    # İlan tipi
+    prop_type = item.select_one('span.left')
+    if prop_type:
+        listing['ilan_tipi'] = prop_type.text.strip()
+        features.append(prop_type.text.strip())
+
+    # Detaylı özellikler
+    specs = item.select_one('span.right.celly')
+    if specs:
+        # Oda sayısı
+        room_count = specs.select_one('span.houseRoomCount')
+        if room_count:
+            listing['oda_sayisi'] = room_count.text.strip()
+            features.append(room_count.text.strip())
+
+        # Metrekare
+        square_meter = specs.select_one('span.squareMeter')
+        if square_meter:
+            listing['metrekare'] = square_meter.text.strip()
+            features.append(square_meter.text.strip())
+
+        # Bina yaşı
+        building_age = specs.select_one('span.buildingAge')
+        if building_age:
+            listing['bina_yasi'] = building_age.text.strip()
+            features.append(building_age.text.strip())
+
+        # Kat
+        floor = specs.select_one('span.floortype')
+        if floor:
+            listing['kat'] = floor.text.strip()
+            features.append(floor.text.strip())
+
+    listing['ozellikler'] = features
+
+    # Emlak ofisi bilgileri
+    office = item.select_one('p.listing-card--owner-info__firm-name')
+    if office:
+        listing['emlak_ofisi'] = office.text.strip()
+
+    # Emlak ofisi logosu
+    office_logo = item.select_one('img.branded-image')
+    if office_logo and office_logo.get('src'):
+        listing['emlak_ofisi_logo'] = office_logo['src']
+
+    # Emlak ofisi linki
+    office_link = item.select_one('a[href*="/emlak-ofisi/"]')
+    if office_link and office_link.get('href'):
+        listing['emlak_ofisi_url'] = f"https://www.hepsiemlak.com{office_link['href']}"
+
+    logger.debug(f"İlan parse edildi: {listing.get('url')}")
+    return listing
+
+def parse_listing_cards(html: str) -> List[Dict]:
+    """Arama sonuç sayfasının HTML'inden ilan kartlarını parse eder (pipeline parse aşaması ve arşivden yeniden çıkarım)"""
+    listings = []
+    for item in find_listing_items(BeautifulSoup(html, 'html.parser')):
+        try:
+            listing = parse_listing_card(item)
+            if listing.get('url'):
+                listings.append(listing)
+        except Exception as e:
+            logger.error(f"İlan parse edilirken hata: {str(e)}")
+    return listings
+
+def listing_path(url: str) -> str:
+    """İlan URL'inin yolu; tarayıcının verdiği mutlak ve sayfadaki göreli linkler için ortak anahtar"""
+    return urlparse(url).path
+
+def merge_contacts(listings: List[Dict], contacts: Dict[str, Dict[str, Any]]) -> List[Dict]:
+    """Tıklanarak toplanan (veya kayıtlı) telefon/danışman bilgilerini ilan yoluna göre ekler"""
+    for listing in listings:
+        fields = contacts.get(listing_path(listing['url'])) or {}
+        for field, default in INTERACTIVE_FIELDS.items():
+            listing[field] = fields.get(field, copy.copy(default))
+    return listings
@@ -0,0 +1,227 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import multiprocessing
+import queue
+import threading
+import time
+import logging
+from .listing_parser import parse_listing_cards, merge_contacts
+from ..utils.metrics import PIPELINE_BUSY_SECONDS, PARSE_SECONDS, CARDS_PER_PAGE
+
+logger = logging.getLogger(__name__)
+
+# Aşamalar arası kuyruk kapasitesi; dolunca önceki aşama bekler (bellek sınırlı kalır)
+QUEUE_SIZE = 4
+PARSE_WORKERS = 2
+# Kalıcı yazma aşamasına bir seferde verilen en az ilan sayısı
+PERSIST_BATCH_SIZE = 100
+
+_DONE = object()
+
+# Çalışmakta olan pipeline'lar; /scrape/pipelines anlık durumlarını gösterir
+_active_pipelines = set()
+_active_lock = threading.Lock()
+
+class FetchedPage:
+    """Tarayıcıdan alınmış bir arama sayfası ve tıklanarak toplanan iletişim bilgileri"""
+
+    def __init__(self, number: int, url: str, html: str, contacts: Dict[str, Dict[str, Any]]):
+        self.number = number
+        self.url = url
+        self.html = html
+        self.contacts = contacts
+        self.fetched_at = datetime.now()
+
+def _timed_parse(html: str) -> Tuple[float, List[Dict]]:
+    """Worker süreçte çalışır; parse süresi aşama kullanım oranı için döndürülür"""
+    started = time.perf_counter()
+    listings = parse_listing_cards(html)
+    return time.perf_counter() - started, listings
+
+class StageStats:
+    def __init__(self, name: str, workers: int = 1, scraper: str = ''):
+        self.name = name
+        self.workers = workers
+        self._busy_metric = PIPELINE_BUSY_SECONDS.labels(scraper=scraper, stage=name)
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+        self._busy_metric.inc(seconds)
+
+    def observe_queue(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def to_dict(self, elapsed: float, queue_depth: Optional[int]) -> Dict[str, Any]:
+        capacity = elapsed * self.workers
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'utilization': round(self.busy_seconds / capacity, 4) if capacity else 0.0,
+            # Bu aşamanın girişindeki kuyruk; fetch aşamasının giriş kuyruğu yoktur
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth if queue_depth is not None else None,
+        }
+
+class CrawlPipeline:
+    """Fetch → parse → persist aşamalarını sınırlı kuyruklarla birbirine bağlar.
+
+    Fetch çağıran thread'de çalışır (WebDriver tek thread'den kullanılır),
+    parse bir süreç havuzunda, persist ayrı bir thread'de toplu olarak
+    yapılır. Kuyruklar dolunca önceki aşama bekler; böylece toplam süre
+    aşamaların toplamı değil en yavaş aşama tarafından belirlenir.
+    persist çağrısı sadece persist thread'inden yapılır.
+    """
+
+    def __init__(
+        self,
+        persist: Optional[Callable[[List[Tuple[FetchedPage, List[Dict]]]], None]] = None,
+        parse_workers: int = PARSE_WORKERS,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = PERSIST_BATCH_SIZE,
+        label: str = '',
+        scraper: str = ''
+    ):
+        self.persist = persist
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.label = label
+        # Metrik etiketi: sayfaları üreten scraper backend'i
+        self.scraper = scraper
+        self.parse_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.persist_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.fetch_stats = StageStats('fetch', scraper=scraper)
+        self.parse_stats = StageStats('parse', parse_workers, scraper)
+        self.persist_stats = StageStats('persist', scraper=scraper)
+        self.listings: List[Dict] = []
+        self.error: Optional[BaseException] = None
+        # Parse edilemeyen sayfalar (worker çökmesi dahil); bu sayfalardaki ilanlar görülmemiş sayılır
+        self.parse_failures = 0
+        self._stop = threading.Event()
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def _put(self, target: queue.Queue, item, stats: StageStats) -> None:
+        target.put(item)
+        stats.observe_queue(target.qsize())
+
+    def _dispatch(self, executor: ProcessPoolExecutor) -> None:
+        """Parse kuyruğundaki sayfaları havuza verir; sonuçlar sırayla persist kuyruğuna geçer"""
+        while True:
+            page = self.parse_queue.get()
+            if page is _DONE:
+                self._put(self.persist_queue, _DONE, self.persist_stats)
+                return
+            if self._stop.is_set():
+                continue
+            self._put(self.persist_queue, (page, executor.submit(_timed_parse, page.html)), self.persist_stats)
+
+    def _persist_batch(self, batch: List[Tuple[FetchedPage, List[Dict]]], listing_count: int) -> None:
+        started = time.perf_counter()
+        try:
+            self.persist(batch)
+        except Exception as e:
+            # Hata sonrası kuyruklar boşaltılmaya devam eder; fetch aşaması durdurulur
+            logger.error(f"Pipeline persist hatası: {str(e)}")
+            self.error = e
+            self._stop.set()
+        self.persist_stats.record(time.perf_counter() - started, listing_count)
+
+    def _run_persist(self) -> None:
+        batch: List[Tuple[FetchedPage, List[Dict]]] = []
+        pending = 0
+        seen_urls = set()
+        while True:
+            item = self.persist_queue.get()
+            if item is not _DONE:
+                page, future = item
+                try:
+                    seconds, listings = future.result()
+                    self.parse_stats.record(seconds)
+                    PARSE_SECONDS.labels(scraper=self.scraper).observe(seconds)
+                    CARDS_PER_PAGE.labels(scraper=self.scraper).observe(len(listings))
+                except Exception as e:
+                    logger.error(f"Sayfa {page.number} parse edilemedi: {str(e)}")
+                    self.parse_failures += 1
+                    listings = []
+                # Sayfalama sırasında kayan ilanlar iki sayfada görünebilir
+                listings = [listing for listing in listings if listing['url'] not in seen_urls]
+                seen_urls.update(listing['url'] for listing in listings)
+                merge_contacts(listings, page.contacts)
+                self.listings.extend(listings)
+                batch.append((page, listings))
+                pending += len(listings)
+            if batch and (item is _DONE or pending >= self.batch_size):
+                if self.persist is not None and not self._stop.is_set():
+                    self._persist_batch(batch, pending)
+                batch = []
+                pending = 0
+            if item is _DONE:
+                return
+
+    def run(self, pages: Iterator[FetchedPage]) -> List[Dict]:
+        """Sayfaları tüketir, tüm aşamalar bitene kadar bekler ve parse edilen ilanları döndürür"""
+        self._started = time.perf_counter()
+        with _active_lock:
+            _active_pipelines.add(self)
+        # Chrome ve uvicorn thread'leri varken fork güvenli değil; worker'lar spawn ile başlatılır
+        executor = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context('spawn'))
+        dispatcher = threading.Thread(target=self._dispatch, args=(executor,), name='pipeline-parse', daemon=True)
+        persister = threading.Thread(target=self._run_persist, name='pipeline-persist', daemon=True)
+        dispatcher.start()
+        persister.start()
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                page = next(pages, None)
+                if page is None:
+                    break
+                self.fetch_stats.record(time.perf_counter() - started)
+                self._put(self.parse_queue, page, self.parse_stats)
+        finally:
+            # Erken durdurulduysa sayfa üreticisi kapatılır
+            if hasattr(pages, 'close'):
+                pages.close()
+            self.parse_queue.put(_DONE)
+            dispatcher.join()
+            persister.join()
+            executor.shutdown()
+            self._finished = time.perf_counter()
+            with _active_lock:
+                _active_pipelines.discard(self)
+            logger.info(f"Pipeline tamamlandı {self.label}: {self.stats()}")
+        if self.error is not None:
+            raise self.error
+        return self.listings
+
+    def stats(self) -> Dict[str, Any]:
+        """Aşama başına işlenen öğe, kullanım oranı ve kuyruk derinliği"""
+        if self._started is None:
+            return {'label': self.label, 'running': False, 'elapsed_seconds': 0.0, 'stages': []}
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        return {
+            'label': self.label,
+            'running': self._finished is None,
+            'elapsed_seconds': round(elapsed, 3),
+            'listings': len(self.listings),
+            'parse_failures': self.parse_failures,
+            'stages': [
+                self.fetch_stats.to_dict(elapsed, None),
+                self.parse_stats.to_dict(elapsed, self.parse_queue.qsize()),
+                self.persist_stats.to_dict(elapsed, self.persist_queue.qsize()),
+            ],
+        }
+
+def pipeline_stats() -> List[Dict[str, Any]]:
+    """Çalışmakta olan tüm pipeline'ların anlık istatistikleri"""
+    with _active_lock:
+        pipelines = list(_active_pipelines)
+    return [pipeline.stats() for pipeline in pipelines]
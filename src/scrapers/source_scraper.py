@@ -2,17 +2,31 @@ import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import time
 import random
-from typing import List, Dict, Optional
+import os
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import logging
+from .listing_parser import parse_listing_cards, merge_contacts, listing_path
+from .pipeline import CrawlPipeline, FetchedPage
+from ..utils.metrics import PAGE_FETCH_SECONDS, READINESS_WAIT_SECONDS, WEBDRIVER_SESSIONS, scraper_label
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bir aramada dolaşılan en fazla sayfa
+MAX_PAGES = int(os.getenv("SCRAPE_MAX_PAGES", "20"))
+# Pipeline parse aşamasındaki süreç sayısı
+PARSE_WORKERS = int(os.getenv("SCRAPE_PARSE_WORKERS", "2"))
+
 class SourceScraper:
     def __init__(self):
+        # Son taramanın son sayfaya kadar eksiksiz tamamlanıp tamamlanmadığı
+        self.last_crawl_complete = False
+        # Son taramanın pipeline aşama istatistikleri
+        self.last_pipeline_stats = None
+        # Son taramada parse edilemeyen sayfa sayısı; sıfır değilse tarama eksiksiz sayılmaz
+        self.last_parse_failures = 0
         self.setup_driver()
 
     def setup_driver(self):
@@ -71,6 +85,7 @@ class SourceScraper:
             
             # Bekleme süresini ayarla
             self.wait = WebDriverWait(self.driver, 30)
+            WEBDRIVER_SESSIONS.labels(scraper=scraper_label(self)).inc()
             logger.info("WebDriver başarıyla başlatıldı")
             
         except Exception as e:
@@ -81,14 +96,21 @@ class SourceScraper:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.quit_driver()
+
+    def quit_driver(self):
+        """WebDriver'ı kapat; ikinci çağrı bir şey yapmaz"""
         if hasattr(self, 'driver'):
             self.driver.quit()
+            del self.driver
+            WEBDRIVER_SESSIONS.labels(scraper=scraper_label(self)).dec()
             logger.info("WebDriver kapatıldı")
 
     def get_page_source(self, url: str) -> Optional[str]:
         """Web sayfasının kaynak kodunu al"""
         try:
             logger.info(f"Sayfa yükleniyor: {url}")
+            started = time.perf_counter()
             
             # Sayfayı yükle
             self.driver.get(url)
@@ -106,6 +128,7 @@ class SourceScraper:
                 logger.warning(f"Çerez butonu bulunamadı: {str(e)}")
             
             # İlan listesinin yüklenmesini bekle
+            wait_started = time.perf_counter()
             try:
                 self.wait.until(EC.presence_of_element_located((
                     By.CSS_SELECTOR, 'ul.list-items-container'
@@ -121,6 +144,8 @@ class SourceScraper:
             except Exception as e:
                 logger.error(f"İlanlar yüklenemedi: {str(e)}")
                 return None
+            finally:
+                READINESS_WAIT_SECONDS.labels(scraper=scraper_label(self)).observe(time.perf_counter() - wait_started)
             
             # Sayfayı yavaşça kaydır
             try:
@@ -142,11 +167,7 @@ class SourceScraper:
             
             # Kaynak kodunu al
             page_source = self.driver.page_source
-            
-            # Debug için kaydet
-            with open('page_source.html', 'w', encoding='utf-8') as f:
-                f.write(page_source)
-            logger.info("Sayfa kaynağı kaydedildi")
+            PAGE_FETCH_SECONDS.labels(scraper=scraper_label(self)).observe(time.perf_counter() - started)
             
             return page_source
             
@@ -154,202 +175,116 @@ class SourceScraper:
             logger.error(f"Sayfa kaynağı alınırken hata: {str(e)}")
             return None
 
+    def get_detail_source(self, url: str) -> Optional[str]:
+        """İlan detay sayfasının kaynak kodunu al; harita konumu sayfadaki __NUXT__ durumundadır"""
+        try:
+            logger.info(f"Detay sayfası yükleniyor: {url}")
+            self.driver.get(url)
+            self.wait.until(lambda driver: driver.execute_script("return !!window.__NUXT__"))
+            return self.driver.page_source
+        except Exception as e:
+            logger.error(f"Detay sayfası alınırken hata: {str(e)}")
+            return None
+
     def parse_listings(self, html: str) -> List[Dict]:
-        """HTML içeriğinden ilanları parse et"""
-        listings = []
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Ana ul container'ını bul
-        container = soup.select_one('ul.list-items-container')
-        if not container:
-            logger.error("İlan listesi container'ı bulunamadı")
-            return []
-        
-        # İlanları bul
-        listing_items = container.select('li.listing-item')
-        logger.info(f"Bulunan ilan sayısı: {len(listing_items)}")
-        
-        # Her ilan için Selenium elementlerini bul
-        selenium_items = self.driver.find_elements(By.CSS_SELECTOR, 'li.listing-item')
-        
-        for idx, (item, selenium_item) in enumerate(zip(listing_items, selenium_items)):
+        """HTML içeriğinden ilanları parse et; telefon bilgileri tarayıcıda tıklanarak alınır"""
+        listings = parse_listing_cards(html)
+        logger.info(f"Bulunan ilan sayısı: {len(listings)}")
+        return merge_contacts(listings, self.collect_contacts())
+
+    def collect_contacts(self) -> Dict[str, Dict]:
+        """Açık sayfadaki ilanların telefon butonlarına tıklayıp danışman/telefon bilgilerini ilan yoluna göre toplar"""
+        contacts = {}
+        for selenium_item in self.driver.find_elements(By.CSS_SELECTOR, 'li.listing-item'):
             try:
-                listing = {}
-                
-                # Başlık
-                title = item.select_one('h3')
-                if title:
-                    listing['baslik'] = title.text.strip()
-                    logger.info(f"Başlık: {listing['baslik']}")
-                
-                # Fiyat
-                price_elem = item.select_one('span.list-view-price')
-                if price_elem:
-                    price = price_elem.text.strip()
-                    currency = price_elem.select_one('span.currency')
-                    currency_text = currency.text.strip() if currency else 'TL'
-                    listing['fiyat'] = f"{price} {currency_text}"
-                    logger.info(f"Fiyat: {listing['fiyat']}")
-                
-                # İlan tarihi
-                date_elem = item.select_one('span.list-view-date')
-                if date_elem:
-                    listing['ilan_tarihi'] = date_elem.text.strip()
-                    logger.info(f"İlan tarihi: {listing['ilan_tarihi']}")
-                
-                # Konum
-                location = item.select_one('span.list-view-location')
-                if location:
-                    listing['konum'] = location.text.strip()
-                    logger.info(f"Konum: {listing['konum']}")
-                
-                # İlan linki
-                link = item.select_one('a[href*="/istanbul-"]')
-                if link and link.get('href'):
-                    listing['url'] = f"https://www.hepsiemlak.com{link['href']}"
-                    logger.info(f"URL: {listing['url']}")
-                
-                # Resim
-                img = item.select_one('img.list-view-image')
-                if img and img.get('src'):
-                    listing['resim'] = img['src']
-                    logger.info(f"Resim: {listing['resim']}")
-                
-                # Özellikler
-                features = []
-                
-                # İlan tipi
-                prop_type = item.select_one('span.left')
-                if prop_type:
-                    listing['ilan_tipi'] = prop_type.text.strip()
-                    features.append(prop_type.text.strip())
-                
-                # Detaylı özellikler
-                specs = item.select_one('span.right.celly')
-                if specs:
-                    # Oda sayısı
-                    room_count = specs.select_one('span.houseRoomCount')
-                    if room_count:
-                        listing['oda_sayisi'] = room_count.text.strip()
-                        features.append(room_count.text.strip())
-                    
-                    # Metrekare
-                    square_meter = specs.select_one('span.squareMeter')
-                    if square_meter:
-                        listing['metrekare'] = square_meter.text.strip()
-                        features.append(square_meter.text.strip())
-                    
-                    # Bina yaşı
-                    building_age = specs.select_one('span.buildingAge')
-                    if building_age:
-                        listing['bina_yasi'] = building_age.text.strip()
-                        features.append(building_age.text.strip())
-                    
-                    # Kat
-                    floor = specs.select_one('span.floortype')
-                    if floor:
-                        listing['kat'] = floor.text.strip()
-                        features.append(floor.text.strip())
-                
-                listing['ozellikler'] = features
-                
-                # Emlak ofisi bilgileri
-                office = item.select_one('p.listing-card--owner-info__firm-name')
-                if office:
-                    listing['emlak_ofisi'] = office.text.strip()
-                    logger.info(f"Emlak ofisi: {listing['emlak_ofisi']}")
-                
-                # Emlak ofisi logosu
-                office_logo = item.select_one('img.branded-image')
-                if office_logo and office_logo.get('src'):
-                    listing['emlak_ofisi_logo'] = office_logo['src']
-                
-                # Emlak ofisi linki
-                office_link = item.select_one('a[href*="/emlak-ofisi/"]')
-                if office_link and office_link.get('href'):
-                    listing['emlak_ofisi_url'] = f"https://www.hepsiemlak.com{office_link['href']}"
+                link = selenium_item.find_element(By.CSS_SELECTOR, 'a[href*="/istanbul-"]')
+                path = listing_path(link.get_attribute('href'))
+            except Exception:
+                continue
+
+            try:
+                # Selenium ile ilgili ilanın telefon butonunu bul
+                phone_button = selenium_item.find_element(By.CSS_SELECTOR, 'button.action-telephone')
+                # JavaScript ile tıklama işlemi
+                self.driver.execute_script("arguments[0].click();", phone_button)
+                # Bilgilerin yüklenmesini bekle
+                time.sleep(2)
 
-                # İlan sahibi bilgileri ve telefon numaraları
-                try:
-                    # Selenium ile ilgili ilanın telefon butonunu bul
-                    phone_button = selenium_item.find_element(By.CSS_SELECTOR, 'button.action-telephone')
-                    # JavaScript ile tıklama işlemi
-                    self.driver.execute_script("arguments[0].click();", phone_button)
-                    # Bilgilerin yüklenmesini bekle
-                    time.sleep(2)
+                # Açılan telefon container'ını bul
+                phone_container = selenium_item.find_element(By.CSS_SELECTOR, 'div.list-phone-container')
+                
+                # Danışman adını al
+                consultant_name = phone_container.find_element(By.CSS_SELECTOR, 'span.phone-consultant-name').text.strip()
+                logger.info(f"Danışman adı: {consultant_name}")
 
-                    # Açılan telefon container'ını bul
-                    phone_container = selenium_item.find_element(By.CSS_SELECTOR, 'div.list-phone-container')
-                    
-                    # Danışman adını al
-                    consultant_name = phone_container.find_element(By.CSS_SELECTOR, 'span.phone-consultant-name').text.strip()
-                    listing['danısman_adi'] = consultant_name
-                    logger.info(f"Danışman adı: {consultant_name}")
+                # İlan numarasını al
+                listing_id = phone_container.find_element(By.CSS_SELECTOR, 'span.phone-listing-id').text.strip()
+                logger.info(f"İlan no: {listing_id}")
 
-                    # İlan numarasını al
-                    listing_id = phone_container.find_element(By.CSS_SELECTOR, 'span.phone-listing-id').text.strip()
-                    listing['ilan_no'] = listing_id
-                    logger.info(f"İlan no: {listing_id}")
+                # Telefon numaralarını al
+                phone_numbers = []
+                phone_elements = phone_container.find_elements(By.CSS_SELECTOR, 'ul.list-phone-numbers li a')
+                for phone_elem in phone_elements:
+                    phone_number = phone_elem.text.strip()
+                    if phone_number:
+                        phone_numbers.append(phone_number)
+                logger.info(f"Telefon numaraları: {phone_numbers}")
 
-                    # Telefon numaralarını al
-                    phone_numbers = []
-                    phone_elements = phone_container.find_elements(By.CSS_SELECTOR, 'ul.list-phone-numbers li a')
-                    for phone_elem in phone_elements:
-                        phone_number = phone_elem.text.strip()
-                        if phone_number:
-                            phone_numbers.append(phone_number)
-                    
-                    listing['telefon_numaralari'] = phone_numbers
-                    logger.info(f"Telefon numaraları: {phone_numbers}")
+                contacts[path] = {
+                    'danısman_adi': consultant_name,
+                    'ilan_no': listing_id,
+                    'telefon_numaralari': phone_numbers,
+                }
 
-                    # Telefon penceresini kapat
-                    close_button = phone_container.find_element(By.CSS_SELECTOR, 'a.close-list-phone-wrapper')
-                    self.driver.execute_script("arguments[0].click();", close_button)
-                    time.sleep(1)
+                # Telefon penceresini kapat
+                close_button = phone_container.find_element(By.CSS_SELECTOR, 'a.close-list-phone-wrapper')
+                self.driver.execute_script("arguments[0].click();", close_button)
+                time.sleep(1)
 
-                except Exception as e:
-                    logger.error(f"Telefon numaraları alınırken hata: {str(e)}")
-                    listing['telefon_numaralari'] = []
-                    listing['danısman_adi'] = ""
-                    listing['ilan_no'] = ""
-                
-                if listing:  # Eğer en az bir bilgi varsa listeye ekle
-                    listings.append(listing)
-                    logger.info(f"İlan başarıyla eklendi")
-                
             except Exception as e:
-                logger.error(f"İlan parse edilirken hata: {str(e)}")
-                continue
+                logger.error(f"Telefon numaraları alınırken hata: {str(e)}")
         
-        return listings
+        return contacts
 
-    def _is_last_page(self, html: str) -> bool:
-        """Sayfanın son sayfa olup olmadığını kontrol et"""
+    def _is_last_page(self) -> Optional[bool]:
+        """Açık sayfanın son sayfa olup olmadığını tarayıcıdan kontrol et (HTML parse etmeden).
+
+        True sadece son sayfa olumlu olarak tespit edildiğinde (pasif sonraki
+        butonu veya aktif sayfanın son sayfa linki olması) döner. Sonraki
+        butonu bulunamazsa veya kontrol hata verirse durum bilinmez ve None
+        döner; bu durumda tarama durur ama tamamlanmış sayılmaz.
+        """
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
             # Sonraki sayfa butonunu kontrol et
-            next_button = soup.select_one('a.he-pagination__navigate-text--next')
-            if not next_button or 'disabled' in next_button.get('class', []):
+            next_buttons = self.driver.find_elements(By.CSS_SELECTOR, 'a.he-pagination__navigate-text--next')
+            if next_buttons and 'disabled' in (next_buttons[0].get_attribute('class') or '').split():
                 return True
             
             # Alternatif kontrol: Sayfa numaralarını kontrol et
-            pagination = soup.select('ul.he-pagination__links li')
+            pagination = self.driver.find_elements(By.CSS_SELECTOR, 'ul.he-pagination__links li')
             if pagination:
-                current_page = soup.select_one('li.he-pagination__item--active')
-                if current_page and current_page == pagination[-1]:
+                current_page = self.driver.find_elements(By.CSS_SELECTOR, 'li.he-pagination__item--active')
+                if current_page and current_page[0] == pagination[-1]:
                     return True
             
-            return False
+            if next_buttons:
+                return False
+
+            logger.warning("Sonraki sayfa butonu bulunamadı, son sayfa olup olmadığı bilinmiyor")
+            return None
             
         except Exception as e:
             logger.error(f"Sayfa kontrolü yapılırken hata: {str(e)}")
-            return True  # Hata durumunda son sayfa olarak kabul et
+            return None  # Hata durumunda tarama durur ama tamamlanmış sayılmaz
 
-    def search_all_pages(self, base_url: str) -> List[Dict]:
-        """Tüm sayfalardaki ilanları topla"""
-        all_listings = []
+    def iter_pages(self, base_url: str, max_pages: Optional[int] = MAX_PAGES) -> Iterator[FetchedPage]:
+        """Pipeline'ın fetch aşaması: sayfaları sırayla yükler, telefon bilgilerini toplar ve sayfayı verir.
+
+        Parse burada yapılmaz; tarayıcı bir sonraki sayfayı yüklerken önceki
+        sayfa süreç havuzunda parse edilir.
+        """
         current_page = 1
+        self.last_crawl_complete = False
         
         while True:
             try:
@@ -363,71 +298,74 @@ class SourceScraper:
                 
                 logger.info(f"Sayfa {current_page} işleniyor: {current_url}")
                 
-                # Sayfa kaynağını al
+                # Sayfa kaynağını al (ilan bulunmayan sayfada None döner)
                 html = self.get_page_source(current_url)
                 if not html:
                     logger.error(f"Sayfa {current_page} için kaynak kodu alınamadı")
                     break
                 
-                # İlanları parse et
-                page_listings = self.parse_listings(html)
-                
-                # Eğer sayfa boşsa veya hiç ilan bulunamadıysa döngüyü kır
-                if not page_listings:
-                    logger.info(f"Sayfa {current_page} boş, işlem sonlandırılıyor")
-                    break
-                
-                # İlanları ana listeye ekle
-                all_listings.extend(page_listings)
-                logger.info(f"Sayfa {current_page}: {len(page_listings)} ilan eklendi. Toplam: {len(all_listings)}")
-                
-                # Son sayfa kontrolü
-                if self._is_last_page(html):
-                    logger.info("Son sayfaya ulaşıldı")
-                    break
-                
-                # Sonraki sayfaya geç
-                current_page += 1
-                
-                # Anti-bot önlemi: Rastgele bekleme
-                time.sleep(random.uniform(3, 5))
-                
-                # Belirli bir sayfa limitini aşınca dur (opsiyonel)
-                if current_page > 20:  # Maksimum 20 sayfa
-                    logger.info("Maksimum sayfa limitine ulaşıldı")
-                    break
-                
+                contacts = self.collect_contacts()
+                last_page = self._is_last_page()
             except Exception as e:
                 logger.error(f"Sayfa {current_page} işlenirken hata: {str(e)}")
                 break
             
+            yield FetchedPage(current_page, current_url, html, contacts)
+            
+            # Son sayfa kontrolü
+            if last_page:
+                logger.info("Son sayfaya ulaşıldı")
+                self.last_crawl_complete = True
+                break
+            if last_page is None:
+                logger.warning("Sayfalama durumu belirlenemedi, tarama eksik olarak durduruluyor")
+                break
+            
+            # Belirli bir sayfa limitini aşınca dur
+            if max_pages and current_page >= max_pages:
+                logger.info("Maksimum sayfa limitine ulaşıldı")
+                break
+            
+            # Sonraki sayfaya geç
+            current_page += 1
+            
+            # Anti-bot önlemi: Rastgele bekleme
+            time.sleep(random.uniform(3, 5))
+
+    def search_all_pages(
+        self,
+        base_url: str,
+        max_pages: Optional[int] = MAX_PAGES,
+        persist: Optional[Callable[[List[Tuple[FetchedPage, List[Dict]]]], None]] = None
+    ) -> List[Dict]:
+        """Tüm sayfalardaki ilanları fetch → parse → persist pipeline'ı ile topla.
+
+        persist verilirse parse edilen sayfalar tarama sürerken toplu olarak
+        kaydedilir; aşama istatistikleri last_pipeline_stats'ta tutulur.
+        """
+        pipeline = CrawlPipeline(persist=persist, parse_workers=PARSE_WORKERS, label=base_url, scraper=scraper_label(self))
+        try:
+            all_listings = pipeline.run(self.iter_pages(base_url, max_pages))
+        finally:
+            self.last_pipeline_stats = pipeline.stats()
+            self.last_parse_failures = pipeline.parse_failures
         logger.info(f"Toplam {len(all_listings)} ilan başarıyla toplandı")
         return all_listings
 
-    def search_listings_with_pagination(self, search_url: str, use_pagination: bool = False) -> List[Dict]:
+    def search_listings_with_pagination(
+        self,
+        search_url: str,
+        use_pagination: bool = False,
+        persist: Optional[Callable[[List[Tuple[FetchedPage, List[Dict]]]], None]] = None
+    ) -> List[Dict]:
         """
-        İlanları topla. use_pagination=True ise tüm sayfaları dolaşır.
+        İlanları topla. use_pagination=True ise tüm sayfaları dolaşır, aksi halde sadece ilk sayfayı.
         """
         try:
-            if use_pagination:
-                return self.search_all_pages(search_url)
-            else:
-                # Sayfa kaynağını al
-                html = self.get_page_source(search_url)
-                if not html:
-                    logger.error("Sayfa kaynağı alınamadı")
-                    return []
-                
-                # İlanları parse et
-                listings = self.parse_listings(html)
-                logger.info(f"Toplam {len(listings)} ilan başarıyla toplandı")
-                
-                return listings
+            return self.search_all_pages(search_url, MAX_PAGES if use_pagination else 1, persist)
                 
         except Exception as e:
             logger.error(f"İlan toplama hatası: {str(e)}")
-            return []
+            raise
         finally:
-            if hasattr(self, 'driver'):
-                self.driver.quit()
-                logger.info("WebDriver kapatıldı") 
\ No newline at end of file
+            self.quit_driver()
@@ -0,0 +1,286 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+import math
+import threading
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from ..models.database import Property, SavedSearch, NotificationOutbox
+from ..models.schemas import PropertyStatus, PropertyCategory
+from .filters import FilterError, apply_property_filters, normalize_category
+from .locations import location_slug, parse_location
+from .normalizer import parse_room_filter
+from .search import search_terms
+import logging
+
+logger = logging.getLogger(__name__)
+
+EVENT_NEW = 'new'
+EVENT_PRICE_DROP = 'price_drop'
+EVENT_MATCHED = 'matched'  # Güncellenen ilan ilk kez aramaya uydu
+
+# Kayıtlı aramalarda kullanılabilen /properties filtreleri; konum (bbox/yarıçap) ingestion'da bilinmez
+SAVED_SEARCH_FILTERS = {
+    'local_kw', 'min_price', 'max_price', 'category', 'province', 'district', 'neighborhood',
+    'status', 'room_count', 'min_size', 'max_size', 'min_floor', 'max_floor',
+    'max_building_age', 'currency', 'seller_id',
+}
+
+# JSON gövdesinden gelen sayısal filtrelerin tipleri (/properties sorgu parametreleriyle aynı)
+NUMERIC_FILTERS = {
+    'min_price': float, 'max_price': float, 'min_size': float, 'max_size': float,
+    'min_floor': int, 'max_floor': int, 'max_building_age': int, 'seller_id': int,
+}
+
+# İlanın eşitlik koşullarından aranacak index anahtarları; seçicilik sırasıyla
+ANCHOR_FIELDS = ('neighborhood', 'district', 'seller_id', 'province', 'category', 'status')
+ANY = '*'
+
+# Fiyat aralıkları logaritmik bantlara bölünür (2 katlık); bant dışındaki aramalar aday olmaz
+PRICE_BAND_BASE = 2.0
+# Bu kadar banttan geniş aralıklar bantlanmaz, her fiyat için aday olur
+MAX_PRICE_BANDS = 12
+
+def price_band(price: float) -> int:
+    return int(math.floor(math.log(max(price, 1.0), PRICE_BAND_BASE)))
+
+def clean_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Boş değerleri atar; desteklenmeyen filtrelerde FilterError fırlatır"""
+    cleaned = {name: value for name, value in filters.items() if value not in (None, '')}
+    unsupported = set(cleaned) - SAVED_SEARCH_FILTERS
+    if unsupported:
+        raise FilterError(f"Unsupported filters for saved searches: {', '.join(sorted(unsupported))}")
+    for name, cast in NUMERIC_FILTERS.items():
+        if name in cleaned:
+            try:
+                cleaned[name] = cast(cleaned[name])
+            except (TypeError, ValueError):
+                raise FilterError(f"Invalid value for {name}: {cleaned[name]}")
+    for name in set(cleaned) - set(NUMERIC_FILTERS):
+        cleaned[name] = str(cleaned[name])
+    return cleaned
+
+def validate_saved_search(db: Session, filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Filtreleri /properties ile aynı kurallarla doğrular (sorgu çalıştırılmaz)"""
+    cleaned = clean_filters(filters)
+    apply_property_filters(db, db.query(Property.id), cleaned, ranked=False)
+    return cleaned
+
+def listing_facts(prop) -> Dict[str, Any]:
+    """İlanın eşleştirmede kullanılan değerleri; konumlar filtrelerle aynı slug biçiminde"""
+    province, district, neighborhood = parse_location(prop.location)
+    return {
+        'status': getattr(prop.status, 'value', prop.status),
+        'category': getattr(prop.property_type, 'value', prop.property_type),
+        'province': location_slug(province) if province else None,
+        'district': location_slug(district) if district else None,
+        'neighborhood': location_slug(neighborhood) if neighborhood else None,
+        'seller_id': prop.seller_id,
+        'price': prop.price,
+        'currency': prop.currency,
+        'size': prop.size,
+        'room_count': prop.room_count,
+        'living_room_count': prop.living_room_count,
+        'floor': prop.floor,
+        'building_age': prop.building_age,
+        'terms': set((prop.search_text or '').split()),
+    }
+
+class SearchPredicate:
+    """Kayıtlı aramanın filtreleri, ilan değerleri üzerinde apply_property_filters ile aynı anlamda"""
+
+    def __init__(self, search_id: int, filters: Dict[str, Any]):
+        self.search_id = search_id
+        self.equals: Dict[str, Any] = {}
+        self.ranges: List[Tuple[str, Optional[float], Optional[float]]] = []
+        self.terms = search_terms(filters['local_kw']) if filters.get('local_kw') else []
+
+        if filters.get('category'):
+            self.equals['category'] = PropertyCategory(normalize_category(filters['category'])).value
+        if filters.get('status'):
+            self.equals['status'] = PropertyStatus(filters['status']).value
+        if filters.get('province'):
+            self.equals['province'] = location_slug(filters['province'])
+        if filters.get('district'):
+            self.equals['district'] = location_slug(filters['district'].split('-')[0])
+        if filters.get('neighborhood'):
+            self.equals['neighborhood'] = location_slug(filters['neighborhood'])
+        if filters.get('seller_id') is not None:
+            self.equals['seller_id'] = int(filters['seller_id'])
+        if filters.get('currency'):
+            self.equals['currency'] = filters['currency'].upper()
+        if filters.get('room_count'):
+            rooms, living_rooms = parse_room_filter(filters['room_count'])
+            self.equals['room_count'] = rooms
+            if living_rooms is not None:
+                self.equals['living_room_count'] = living_rooms
+
+        for field, low, high in (
+            ('price', 'min_price', 'max_price'),
+            ('size', 'min_size', 'max_size'),
+            ('floor', 'min_floor', 'max_floor'),
+            ('building_age', None, 'max_building_age'),
+        ):
+            minimum = filters.get(low) if low else None
+            maximum = filters.get(high)
+            if minimum is not None or maximum is not None:
+                self.ranges.append((field, minimum, maximum))
+
+    def anchor(self) -> Tuple[str, Any]:
+        """Aramanın index'e yerleştirildiği en seçici eşitlik koşulu"""
+        for field in ANCHOR_FIELDS:
+            if field in self.equals:
+                return field, self.equals[field]
+        return ANY, ANY
+
+    def price_bands(self) -> Optional[range]:
+        """Fiyat aralığının kapsadığı bantlar; sınırsız veya çok geniş aralıkta None"""
+        for field, minimum, maximum in self.ranges:
+            if field == 'price' and maximum is not None:
+                low = price_band(minimum) if minimum else price_band(1)
+                high = price_band(maximum)
+                if high - low + 1 <= MAX_PRICE_BANDS:
+                    return range(low, high + 1)
+        return None
+
+    def matches(self, facts: Dict[str, Any]) -> bool:
+        for field, value in self.equals.items():
+            if facts.get(field) != value:
+                return False
+        for field, minimum, maximum in self.ranges:
+            value = facts.get(field)
+            # SQL'deki gibi değeri olmayan ilan aralık koşuluna uymaz
+            if value is None or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+                return False
+        # Tam metin aramadaki gibi her terim bir kelimenin öneki olmalı
+        for term in self.terms:
+            if not any(word.startswith(term) for word in facts['terms']):
+                return False
+        return True
+
+class SavedSearchIndex:
+    """Kayıtlı aramaların ters indexi: (çapa alanı, değer, fiyat bandı) -> aramalar.
+
+    Her arama tek bir çapa anahtarına ve fiyat aralığının kapsadığı bantlara
+    yerleşir; bir ilan için sadece kendi değerlerinin anahtarlarındaki
+    aramalar tam olarak kontrol edilir. Maliyet arama sayısından değil, ilanın
+    anahtarlarına düşen aday sayısından etkilenir.
+    """
+
+    def __init__(self, predicates: Iterable[SearchPredicate]):
+        self.buckets: Dict[Tuple, List[SearchPredicate]] = defaultdict(list)
+        self.size = 0
+        for predicate in predicates:
+            field, value = predicate.anchor()
+            bands = predicate.price_bands()
+            for band in (bands if bands is not None else [ANY]):
+                self.buckets[(field, value, band)].append(predicate)
+            self.size += 1
+
+    def match(self, facts: Dict[str, Any]) -> List[int]:
+        bands = [ANY] if facts.get('price') is None else [ANY, price_band(facts['price'])]
+        keys = [(field, facts.get(field)) for field in ANCHOR_FIELDS if facts.get(field) is not None] + [(ANY, ANY)]
+        matched = []
+        for field, value in keys:
+            for band in bands:
+                for predicate in self.buckets.get((field, value, band), ()):
+                    if predicate.matches(facts):
+                        matched.append(predicate.search_id)
+        return matched
+
+# Süreç içi index; kayıtlı aramalar değişince (sayı veya son güncelleme) yeniden kurulur
+_index_lock = threading.Lock()
+_index_cache: Dict[str, Any] = {'version': None, 'index': None}
+
+def saved_search_index(db: Session) -> SavedSearchIndex:
+    version = tuple(db.query(func.count(SavedSearch.id), func.max(SavedSearch.updated_at)).filter(
+        SavedSearch.active.is_(True)
+    ).one())
+    with _index_lock:
+        if _index_cache['version'] != version:
+            predicates = []
+            for search_id, filters in db.query(SavedSearch.id, SavedSearch.filters).filter(SavedSearch.active.is_(True)):
+                try:
+                    predicates.append(SearchPredicate(search_id, filters or {}))
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error(f"Kayıtlı arama {search_id} atlandı: {str(e)}")
+            _index_cache['index'] = SavedSearchIndex(predicates)
+            _index_cache['version'] = version
+            logger.info(f"Kayıtlı arama indexi kuruldu: {len(predicates)} arama")
+        return _index_cache['index']
+
+class SavedSearchMatcher:
+    """Ingestion sırasında yeni/değişen ilanları kayıtlı aramalarla eşleştirip bildirim kuyruğuna yazar"""
+
+    def __init__(self, index: SavedSearchIndex):
+        self.index = index
+        self.pending: List[Tuple[Any, str, Optional[float], List[int]]] = []
+
+    @classmethod
+    def for_session(cls, db: Session) -> Optional['SavedSearchMatcher']:
+        """Aktif kayıtlı arama yoksa None; ingestion'a hiç ek maliyet getirmez"""
+        index = saved_search_index(db)
+        return cls(index) if index.size else None
+
+    def listing_saved(self, prop, old_facts: Optional[Dict[str, Any]] = None) -> None:
+        """Yeni ilan için old_facts None; güncellenen ilan için değişiklik öncesi listing_facts"""
+        facts = listing_facts(prop)
+        matched = self.index.match(facts)
+        if not matched:
+            return
+        if old_facts is None:
+            self.pending.append((prop, EVENT_NEW, None, matched))
+            return
+        previous = set(self.index.match(old_facts))
+        newly = [search_id for search_id in matched if search_id not in previous]
+        if newly:
+            self.pending.append((prop, EVENT_MATCHED, old_facts['price'], newly))
+        old_price, price = old_facts['price'], facts['price']
+        if old_price and price and price < old_price:
+            dropped = [search_id for search_id in matched if search_id in previous]
+            if dropped:
+                self.pending.append((prop, EVENT_PRICE_DROP, old_price, dropped))
+
+    def flush(self, db: Session) -> None:
+        """Eşleşmeleri notification_outbox'a ekler (commit çağırana aittir)"""
+        if not self.pending:
+            return
+        # Yeni ilanların id'leri için
+        db.flush()
+        now = datetime.utcnow()
+        rows = [
+            {
+                'saved_search_id': search_id, 'property_id': prop.id, 'event': event,
+                'price': prop.price, 'previous_price': previous_price, 'created_at': now,
+            }
+            for prop, event, previous_price, search_ids in self.pending
+            for search_id in search_ids
+        ]
+        db.execute(insert(NotificationOutbox.__table__), rows)
+        logger.info(f"Kayıtlı arama bildirimi: {len(rows)}")
+        self.pending.clear()
+
+def saved_search_to_dict(search: SavedSearch, pending: int = 0) -> Dict[str, Any]:
+    return {
+        'id': search.id,
+        'name': search.name,
+        'owner': search.owner,
+        'filters': search.filters,
+        'active': search.active,
+        'pending_notifications': pending,
+        'created_at': search.created_at,
+    }
+
+def notification_to_dict(notification: NotificationOutbox, url: Optional[str] = None, title: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        'id': notification.id,
+        'saved_search_id': notification.saved_search_id,
+        'property_id': notification.property_id,
+        'url': url,
+        'title': title,
+        'event': notification.event,
+        'price': notification.price,
+        'previous_price': notification.previous_price,
+        'created_at': notification.created_at,
+        'sent_at': notification.sent_at,
+    }
@@ -0,0 +1,327 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from ..models.database import Property, PropertyArchive, MarketStat, Location
+from ..models.schemas import PropertyStatus, PropertyCategory
+from .locations import DISTRICT, PROVINCE, location_slug, location_ids_query
+from .counts import dialect_insert, unique_index_elements
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Farklı para birimleri karıştırılmasın diye istatistikler TL ilanlar üzerinden tutulur
+MARKET_CURRENCY = 'TRY'
+QUANTILES = (0.25, 0.5, 0.75)
+
+# NumPy anahtar dizilerinde 'tümü' ve 'bilinmiyor' boyut değerleri
+ALL = -1
+UNKNOWN = -2
+
+def _value(enum_or_str):
+    return getattr(enum_or_str, 'value', enum_or_str)
+
+def market_snapshot(prop) -> Optional[Tuple]:
+    """İlanın piyasa istatistiklerine katkısı: (durum, kategori, ilçe, oda, ay, fiyat, m² fiyatı)
+
+    İstatistiğe girmeyen ilanlar (ilçesi/fiyatı yok, TL dışı) için None döner.
+    """
+    status = _value(prop.status)
+    property_type = _value(prop.property_type)
+    if not status or not property_type or prop.district_id is None or not prop.price:
+        return None
+    if prop.currency not in (None, MARKET_CURRENCY):
+        return None
+    seen = prop.first_seen_at or prop.created_at
+    period = seen.strftime('%Y-%m') if seen else None
+    ppsqm = prop.price / prop.size if prop.size else None
+    return (status, property_type, prop.district_id, prop.room_count, period, prop.price, ppsqm)
+
+class MarketCounter:
+    """Ingestion sırasında piyasa istatistiklerindeki sayı ve toplam değişikliklerini biriktirip toplu yazar.
+
+    live: yayındaki ilanlar satırları (period NULL), history: ilk görüldüğü ay
+    satırları. Yayından kalkma sadece live satırlarını etkiler; aylık geçmiş korunur.
+    """
+
+    def __init__(self):
+        # anahtar -> [ilan sayısı, fiyat toplamı, m² fiyatı toplamı, m² fiyatı sayısı]
+        self.deltas: Dict[Tuple, List[float]] = {}
+
+    def add(self, snapshot: Optional[Tuple], sign: int, live: bool = True, history: bool = True) -> None:
+        if snapshot is None:
+            return
+        status, property_type, district_id, room_count, period, price, ppsqm = snapshot
+        periods = ([None] if live else []) + ([period] if history and period else [])
+        for key_period in periods:
+            for key_district in (district_id, None):
+                for key_rooms in {room_count, None}:
+                    delta = self.deltas.setdefault((status, property_type, key_district, key_rooms, key_period), [0, 0.0, 0.0, 0])
+                    delta[0] += sign
+                    delta[1] += sign * price
+                    if ppsqm is not None:
+                        delta[2] += sign * ppsqm
+                        delta[3] += sign
+
+    def move(self, old: Optional[Tuple], new: Optional[Tuple], live: bool = True) -> None:
+        if old != new:
+            self.add(old, -1, live=live)
+            self.add(new, 1, live=live)
+
+    def flush(self, db: Session) -> None:
+        """Biriken değişiklikleri market_stats tablosuna uygular (commit çağırana aittir).
+
+        Toplamlar veritabanında artırılır (upsert); eşzamanlı yazımlarda artış kaybolmaz.
+        """
+        rows = [
+            {'status': status, 'property_type': property_type, 'district_id': district_id,
+             'room_count': room_count, 'period': period, 'listing_count': delta[0],
+             'price_sum': delta[1], 'ppsqm_sum': delta[2], 'ppsqm_count': delta[3]}
+            for (status, property_type, district_id, room_count, period), delta in self.deltas.items()
+            if any(delta)
+        ]
+        if rows:
+            table = MarketStat.__table__
+            stmt = dialect_insert(db)(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=unique_index_elements(table, 'uq_market_stats_dims'),
+                set_={
+                    name: func.coalesce(table.c[name], 0) + stmt.excluded[name]
+                    for name in ('listing_count', 'price_sum', 'ppsqm_sum', 'ppsqm_count')
+                }
+            )
+            db.execute(stmt, rows)
+        self.deltas.clear()
+
+def grouped_quantiles(codes: np.ndarray, values: np.ndarray, group_count: int, quantiles: Sequence[float]) -> np.ndarray:
+    """Her grubun yüzdeliklerini tek bir sıralamayla hesaplar (np.percentile 'linear' ile aynı sonuç).
+
+    Dönen dizi (len(quantiles), group_count) boyutundadır; boş gruplar NaN olur.
+    """
+    result = np.full((len(quantiles), group_count), np.nan)
+    if not len(values):
+        return result
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    first = starts[present]
+    last = first + counts[present] - 1
+    for index, quantile in enumerate(quantiles):
+        position = first + quantile * (last - first)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, last)
+        fraction = position - lower
+        result[index, present] = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    return result
+
+def _market_source_rows(db: Session) -> list:
+    """Yayındaki/yayından kalkmış ilanlar ve arşiv; aylık geçmiş arşivlenen ilanları da kapsar"""
+    def source(table, live):
+        return select(
+            table.c.status, table.c.property_type, table.c.district_id, table.c.room_count,
+            func.coalesce(table.c.first_seen_at, table.c.created_at).label('seen_at'),
+            table.c.price, table.c.size, live.label('live')
+        ).where(
+            table.c.district_id.isnot(None),
+            table.c.status.isnot(None),
+            table.c.property_type.isnot(None),
+            table.c.price > 0,
+            (table.c.currency == MARKET_CURRENCY) | table.c.currency.is_(None)
+        )
+    properties = Property.__table__
+    return db.execute(union_all(
+        source(properties, properties.c.delisted_at.is_(None)),
+        source(PropertyArchive.__table__, literal(False))
+    )).all()
+
+def _as_float(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 2)
+
+def refresh_market_stats(db: Session) -> int:
+    """market_stats tablosunu baştan hesaplar: sayılar, toplamlar ve NumPy ile yüzdelikler.
+
+    Artımlı sayaçlarda oluşabilecek sapmalar da bu yenilemeyle düzelir.
+    Commit çağırana aittir; dönen değer yazılan satır sayısıdır.
+    """
+    started = time.perf_counter()
+    rows = _market_source_rows(db)
+    db.query(MarketStat).delete(synchronize_session=False)
+    if not rows:
+        return 0
+
+    # Kategorik boyutlar tamsayı kodlara çevrilir; gruplama ve sıralama NumPy'de yapılır
+    statuses: Dict[str, int] = {}
+    categories: Dict[str, int] = {}
+    periods: Dict[str, int] = {}
+    count = len(rows)
+    dims = np.empty((count, 5), dtype=np.int64)
+    live = np.empty(count, dtype=bool)
+    price = np.empty(count)
+    size = np.zeros(count)
+    for index, row in enumerate(rows):
+        period = row.seen_at.strftime('%Y-%m') if row.seen_at else None
+        dims[index] = (
+            statuses.setdefault(_value(row.status), len(statuses)),
+            categories.setdefault(_value(row.property_type), len(categories)),
+            row.district_id,
+            row.room_count if row.room_count is not None else UNKNOWN,
+            periods.setdefault(period, len(periods)) if period else UNKNOWN
+        )
+        live[index] = bool(row.live)
+        price[index] = row.price
+        size[index] = row.size or 0
+    ppsqm = np.divide(price, size, out=np.full(count, np.nan), where=size > 0)
+
+    status_names = {code: name for name, code in statuses.items()}
+    category_names = {code: name for name, code in categories.items()}
+    period_names = {code: name for name, code in periods.items()}
+    now = datetime.utcnow()
+    records = []
+
+    # İlçe/oda boyutu kendi değeri veya 'tümü'; dönem yayındakiler veya ilk görüldüğü ay
+    for by_district in (True, False):
+        for by_rooms in (True, False):
+            for by_period in (False, True):
+                mask = dims[:, 4] != UNKNOWN if by_period else live.copy()
+                if by_rooms:
+                    mask &= dims[:, 3] != UNKNOWN
+                keys = dims[mask]
+                if not len(keys):
+                    continue
+                if not by_district:
+                    keys[:, 2] = ALL
+                if not by_rooms:
+                    keys[:, 3] = ALL
+                if not by_period:
+                    keys[:, 4] = ALL
+
+                unique_keys, codes = np.unique(keys, axis=0, return_inverse=True)
+                codes = codes.reshape(-1)
+                groups = len(unique_keys)
+                group_price = price[mask]
+                group_ppsqm = ppsqm[mask]
+                has_ppsqm = ~np.isnan(group_ppsqm)
+
+                listing_counts = np.bincount(codes, minlength=groups)
+                price_sums = np.bincount(codes, weights=group_price, minlength=groups)
+                price_quantiles = grouped_quantiles(codes, group_price, groups, QUANTILES)
+                ppsqm_counts = np.bincount(codes[has_ppsqm], minlength=groups)
+                ppsqm_sums = np.bincount(codes[has_ppsqm], weights=group_ppsqm[has_ppsqm], minlength=groups)
+                ppsqm_medians = grouped_quantiles(codes[has_ppsqm], group_ppsqm[has_ppsqm], groups, (0.5,))[0]
+
+                for group, (status, category, district_id, room_count, period) in enumerate(unique_keys.tolist()):
+                    records.append({
+                        'status': PropertyStatus(status_names[status]),
+                        'property_type': PropertyCategory(category_names[category]),
+                        'district_id': district_id if district_id != ALL else None,
+                        'room_count': room_count if room_count != ALL else None,
+                        'period': period_names[period] if period != ALL else None,
+                        'listing_count': int(listing_counts[group]),
+                        'price_sum': float(price_sums[group]),
+                        'ppsqm_sum': float(ppsqm_sums[group]),
+                        'ppsqm_count': int(ppsqm_counts[group]),
+                        'price_p25': _as_float(price_quantiles[0, group]),
+                        'price_median': _as_float(price_quantiles[1, group]),
+                        'price_p75': _as_float(price_quantiles[2, group]),
+                        'ppsqm_median': _as_float(ppsqm_medians[group]),
+                        'refreshed_at': now,
+                    })
+
+    for start in range(0, len(records), 1000):
+        db.execute(insert(MarketStat.__table__), records[start:start + 1000])
+    logger.info(f"Piyasa istatistikleri yenilendi: {count} ilan, {len(records)} satır ({time.perf_counter() - started:.2f} sn)")
+    return len(records)
+
+def market_stat_to_dict(stat: MarketStat) -> Dict[str, Any]:
+    listing_count = stat.listing_count or 0
+    ppsqm_count = stat.ppsqm_count or 0
+    return {
+        'listing_count': listing_count,
+        'price_mean': round(stat.price_sum / listing_count, 2) if listing_count else None,
+        'price_p25': stat.price_p25,
+        'price_median': stat.price_median,
+        'price_p75': stat.price_p75,
+        'ppsqm_mean': round(stat.ppsqm_sum / ppsqm_count, 2) if ppsqm_count else None,
+        'ppsqm_median': stat.ppsqm_median,
+        'refreshed_at': stat.refreshed_at,
+    }
+
+def resolve_district(db: Session, district: str, province: str = '') -> Optional[Location]:
+    """İlçe adını lokasyon kaydına çevirir; aynı isimli ilçelerden en çok ilanı olan seçilir"""
+    query = db.query(Location).filter(Location.level == DISTRICT, Location.slug == location_slug(district))
+    if province:
+        query = query.filter(Location.parent_id.in_(location_ids_query(db, PROVINCE, province)))
+    return query.order_by(Location.listing_count.desc()).first()
+
+def _market_query(db: Session, status: PropertyStatus, category: PropertyCategory):
+    return db.query(MarketStat).filter(
+        MarketStat.status == status,
+        MarketStat.property_type == category,
+        MarketStat.listing_count > 0
+    )
+
+def market_total(
+    db: Session,
+    status: PropertyStatus,
+    category: PropertyCategory,
+    district_id: Optional[int] = None,
+    room_count: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Verilen ilçe/oda için (None = tümü) yayındaki ilanların özet satırı"""
+    stat = _market_query(db, status, category).filter(
+        MarketStat.district_id == district_id,
+        MarketStat.room_count == room_count,
+        MarketStat.period.is_(None)
+    ).first()
+    return market_stat_to_dict(stat) if stat else None
+
+def market_by_district(
+    db: Session,
+    status: PropertyStatus,
+    category: PropertyCategory,
+    room_count: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Yayındaki ilanların ilçe bazında istatistikleri, ilan sayısına göre"""
+    rows = _market_query(db, status, category).join(
+        Location, Location.id == MarketStat.district_id
+    ).filter(
+        MarketStat.room_count == room_count,
+        MarketStat.period.is_(None)
+    ).with_entities(MarketStat, Location.name).order_by(MarketStat.listing_count.desc()).all()
+    return [
+        {'district_id': stat.district_id, 'district': name, **market_stat_to_dict(stat)}
+        for stat, name in rows
+    ]
+
+def market_by_rooms(
+    db: Session,
+    status: PropertyStatus,
+    category: PropertyCategory,
+    district_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Yayındaki ilanların oda sayısı bazında istatistikleri"""
+    rows = _market_query(db, status, category).filter(
+        MarketStat.district_id == district_id,
+        MarketStat.room_count.isnot(None),
+        MarketStat.period.is_(None)
+    ).order_by(MarketStat.room_count).all()
+    return [{'room_count': stat.room_count, **market_stat_to_dict(stat)} for stat in rows]
+
+def market_trend(
+    db: Session,
+    status: PropertyStatus,
+    category: PropertyCategory,
+    district_id: Optional[int] = None,
+    room_count: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """İlk görüldüğü aya göre ilan arzı ve fiyat istatistikleri (yayından kalkanlar dahil)"""
+    rows = _market_query(db, status, category).filter(
+        MarketStat.district_id == district_id,
+        MarketStat.room_count == room_count,
+        MarketStat.period.isnot(None)
+    ).order_by(MarketStat.period).all()
+    return [{'period': stat.period, **market_stat_to_dict(stat)} for stat in rows]
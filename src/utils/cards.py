@@ -0,0 +1,91 @@
+from typing import Any, Dict, List, Set
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from ..models.database import Property, Feature, PropertyImage, Seller, property_features
+from .raw_store import load_raw_data
+from .normalizer import format_room_count
+
+# /properties için her zaman seçilen kart kolonları; diğer kolonlar hiç yüklenmez
+CARD_COLUMNS = [
+    Property.id, Property.url, Property.title, Property.price, Property.currency,
+    Property.location, Property.status, Property.property_type, Property.size,
+    Property.room_count, Property.living_room_count, Property.created_at, Property.seller_id,
+    Property.latitude, Property.longitude
+]
+
+# fields= ile istenebilecek ek alanlar
+CARD_EXTRA_COLUMNS = {
+    'description': Property.description,
+}
+CARD_EXTRA_FIELDS = set(CARD_EXTRA_COLUMNS) | {'seller_info', 'raw_data'}
+
+def card_columns(extra_fields: Set[str]) -> list:
+    """Kart sorgusunda seçilecek kolonları döndürür"""
+    return CARD_COLUMNS + [column for name, column in CARD_EXTRA_COLUMNS.items() if name in extra_fields]
+
+def build_cards(db: Session, rows: list, extra_fields: Set[str]) -> List[Dict[str, Any]]:
+    """Kolon satırlarından kart dict'lerini üretir; özellik ve resimler id listesiyle toplu çekilir"""
+    ids = [row.id for row in rows]
+    if not ids:
+        return []
+
+    features = defaultdict(list)
+    for property_id, name in (
+        db.query(property_features.c.property_id, Feature.name)
+        .join(Feature, Feature.id == property_features.c.feature_id)
+        .filter(property_features.c.property_id.in_(ids))
+    ):
+        features[property_id].append(name)
+
+    images = defaultdict(list)
+    for property_id, url in (
+        db.query(PropertyImage.property_id, PropertyImage.url)
+        .filter(PropertyImage.property_id.in_(ids))
+        .order_by(PropertyImage.id)
+    ):
+        images[property_id].append(url)
+
+    sellers = {}
+    if 'seller_info' in extra_fields:
+        seller_ids = {row.seller_id for row in rows if row.seller_id}
+        if seller_ids:
+            for seller in db.query(Seller).filter(Seller.id.in_(seller_ids)):
+                sellers[seller.id] = {
+                    'name': seller.name,
+                    'company': seller.company,
+                    'phone': seller.phone,
+                    'membership_status': seller.membership_status,
+                    'profile_url': seller.profile_url,
+                    'logo_url': seller.logo_url
+                }
+
+    raw_data = load_raw_data(db, ids) if 'raw_data' in extra_fields else {}
+
+    cards = []
+    for row in rows:
+        card = {
+            'id': row.id,
+            'url': row.url,
+            'title': row.title,
+            'price': row.price,
+            'currency': row.currency,
+            'location': row.location,
+            'status': row.status.value if row.status else None,
+            'property_type': row.property_type.value if row.property_type else None,
+            'size': row.size,
+            'room_count': format_room_count(row.room_count, row.living_room_count),
+            'created_at': row.created_at,
+            'latitude': row.latitude,
+            'longitude': row.longitude,
+            'features': features.get(row.id, []),
+            'images': images.get(row.id, [])
+        }
+        if 'description' in extra_fields:
+            card['description'] = row.description
+        if 'raw_data' in extra_fields:
+            card['raw_data'] = raw_data.get(row.id, {})
+        if 'seller_info' in extra_fields:
+            card['seller_info'] = sellers.get(row.seller_id, {})
+        cards.append(card)
+
+    return cards
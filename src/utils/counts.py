@@ -0,0 +1,210 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session
+from ..models.database import Property, PropertyFacetCount
+from ..models.schemas import PropertyStatus, PropertyCategory
+import threading
+import time
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Facet sayaçlarının boyutları; bu filtreler dışında filtre varsa facet tahmini kullanılamaz
+FACET_FILTERS = ('status', 'category', 'province', 'district')
+
+def dialect_insert(db: Session):
+    """ON CONFLICT destekleyen insert (PostgreSQL veya SQLite)"""
+    return postgresql.insert if db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+
+def unique_index_elements(table, name: str) -> list:
+    """Upsert çakışma hedefi: tablodaki benzersiz indeksin ifadeleri"""
+    return list(next(index for index in table.indexes if index.name == name).expressions)
+
+def filter_key(filters: Dict[str, Any]) -> Tuple:
+    """Filtre parametrelerini önbellek anahtarı olarak kullanılabilecek normal forma çevirir"""
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if value is None or value == '':
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        normalized.append((name, value))
+    return tuple(normalized)
+
+class CountCache:
+    """Filtre setine göre kesin sonuç sayılarını tutan, süreç içi sınırlı (LRU + TTL) önbellek.
+
+    generation verilirse her okumada paylaşılan nesil sayacı (bkz.
+    ResultCache.generation) kontrol edilir; başka bir worker'daki veya
+    reextract/enrich gibi ayrı süreçlerdeki yazımlar sayacı değiştirdiğinde
+    tüm girdiler düşer. Sayacı artırmayan yazımlar için girdiler en fazla
+    ttl_seconds kadar eski kalabilir.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300,
+                 generation: Optional[Callable[[], Optional[int]]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = generation
+        self._generation: Optional[int] = None
+        self._entries: 'OrderedDict[Tuple, Tuple[int, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync_generation(self) -> Optional[bool]:
+        """Nesil değiştiyse girdileri temizler ve True döner; nesil okunamıyorsa None"""
+        if self.generation is None:
+            return False
+        current = self.generation()
+        if current is None:
+            return None
+        with self._lock:
+            if current == self._generation:
+                return False
+            self._entries.clear()
+            self._generation = current
+            return True
+
+    def get(self, key: Tuple) -> Optional[int]:
+        if self._sync_generation() is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Tuple, value: int) -> None:
+        # Sayım sırasında nesil değiştiyse değer yazımdan önceki veriyi yansıtıyor olabilir
+        if self.ttl_seconds <= 0 or self._sync_generation() is not False:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+def exact_count(cache: CountCache, query: Query, filters: Dict[str, Any]) -> int:
+    """Sorgunun kesin sonuç sayısını önbellekten veya veritabanından döndürür"""
+    key = filter_key(filters)
+    total = cache.get(key)
+    if total is None:
+        total = query.count()
+        cache.set(key, total)
+    return total
+
+def planner_estimate(db: Session, query: Query) -> Optional[int]:
+    """PostgreSQL planlayıcı istatistiklerinden tahmini satır sayısını döndürür"""
+    bind = db.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+
+    compiled = query.statement.compile(dialect=bind.dialect)
+    result = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def facet_estimate(db: Session, filters: Dict[str, Any], facet_conditions: list) -> Optional[int]:
+    """Sadece facet boyutlarıyla filtrelenen sorgular için sayaç tablosundan sayı döndürür"""
+    active = {name for name, value in filters.items() if value not in (None, '')}
+    if not active.issubset(FACET_FILTERS):
+        return None
+
+    total = db.query(func.coalesce(func.sum(PropertyFacetCount.count), 0)).filter(*facet_conditions).scalar()
+    return int(total)
+
+def facet_key(prop: Property) -> Tuple:
+    """İlanın facet sayaçlarındaki anahtarı (enum değerleri string olarak)"""
+    status = PropertyStatus(prop.status).value if prop.status else None
+    property_type = PropertyCategory(prop.property_type).value if prop.property_type else None
+    return (status, property_type, prop.province_id, prop.district_id)
+
+class FacetCounter:
+    """Ingestion sırasında facet sayaç değişikliklerini biriktirip toplu yazar"""
+
+    def __init__(self):
+        self.deltas: Dict[Tuple, int] = {}
+
+    def add(self, key: Tuple, delta: int) -> None:
+        self.deltas[key] = self.deltas.get(key, 0) + delta
+
+    def move(self, old_key: Tuple, new_key: Tuple) -> None:
+        if old_key != new_key:
+            self.add(old_key, -1)
+            self.add(new_key, 1)
+
+    def flush(self, db: Session) -> None:
+        """Biriken değişiklikleri sayaç tablosuna uygular (commit çağırana aittir).
+
+        Artış veritabanında (count = count + delta) upsert ile yapılır; aynı
+        anda yazan başka worker'ların artışları kaybolmaz.
+        """
+        rows = [
+            {'status': status, 'property_type': property_type, 'province_id': province_id,
+             'district_id': district_id, 'count': delta}
+            for (status, property_type, province_id, district_id), delta in self.deltas.items()
+            if delta != 0
+        ]
+        if rows:
+            table = PropertyFacetCount.__table__
+            stmt = dialect_insert(db)(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=unique_index_elements(table, 'uq_property_facet_counts_dims'),
+                set_={'count': func.coalesce(table.c['count'], 0) + stmt.excluded['count']}
+            )
+            db.execute(stmt, rows)
+        self.deltas.clear()
+
+class ListingCounter:
+    """listing_count kolonu olan tablolar (lokasyon, satıcı) için ilan sayısı değişikliklerini biriktirip toplu yazar"""
+
+    def __init__(self, model):
+        self.model = model
+        self.deltas: Dict[int, int] = {}
+
+    def add(self, row_ids: List[int], delta: int) -> None:
+        for row_id in row_ids:
+            if row_id is not None:
+                self.deltas[row_id] = self.deltas.get(row_id, 0) + delta
+
+    def move(self, old_ids: List[int], new_ids: List[int]) -> None:
+        if old_ids != new_ids:
+            self.add(old_ids, -1)
+            self.add(new_ids, 1)
+
+    def flush(self, db: Session) -> None:
+        """Biriken değişiklikleri tabloya uygular (commit çağırana aittir)"""
+        for row_id, delta in self.deltas.items():
+            if delta == 0:
+                continue
+            db.query(self.model).filter(self.model.id == row_id).update(
+                {self.model.listing_count: func.coalesce(self.model.listing_count, 0) + delta},
+                synchronize_session=False
+            )
+        self.deltas.clear()
+
+REBUILD_FACET_COUNTS = [
+    "DELETE FROM property_facet_counts",
+    """INSERT INTO property_facet_counts (status, property_type, province_id, district_id, count)
+       SELECT status, property_type, province_id, district_id, COUNT(*)
+       FROM properties
+       {where}
+       GROUP BY status, property_type, province_id, district_id""",
+]
+
+def rebuild_facet_counts(connection, live_only: bool = False) -> None:
+    """Facet sayaçlarını properties tablosundan baştan hesaplar (live_only: sadece yayındakiler)"""
+    where = "WHERE delisted_at IS NULL" if live_only else ""
+    for statement in REBUILD_FACET_COUNTS:
+        connection.execute(text(statement.format(where=where)))
@@ -0,0 +1,281 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+from urllib.parse import urlparse
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from ..models.database import Property, PropertyImage, Seller, ListingSignature, listing_lsh_buckets
+from .search import build_search_text
+from .normalizer import format_room_count
+import numpy as np
+import hashlib
+import posixpath
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 16 bant x 4 satır: benzerliği ~0.5 üzerindeki çiftler yüksek olasılıkla aday olur
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+# Adaylar imza benzerliği (tahmini Jaccard) bu eşiği geçerse mükerrer sayılır
+DUPLICATE_THRESHOLD = 0.6
+# m² farkı bu oranı geçen ilanlar aynı daire sayılmaz
+SIZE_TOLERANCE = 0.1
+# Çok kalabalık kovalarda karşılaştırılan en fazla aday
+MAX_CANDIDATES = 500
+
+# Her ilanda geçen, ayırt edici olmayan başlık kelimeleri
+TITLE_STOPWORDS = {
+    'satilik', 'kiralik', 'daire', 'ev', 'evi', 'emlak', 'sahibinden', 'acil',
+    'firsat', 'ile', 've', 'den', 'dan', 'da', 'de', 'bir', 'cok',
+}
+
+# İmzalar veritabanında saklandığı için permütasyonlar sabit tohumla üretilir; değiştirilmemeli
+MINHASH_SEED = 20250224
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(MINHASH_SEED)
+# a < 2^29 ve 32 bit özetlerle a*h+b uint64'e sığar
+_PERM_A = _rng.integers(1, 1 << 29, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+
+def listing_tokens(prop, image_url: Optional[str] = None) -> Set[str]:
+    """İlanın parmak izi öğeleri: sadeleştirilmiş başlık kelimeleri/ikilileri, konum, m², oda, kat ve resim"""
+    words = [w for w in build_search_text(prop.title).split() if len(w) > 2 and w not in TITLE_STOPWORDS]
+    tokens = {f"t:{word}" for word in words}
+    tokens.update(f"t:{first}_{second}" for first, second in zip(words, words[1:]))
+    if prop.district_id is not None:
+        tokens.add(f"d:{prop.district_id}")
+    if prop.neighborhood_id is not None:
+        tokens.add(f"n:{prop.neighborhood_id}")
+    if prop.size:
+        # Ofisler m²'yi brüt/net farklı yazabildiği için 5 m²'lik aralıklar kullanılır
+        tokens.add(f"m2:{int(round(prop.size / 5))}")
+    rooms = format_room_count(prop.room_count, prop.living_room_count)
+    if rooms:
+        tokens.add(f"r:{rooms}")
+    if prop.floor is not None:
+        tokens.add(f"k:{prop.floor}")
+    if image_url:
+        # Aynı fotoğraf farklı ofislerde farklı boyut/klasör yoluyla sunulabilir
+        tokens.add(f"img:{posixpath.basename(urlparse(image_url).path)}")
+    return tokens
+
+def minhash(tokens: Set[str]) -> Optional[np.ndarray]:
+    """Öğe kümesinin NUM_PERM uzunluğunda MinHash imzası (uint32)"""
+    if not tokens:
+        return None
+    hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens))
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+    return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+def band_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """İmzanın her bandı için (bant, 64 bit işaretli özet) çiftleri"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+def signature_similarity(first: bytes, second: bytes) -> float:
+    """İki imzanın eşit bileşen oranı; Jaccard benzerliğinin tahmini"""
+    return float(np.mean(np.frombuffer(first, dtype=np.uint32) == np.frombuffer(second, dtype=np.uint32)))
+
+def _compatible(prop, candidate) -> bool:
+    """Başlıkları benzese de oda/ilçe/m² uyuşmayan ilanlar eşlenmez"""
+    if prop.room_count is not None and candidate.room_count is not None and prop.room_count != candidate.room_count:
+        return False
+    if prop.district_id is not None and candidate.district_id is not None and prop.district_id != candidate.district_id:
+        return False
+    if prop.size and candidate.size:
+        return abs(prop.size - candidate.size) <= SIZE_TOLERANCE * max(prop.size, candidate.size)
+    return True
+
+def _detach(db: Session, property_id: int, cluster_id: int) -> None:
+    """İmzası değişen ilanı kümesinden ayırır; küme etiketi bu ilansa kalanlar yeniden etiketlenir"""
+    if cluster_id != property_id:
+        return
+    remaining = db.execute(
+        select(func.min(ListingSignature.property_id)).where(
+            ListingSignature.cluster_id == cluster_id,
+            ListingSignature.property_id != property_id
+        )
+    ).scalar()
+    if remaining is not None:
+        db.execute(update(ListingSignature).where(
+            ListingSignature.cluster_id == cluster_id,
+            ListingSignature.property_id != property_id
+        ).values(cluster_id=remaining))
+
+def index_listing(db: Session, prop, image_url: Optional[str] = None) -> Optional[int]:
+    """İlanın imzasını LSH indeksine yazar ve mükerrer kümesini belirler.
+
+    Adaylar sadece aynı bant özetine düşen ilanlardır (tablo taranmaz);
+    eşleşen kümeler tek kümede birleştirilir. Commit çağırana aittir.
+    Dönen değer ilanın küme id'sidir.
+    """
+    signature = minhash(listing_tokens(prop, image_url))
+    if signature is None:
+        return None
+    signature_bytes = signature.tobytes()
+
+    existing = db.execute(
+        select(ListingSignature.signature, ListingSignature.cluster_id).where(ListingSignature.property_id == prop.id)
+    ).first()
+    if existing is not None:
+        if existing.signature == signature_bytes:
+            return existing.cluster_id
+        _detach(db, prop.id, existing.cluster_id)
+        db.execute(delete(listing_lsh_buckets).where(listing_lsh_buckets.c.property_id == prop.id))
+
+    buckets = band_buckets(signature)
+    candidate_ids = db.execute(
+        select(listing_lsh_buckets.c.property_id).where(
+            or_(*[and_(listing_lsh_buckets.c.band == band, listing_lsh_buckets.c.bucket == bucket) for band, bucket in buckets]),
+            listing_lsh_buckets.c.property_id != prop.id
+        ).distinct().limit(MAX_CANDIDATES)
+    ).scalars().all()
+
+    matched_clusters = set()
+    if candidate_ids:
+        candidates = db.execute(
+            select(
+                ListingSignature.signature, ListingSignature.cluster_id,
+                Property.room_count, Property.district_id, Property.size
+            ).join(Property, Property.id == ListingSignature.property_id).where(
+                ListingSignature.property_id.in_(candidate_ids)
+            )
+        ).all()
+        for candidate in candidates:
+            if _compatible(prop, candidate) and signature_similarity(signature_bytes, candidate.signature) >= DUPLICATE_THRESHOLD:
+                matched_clusters.add(candidate.cluster_id)
+
+    cluster_id = min(matched_clusters | {prop.id})
+    if matched_clusters - {cluster_id}:
+        db.execute(update(ListingSignature).where(
+            ListingSignature.cluster_id.in_(matched_clusters - {cluster_id})
+        ).values(cluster_id=cluster_id))
+
+    values = {'signature': signature_bytes, 'cluster_id': cluster_id, 'updated_at': datetime.utcnow()}
+    if existing is not None:
+        db.execute(update(ListingSignature).where(ListingSignature.property_id == prop.id).values(**values))
+    else:
+        db.execute(insert(ListingSignature).values(property_id=prop.id, **values))
+    db.execute(insert(listing_lsh_buckets), [
+        {'band': band, 'bucket': bucket, 'property_id': prop.id} for band, bucket in buckets
+    ])
+    return cluster_id
+
+class DuplicateIndex:
+    """Ingestion sırasında eklenen/değişen ilanları toplar, commit öncesi LSH indeksine yazar"""
+
+    def __init__(self):
+        self.pending: List[Tuple[Any, Optional[str]]] = []
+
+    def add(self, prop, image_url: Optional[str] = None) -> None:
+        self.pending.append((prop, image_url))
+
+    def flush(self, db: Session) -> None:
+        if not self.pending:
+            return
+        # Yeni ilanların id'leri için
+        db.flush()
+        for prop, image_url in self.pending:
+            index_listing(db, prop, image_url)
+        self.pending.clear()
+
+def remove_from_index(db: Session, property_ids: List[int]) -> None:
+    """Arşive taşınan ilanların imza ve kova kayıtlarını siler (commit çağırana aittir)"""
+    rows = db.execute(
+        select(ListingSignature.property_id, ListingSignature.cluster_id).where(ListingSignature.property_id.in_(property_ids))
+    ).all()
+    for row in rows:
+        _detach(db, row.property_id, row.cluster_id)
+    db.execute(delete(listing_lsh_buckets).where(listing_lsh_buckets.c.property_id.in_(property_ids)))
+    db.execute(delete(ListingSignature.__table__).where(ListingSignature.property_id.in_(property_ids)))
+
+def rebuild_duplicate_index(db: Session, batch_size: int = 500) -> int:
+    """Tüm ilanları id sırasıyla indekse ekler (ilk kurulum); her parti commit edilir"""
+    indexed = 0
+    last_id = 0
+    while True:
+        properties = db.query(Property).filter(Property.id > last_id).order_by(Property.id).limit(batch_size).all()
+        if not properties:
+            break
+        last_id = properties[-1].id
+        images = dict(db.query(PropertyImage.property_id, PropertyImage.url).filter(
+            PropertyImage.property_id.in_([prop.id for prop in properties]),
+            PropertyImage.is_primary.is_(True)
+        ).all())
+        for prop in properties:
+            if index_listing(db, prop, images.get(prop.id)) is not None:
+                indexed += 1
+        db.commit()
+    logger.info(f"Mükerrer ilan indeksi oluşturuldu: {indexed} ilan")
+    return indexed
+
+def _member_to_dict(row) -> Dict[str, Any]:
+    return {
+        'id': row.id,
+        'url': row.url,
+        'title': row.title,
+        'price': row.price,
+        'currency': row.currency,
+        'location': row.location,
+        'size': row.size,
+        'room_count': format_room_count(row.room_count, row.living_room_count),
+        'seller': row.company,
+        'first_seen_at': row.first_seen_at,
+    }
+
+def _live_members(db: Session):
+    return db.query(
+        Property.id, Property.url, Property.title, Property.price, Property.currency,
+        Property.location, Property.size, Property.room_count, Property.living_room_count,
+        Property.first_seen_at, Seller.company, ListingSignature.cluster_id, ListingSignature.signature
+    ).join(
+        ListingSignature, ListingSignature.property_id == Property.id
+    ).outerjoin(
+        Seller, Seller.id == Property.seller_id
+    ).filter(Property.delisted_at.is_(None))
+
+def duplicate_clusters(db: Session, skip: int = 0, limit: int = 50, min_size: int = 2) -> Dict[str, Any]:
+    """Yayındaki mükerrer ilan kümeleri, büyükten küçüğe"""
+    sizes = db.query(
+        ListingSignature.cluster_id, func.count().label('size')
+    ).join(
+        Property, Property.id == ListingSignature.property_id
+    ).filter(
+        Property.delisted_at.is_(None)
+    ).group_by(ListingSignature.cluster_id).having(func.count() >= max(min_size, 2))
+
+    total = sizes.count()
+    clusters = sizes.order_by(func.count().desc(), ListingSignature.cluster_id).offset(skip).limit(limit).all()
+    members: Dict[int, List[Dict[str, Any]]] = {cluster.cluster_id: [] for cluster in clusters}
+    if members:
+        for row in _live_members(db).filter(ListingSignature.cluster_id.in_(list(members))).order_by(Property.id):
+            members[row.cluster_id].append(_member_to_dict(row))
+    return {
+        'total': total,
+        'items': [
+            {'cluster_id': cluster.cluster_id, 'size': cluster.size, 'listings': members[cluster.cluster_id]}
+            for cluster in clusters
+        ],
+    }
+
+def listing_duplicates(db: Session, property_id: int) -> Optional[Dict[str, Any]]:
+    """İlanın kümesindeki diğer yayındaki ilanlar ve imza benzerlikleri; ilan indekste yoksa None"""
+    own = db.query(ListingSignature).filter_by(property_id=property_id).first()
+    if own is None:
+        return None
+    rows = _live_members(db).filter(
+        ListingSignature.cluster_id == own.cluster_id,
+        Property.id != property_id
+    ).order_by(Property.id).all()
+    duplicates = [
+        {**_member_to_dict(row), 'similarity': round(signature_similarity(own.signature, row.signature), 3)}
+        for row in rows
+    ]
+    duplicates.sort(key=lambda item: -item['similarity'])
+    return {'property_id': property_id, 'cluster_id': own.cluster_id, 'duplicates': duplicates}
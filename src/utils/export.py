@@ -0,0 +1,146 @@
+from typing import Any, Callable, Dict, Iterator, List
+from datetime import datetime
+from enum import Enum
+from sqlalchemy.orm import Query, Session
+from ..models.database import Property
+from .serialization import dumps
+import csv
+import io
+import logging
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow opsiyonel; yoksa Parquet formatı kullanılamaz
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Sunucu tarafı cursor'dan her seferde çekilen satır sayısı
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    Property.id, Property.url, Property.title, Property.price, Property.currency,
+    Property.location, Property.status, Property.property_type, Property.size,
+    Property.room_count, Property.living_room_count, Property.floor, Property.building_age,
+    Property.province_id, Property.district_id, Property.neighborhood_id, Property.seller_id,
+    Property.latitude, Property.longitude,
+    Property.created_at, Property.first_seen_at, Property.last_seen_at
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',  # Starlette charset=utf-8 ekler
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+def parquet_schema():
+    """Parquet dosyasının sabit şeması; tüm row group'lar aynı tipleri kullanır"""
+    types = {
+        'id': pyarrow.int64(), 'url': pyarrow.string(), 'title': pyarrow.string(),
+        'price': pyarrow.float64(), 'currency': pyarrow.string(), 'location': pyarrow.string(),
+        'status': pyarrow.string(), 'property_type': pyarrow.string(), 'size': pyarrow.float64(),
+        'latitude': pyarrow.float64(), 'longitude': pyarrow.float64(),
+        'created_at': pyarrow.timestamp('us'), 'first_seen_at': pyarrow.timestamp('us'),
+        'last_seen_at': pyarrow.timestamp('us'),
+    }
+    return pyarrow.schema([(field, types.get(field, pyarrow.int64())) for field in EXPORT_FIELDS])
+
+def export_formats() -> List[str]:
+    """Kurulu paketlere göre kullanılabilir dışa aktarma formatları"""
+    return [name for name in EXPORT_MEDIA_TYPES if name != 'parquet' or pyarrow is not None]
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def iter_export_rows(query: Query) -> Iterator[List[Dict[str, Any]]]:
+    """Sorgu sonucunu sunucu tarafı cursor ile EXPORT_CHUNK_SIZE'lık dict listeleri halinde verir"""
+    query = query.with_entities(*EXPORT_COLUMNS).order_by(Property.id).execution_options(
+        stream_results=True, yield_per=EXPORT_CHUNK_SIZE
+    )
+    chunk = []
+    for row in query:
+        chunk.append({field: _plain(value) for field, value in zip(EXPORT_FIELDS, row)})
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _ndjson(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield b''.join(dumps(row) + b'\n' for row in chunk)
+
+def _csv(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow({k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()})
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+class _ChunkSink(io.RawIOBase):
+    """ParquetWriter'ın yazdığı byte'ları biriktirip parça parça akıtmak için dosya benzeri nesne"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+def _parquet(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    schema = parquet_schema()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    for chunk in chunks:
+        # Her parça ayrı bir row group olarak yazılır ve hemen gönderilir
+        writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+EXPORT_WRITERS: Dict[str, Callable[[Iterator[List[Dict[str, Any]]]], Iterator[bytes]]] = {
+    'ndjson': _ndjson,
+    'csv': _csv,
+    'parquet': _parquet,
+}
+
+def stream_export(session_factory: Callable[[], Session], build_query: Callable[[Session], Query], fmt: str) -> Iterator[bytes]:
+    """Sorguyu kendi session'ıyla akıtır; bellek kullanımı parça boyutuyla sınırlı kalır.
+
+    Senkron generator olduğu için Starlette her parçayı istemci okudukça
+    thread pool'da üretir; yavaş istemci sorgunun ilerlemesini de yavaşlatır.
+    """
+    db = session_factory()
+    try:
+        total = 0
+        for data in EXPORT_WRITERS[fmt](iter_export_rows(build_query(db))):
+            if data:
+                yield data
+                total += len(data)
+        logger.info(f"Dışa aktarma tamamlandı: {fmt}, {total} byte")
+    finally:
+        db.close()
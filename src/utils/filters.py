@@ -0,0 +1,179 @@
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Query as QueryParam
+from sqlalchemy.orm import Query, Session
+from ..models.database import Property, PropertyFacetCount
+from ..models.schemas import PropertyStatus, PropertyCategory
+from .normalizer import parse_room_filter
+from .search import apply_keyword_search
+from .locations import location_ids_query, PROVINCE, DISTRICT, NEIGHBORHOOD
+from .geo import MAX_RADIUS_KM, parse_bbox, apply_bbox, apply_radius
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FilterError(ValueError):
+    """Geçersiz filtre değeri; endpoint'ler 400 olarak döndürür"""
+
+def property_filters(
+    local_kw: str = QueryParam('', description="Keyword searched in title and description"),
+    min_price: Optional[float] = QueryParam(None, description="Minimum price"),
+    max_price: Optional[float] = QueryParam(None, description="Maximum price"),
+    category: str = QueryParam('', description="Property category (konut, arsa, isyeri)"),
+    province: str = QueryParam('', description="Province (il)"),
+    district: str = QueryParam('', description="District (ilçe)"),
+    neighborhood: str = QueryParam('', description="Neighborhood (mahalle)"),
+    status: str = QueryParam('', description="Property status (satilik/kiralik)"),
+    room_count: str = QueryParam('', description="Room count, e.g. 3+1 or 3"),
+    min_size: Optional[float] = QueryParam(None, description="Minimum size (m²)"),
+    max_size: Optional[float] = QueryParam(None, description="Maximum size (m²)"),
+    min_floor: Optional[int] = QueryParam(None, description="Minimum floor (ground 0, basement negative)"),
+    max_floor: Optional[int] = QueryParam(None, description="Maximum floor"),
+    max_building_age: Optional[int] = QueryParam(None, description="Maximum building age"),
+    currency: str = QueryParam('', description="Currency code (TRY, USD, EUR)"),
+    seller_id: Optional[int] = QueryParam(None, description="Seller (real estate agency) id from /sellers"),
+    bbox: str = QueryParam('', description="Map viewport as min_lon,min_lat,max_lon,max_lat"),
+    lat: Optional[float] = QueryParam(None, description="Latitude of the radius search center"),
+    lon: Optional[float] = QueryParam(None, description="Longitude of the radius search center"),
+    radius_km: Optional[float] = QueryParam(None, description=f"Radius search distance in km (max {MAX_RADIUS_KM})"),
+) -> Dict[str, Any]:
+    """/properties ve /export için ortak filtre parametreleri (FastAPI dependency)"""
+    return {
+        'local_kw': local_kw, 'min_price': min_price, 'max_price': max_price,
+        'category': category, 'province': province, 'district': district,
+        'neighborhood': neighborhood, 'status': status, 'room_count': room_count,
+        'min_size': min_size, 'max_size': max_size, 'min_floor': min_floor,
+        'max_floor': max_floor, 'max_building_age': max_building_age, 'currency': currency,
+        'seller_id': seller_id, 'bbox': bbox, 'lat': lat, 'lon': lon, 'radius_km': radius_km
+    }
+
+def normalize_category(category: str) -> str:
+    """Frontend'den gelen kategori değerini enum değerine çevirir ('is-yeri' -> 'isyeri')"""
+    if category not in {c.value for c in PropertyCategory}:
+        return category.replace('-', '')
+    return category
+
+def apply_property_filters(db: Session, query: Query, filters: Dict[str, Any], ranked: bool = True) -> Tuple[Query, list]:
+    """Filtreleri ilan sorgusuna uygular; facet sayaç tablosu için eşdeğer koşulları da döndürür.
+
+    Geçersiz değerlerde FilterError fırlatır.
+    """
+    facet_conditions = []
+
+    # Tam metin arama (başlık + açıklama); ranked=False ise sıralama çağırana kalır
+    if filters.get('local_kw'):
+        query = apply_keyword_search(query, filters['local_kw'], ranked=ranked)
+
+    min_price, max_price = filters.get('min_price'), filters.get('max_price')
+    if min_price is not None:
+        query = query.filter(Property.price >= min_price)
+
+    if max_price is not None:
+        if min_price is not None and max_price < min_price:
+            raise FilterError("Maximum price cannot be less than minimum price")
+        query = query.filter(Property.price <= max_price)
+
+    if filters.get('currency'):
+        query = query.filter(Property.currency == filters['currency'].upper())
+
+    # Satıcı filtresi (indeksli seller_id)
+    if filters.get('seller_id') is not None:
+        query = query.filter(Property.seller_id == filters['seller_id'])
+
+    # Konum filtreleri: harita kutusu ve/veya merkez + yarıçap (sadece koordinatı olan ilanlar)
+    if filters.get('bbox'):
+        try:
+            query = apply_bbox(query, *parse_bbox(filters['bbox']))
+        except ValueError as e:
+            raise FilterError(str(e))
+
+    radius = (filters.get('lat'), filters.get('lon'), filters.get('radius_km'))
+    if any(value is not None for value in radius):
+        lat, lon, radius_km = radius
+        if None in radius:
+            raise FilterError("Radius search requires lat, lon and radius_km together")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise FilterError(f"Invalid coordinates: {lat},{lon}")
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise FilterError(f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+        query = apply_radius(query, lat, lon, radius_km)
+
+    # Oda filtresi ('3+1' -> oda=3, salon=1; '3' -> sadece oda)
+    room_count = filters.get('room_count')
+    if room_count:
+        rooms, living_rooms = parse_room_filter(room_count)
+        if rooms is None:
+            raise FilterError(f"Invalid room count: {room_count}")
+        query = query.filter(Property.room_count == rooms)
+        if living_rooms is not None:
+            query = query.filter(Property.living_room_count == living_rooms)
+
+    # Metrekare filtresi
+    min_size, max_size = filters.get('min_size'), filters.get('max_size')
+    if min_size is not None:
+        query = query.filter(Property.size >= min_size)
+
+    if max_size is not None:
+        if min_size is not None and max_size < min_size:
+            raise FilterError("Maximum size cannot be less than minimum size")
+        query = query.filter(Property.size <= max_size)
+
+    # Kat filtresi
+    if filters.get('min_floor') is not None:
+        query = query.filter(Property.floor >= filters['min_floor'])
+
+    if filters.get('max_floor') is not None:
+        query = query.filter(Property.floor <= filters['max_floor'])
+
+    # Bina yaşı filtresi
+    if filters.get('max_building_age') is not None:
+        query = query.filter(Property.building_age <= filters['max_building_age'])
+
+    # Kategori filtresi
+    category = filters.get('category')
+    if category:
+        logger.info(f"Filtering by category: {category}")
+        normalized_category = normalize_category(category)
+        try:
+            query = query.filter(Property.property_type == PropertyCategory(normalized_category))
+            facet_conditions.append(PropertyFacetCount.property_type == PropertyCategory(normalized_category))
+        except ValueError:
+            raise FilterError(f"Invalid category: {category}")
+        logger.info(f"Normalized category: {normalized_category}")
+
+    # Lokasyon filtreleri locations tablosundaki id'ler üzerinden eşitlikle çalışır
+    province_ids = None
+    district_ids = None
+
+    # İl filtresi
+    if filters.get('province'):
+        province_ids = location_ids_query(db, PROVINCE, filters['province'])
+        query = query.filter(Property.province_id.in_(province_ids))
+        facet_conditions.append(PropertyFacetCount.province_id.in_(province_ids))
+
+    # İlçe filtresi
+    district = filters.get('district')
+    if district:
+        logger.info(f"Filtering by district: {district}")
+        # URL'den gelen ilçe adını temizle (örn: "beykoz-satilik" -> "beykoz")
+        clean_district = district.split('-')[0] if '-' in district else district
+        district_ids = location_ids_query(db, DISTRICT, clean_district, province_ids)
+        query = query.filter(Property.district_id.in_(district_ids))
+        facet_conditions.append(PropertyFacetCount.district_id.in_(district_ids))
+        logger.info(f"Clean district name: {clean_district}")
+
+    # Durum filtresi (satilik/kiralik)
+    status = filters.get('status')
+    if status:
+        logger.info(f"Filtering by status: {status}")
+        try:
+            query = query.filter(Property.status == PropertyStatus(status))
+            facet_conditions.append(PropertyFacetCount.status == PropertyStatus(status))
+        except ValueError:
+            raise FilterError(f"Invalid status: {status}")
+
+    # Mahalle filtresi
+    if filters.get('neighborhood'):
+        neighborhood_ids = location_ids_query(db, NEIGHBORHOOD, filters['neighborhood'], district_ids)
+        query = query.filter(Property.neighborhood_id.in_(neighborhood_ids))
+
+    return query, facet_conditions
@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text, table, column, select, or_
+from sqlalchemy.orm import Query
+from ..models.database import Property
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+GEO_RTREE = 'property_geo_rtree'
+
+property_geo_rtree = table(GEO_RTREE, column('id'), column('min_lat'), column('max_lat'), column('min_lon'), column('max_lon'))
+
+# 9 karakter ~5 m hassasiyet; sorgular daha kısa önekler kullanır
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Bir kutu sorgusunda kullanılan en fazla geohash öneki
+MAX_COVER_CELLS = 16
+KM_PER_DEGREE = 111.32
+MAX_RADIUS_KM = 100
+
+# Koordinat değiştikçe R*Tree'yi güncel tutan tetikleyiciler (koordinatı olmayan ilanlar indekse girmez)
+SQLITE_RTREE_SETUP = [
+    f"CREATE VIRTUAL TABLE {GEO_RTREE} USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_geo_ai AFTER INSERT ON properties
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO {GEO_RTREE} VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_geo_ad AFTER DELETE ON properties BEGIN
+        DELETE FROM {GEO_RTREE} WHERE id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_geo_au AFTER UPDATE OF latitude, longitude ON properties BEGIN
+        DELETE FROM {GEO_RTREE} WHERE id = old.id;
+        INSERT INTO {GEO_RTREE} SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END""",
+    # Mevcut koordinatları indekse yükle
+    f"""INSERT INTO {GEO_RTREE} SELECT id, latitude, latitude, longitude, longitude FROM properties
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL""",
+]
+
+# LIKE 'önek%' sorguları için; collation'dan bağımsız önek taraması
+POSTGRES_GEOHASH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_properties_geohash ON properties (geohash text_pattern_ops)"
+)
+
+def setup_geo_index(connection) -> None:
+    """Veritabanına göre konum indexini oluşturur (SQLite: R*Tree, PostgreSQL: geohash B-tree)"""
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': GEO_RTREE}
+        ).first()
+        if exists:
+            return
+        for statement in SQLITE_RTREE_SETUP:
+            connection.execute(text(statement))
+        logger.info("R*Tree konum tablosu oluşturuldu")
+
+    elif dialect == 'postgresql':
+        connection.execute(text(POSTGRES_GEOHASH_INDEX))
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Enlem/boylamı geohash'e çevirir; ortak önek yakınlık anlamına gelir"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """Verilen hassasiyetteki geohash hücresinin (enlem, boylam) derece boyutu"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def geohash_cover(south: float, west: float, north: float, east: float) -> List[str]:
+    """Kutuyu kaplayan en uzun geohash önekleri (en fazla MAX_COVER_CELLS); kutu çok büyükse boş liste"""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lon = _cell_size(precision)
+        rows = math.floor(north / cell_lat) - math.floor(south / cell_lat) + 1
+        cols = math.floor(east / cell_lon) - math.floor(west / cell_lon) + 1
+        if rows * cols > MAX_COVER_CELLS:
+            continue
+        cells = set()
+        for row in range(rows):
+            lat = min(south + row * cell_lat, north)
+            for col in range(cols):
+                lon = min(west + col * cell_lon, east)
+                cells.add(encode_geohash(lat, lon, precision))
+        # Hücre sınırına denk gelen köşeler adımlamada atlanmasın
+        cells.update(encode_geohash(lat, lon, precision) for lat in (south, north) for lon in (west, east))
+        return sorted(cells)
+    return []
+
+def coordinate_values(location: Optional[Tuple[float, float]]) -> Dict[str, Any]:
+    """Koordinat kolonlarının değerleri (SQLite'ta R*Tree tetikleyicilerle güncellenir)"""
+    if location is None:
+        return {'latitude': None, 'longitude': None, 'geohash': None}
+    lat, lon = location
+    return {'latitude': lat, 'longitude': lon, 'geohash': encode_geohash(lat, lon)}
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """'min_lon,min_lat,max_lon,max_lat' (harita kütüphanelerinin sırası) -> (güney, batı, kuzey, doğu)"""
+    try:
+        west, south, east, north = (float(part) for part in bbox.split(','))
+    except ValueError:
+        raise ValueError(f"Invalid bbox: {bbox} (expected min_lon,min_lat,max_lon,max_lat)")
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        raise ValueError(f"Invalid bbox: {bbox}")
+    return south, west, north, east
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Merkez ve yarıçapı kaplayan (güney, batı, kuzey, doğu) kutusu"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return max(lat - lat_delta, -90.0), max(lon - lon_delta, -180.0), min(lat + lat_delta, 90.0), min(lon + lon_delta, 180.0)
+
+def apply_bbox(query: Query, south: float, west: float, north: float, east: float) -> Query:
+    """Sorguyu kutu içindeki ilanlarla sınırlar; konum indexi veritabanına göre seçilir"""
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # R*Tree kutuları 32 bit float ile dışa yuvarlar; kesin sınır aşağıdaki koşulla uygulanır
+        matches = select(property_geo_rtree.c.id).where(
+            property_geo_rtree.c.max_lat >= south,
+            property_geo_rtree.c.min_lat <= north,
+            property_geo_rtree.c.max_lon >= west,
+            property_geo_rtree.c.min_lon <= east
+        )
+        query = query.filter(Property.id.in_(matches))
+
+    elif dialect == 'postgresql':
+        prefixes = geohash_cover(south, west, north, east)
+        if prefixes:
+            query = query.filter(or_(*[Property.geohash.like(f'{prefix}%') for prefix in prefixes]))
+
+    return query.filter(
+        Property.latitude.between(south, north),
+        Property.longitude.between(west, east)
+    )
+
+def apply_radius(query: Query, lat: float, lon: float, radius_km: float) -> Query:
+    """Merkeze radius_km mesafedeki ilanlar; şehir ölçeğinde eşdikdörtgen yaklaşımı yeterince doğrudur"""
+    query = apply_bbox(query, *radius_bbox(lat, lon, radius_km))
+    lat_km = (Property.latitude - lat) * KM_PER_DEGREE
+    lon_km = (Property.longitude - lon) * (KM_PER_DEGREE * math.cos(math.radians(lat)))
+    return query.filter(lat_km * lat_km + lon_km * lon_km <= radius_km * radius_km)
@@ -0,0 +1,312 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from ..models.database import Property, Feature, PropertyImage, PropertyRawData
+from ..models.schemas import PropertyStatus
+from .url_builder import classify_listing_url, listing_category
+from .normalizer import normalize_listing
+from .search import build_search_text
+from .counts import FacetCounter, facet_key
+from .locations import LocationResolver, LocationCounter, location_path_ids
+from .lifecycle import mark_seen, sweep_delisted
+from .raw_store import raw_codec, raw_data_hash
+from .sellers import SellerResolver, SellerCounter
+from .analytics import MarketCounter, market_snapshot
+from .dedup import DuplicateIndex
+from .alerts import SavedSearchMatcher, listing_facts
+from .result_cache import listing_tags
+from .metrics import UPSERT_BATCH_SECONDS, INGEST_ROWS
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+def save_listings(
+    db: Session,
+    listings: List[Dict[str, Any]],
+    property_type: str,
+    status: Optional[PropertyStatus],
+    search_url: str,
+    seen_at: datetime,
+    sweep: bool = False,
+    replay: bool = False,
+    on_commit: Optional[Callable[[Set[Tuple[str, str]]], None]] = None
+) -> Dict[str, int]:
+    """Parse edilmiş ilan kartlarını kaydeder veya günceller; canlı tarama ve arşivden yeniden çıkarımın ortak yolu.
+
+    Sayaçlar (facet, lokasyon, emlak ofisi, piyasa) her commit ile birlikte yazılır,
+    commit sonrası on_commit etkilenen (ilçe, kategori) etiketleriyle çağrılır.
+    sweep=True ise bu aramada görülmeyen ilanlar yayından kalkmış sayılır
+    (sadece hatasız kayıtta). replay=True arşivlenmiş eski sayfalar içindir:
+    görülme zamanları ilerletilmez ve yayından kalkmış ilanlar tekrar yayına
+    alınmaz.
+    """
+    # Önce tüm özellikleri topla
+    all_features = set()
+    for listing_data in listings:
+        if 'ozellikler' in listing_data:
+            all_features.update(listing_data['ozellikler'])
+
+    # Özellikleri kaydet veya var olanları bul
+    feature_dict = {}
+    for feature_name in all_features:
+        feature = db.query(Feature).filter_by(name=feature_name).first()
+        if not feature:
+            feature = Feature(name=feature_name)
+            db.add(feature)
+
+    # Commit features first
+    try:
+        db.commit()
+    except Exception as e:
+        logger.error(f"Feature commit hatası: {str(e)}")
+        db.rollback()
+        raise
+
+    # Refresh feature dictionary after commit
+    for feature_name in all_features:
+        feature = db.query(Feature).filter_by(name=feature_name).first()
+        feature_dict[feature_name] = feature
+
+    # Ham veri sıkıştırma sözlükleri
+    raw_codec.load(db)
+
+    # Konumları il/ilçe/mahalle kayıtlarına eşlemek için
+    location_resolver = LocationResolver(db)
+    # Facet sayaç değişiklikleri commit'lerle birlikte yazılır
+    facet_counter = FacetCounter()
+    # Lokasyon ağacındaki ilan sayıları da aynı commit'lerle güncellenir
+    location_counter = LocationCounter()
+    # Emlak ofisleri profil URL'ine göre tekilleştirilip toplu eklenir
+    seller_resolver = SellerResolver(db)
+    seller_resolver.preload(listings)
+    seller_counter = SellerCounter()
+    # Piyasa istatistiklerinin sayı ve toplamları da aynı commit'lerle güncellenir
+    market_counter = MarketCounter()
+    # Yeni/değişen ilanların MinHash imzaları commit öncesi LSH indeksine yazılır
+    duplicate_index = DuplicateIndex()
+    # Yeni/değişen ilanlar kayıtlı aramalarla eşleştirilir; arşivden yeniden çıkarımda bildirim üretilmez
+    alert_matcher = None if replay else SavedSearchMatcher.for_session(db)
+    # Yazılan ilanların (ilçe, kategori) etiketleri; commit sonrası ilgili sonuç önbelleği silinir
+    touched_tags = set()
+
+    # Save or update listings
+    total_new = 0
+    total_updated = 0
+    total_unchanged = 0
+    total_failed = 0
+    # Görülen mevcut ilanlar; last_seen_at tek seferde toplu güncellenir
+    seen_ids = []
+    # Commit grubu süresi metriği; her commit'ten sonra yeniden başlar
+    batch_metric = UPSERT_BATCH_SECONDS.labels(mode='replay' if replay else 'scrape')
+    batch_started = time.perf_counter()
+
+    for listing_data in listings:
+        try:
+            # Kategori, yeniden sınıflandırma ile aynı kuralla ilan URL'inden belirlenir
+            listing_type = listing_category(listing_data['url'], property_type)
+
+            # Ham veri değişimi özet üzerinden anlaşılır; mevcut ham veri yüklenmez
+            raw_hash = raw_data_hash(listing_data)
+
+            # URL'e göre mevcut ilanı kontrol et
+            existing_property = db.query(Property).filter_by(url=listing_data['url']).first()
+
+            # Kart metinlerini tipli kolonlara dönüştür (fiyat, m², oda, kat, yaş)
+            attributes = normalize_listing(listing_data)
+            attributes.update(location_resolver.resolve(listing_data.get('konum')))
+            attributes['status'] = status or classify_listing_url(listing_data['url'])[0]
+            attributes['seller_id'] = seller_resolver.resolve(listing_data)
+            attributes['search_text'] = build_search_text(listing_data.get('baslik'), listing_data.get('description'))
+            if attributes['price'] is None:
+                logger.error(f"Fiyat dönüştürme hatası: {listing_data.get('fiyat')}")
+
+            if existing_property:
+                # İlan varsa, güncelleme gerekiyor mu kontrol et
+                needs_update = False
+                old_facet = facet_key(existing_property)
+                old_locations = location_path_ids(existing_property)
+                old_seller = existing_property.seller_id
+                old_market = market_snapshot(existing_property)
+                old_facts = listing_facts(existing_property) if alert_matcher else None
+                old_tags = listing_tags(existing_property.location, existing_property.property_type)
+                was_delisted = existing_property.delisted_at is not None
+                if not replay:
+                    seen_ids.append(existing_property.id)
+
+                # Fiyat veya tipli özellikler değişmiş mi?
+                for column, value in attributes.items():
+                    if getattr(existing_property, column) != value:
+                        needs_update = True
+                        setattr(existing_property, column, value)
+
+                # Başlık değişmiş mi?
+                if existing_property.title != listing_data.get('baslik'):
+                    needs_update = True
+                    existing_property.title = listing_data.get('baslik', '')
+
+                # Konum değişmiş mi?
+                if existing_property.location != listing_data.get('konum'):
+                    needs_update = True
+                    existing_property.location = listing_data.get('konum', '')
+
+                # Property type değişmiş mi?
+                if existing_property.property_type != listing_type:
+                    needs_update = True
+                    existing_property.property_type = listing_type
+
+                # Raw data değişmiş mi?
+                if existing_property.raw_hash != raw_hash:
+                    needs_update = True
+                    existing_property.raw_hash = raw_hash
+                    if existing_property.raw_record is not None:
+                        existing_property.raw_record.data = raw_codec.encode(listing_data)
+                    else:
+                        existing_property.raw_record = PropertyRawData(data=raw_codec.encode(listing_data))
+
+                if needs_update:
+                    # Özellikleri güncelle
+                    existing_property.features.clear()
+                    if 'ozellikler' in listing_data:
+                        for feature_name in listing_data['ozellikler']:
+                            if feature_name in feature_dict:
+                                existing_property.features.append(feature_dict[feature_name])
+
+                    # Resimleri güncelle
+                    existing_property.images.clear()
+                    if listing_data.get('resim'):
+                        image = PropertyImage(
+                            url=listing_data['resim'],
+                            is_primary=True
+                        )
+                        existing_property.images.append(image)
+
+                    existing_property.updated_at = datetime.now()
+                    db.add(existing_property)
+                    if not was_delisted:
+                        facet_counter.move(old_facet, facet_key(existing_property))
+                        location_counter.move(old_locations, location_path_ids(existing_property))
+                        seller_counter.move([old_seller], [existing_property.seller_id])
+                    # Aylık geçmiş yayından kalkmış ilanlar için de güncel tutulur
+                    market_counter.move(old_market, market_snapshot(existing_property), live=not was_delisted)
+                    duplicate_index.add(existing_property, listing_data.get('resim'))
+                    if alert_matcher:
+                        alert_matcher.listing_saved(existing_property, old_facts)
+                    touched_tags.add(old_tags)
+                    touched_tags.add(listing_tags(existing_property.location, existing_property.property_type))
+                    total_updated += 1
+                    logger.info(f"İlan güncellendi: {listing_data['url']}")
+                else:
+                    total_unchanged += 1
+                    logger.info(f"İlan değişmemiş: {listing_data['url']}")
+
+                # Yayından kalkmış ilan tekrar görüldüyse canlı envantere geri döner
+                if was_delisted and not replay:
+                    existing_property.delisted_at = None
+                    facet_counter.add(facet_key(existing_property), 1)
+                    location_counter.add(location_path_ids(existing_property), 1)
+                    seller_counter.add([existing_property.seller_id], 1)
+                    market_counter.add(market_snapshot(existing_property), 1, history=False)
+                    touched_tags.add(listing_tags(existing_property.location, existing_property.property_type))
+                    logger.info(f"İlan tekrar yayında: {listing_data['url']}")
+
+            else:
+                # Yeni ilan oluştur
+                new_property = Property(
+                    url=listing_data['url'],
+                    title=listing_data.get('baslik', ''),
+                    location=listing_data.get('konum', ''),
+                    property_type=listing_type,  # URL'den tespit edilen kategori
+                    raw_hash=raw_hash,
+                    raw_record=PropertyRawData(data=raw_codec.encode(listing_data)),
+                    created_at=seen_at if replay else datetime.now(),
+                    updated_at=datetime.now(),
+                    first_seen_at=seen_at,
+                    last_seen_at=seen_at,
+                    last_search_url=search_url,
+                    **attributes
+                )
+
+                logger.info(f"Yeni ilan ekleniyor - URL: {listing_data['url']}, Type: {listing_type.value}")
+
+                # Özellikleri ekle
+                if 'ozellikler' in listing_data:
+                    for feature_name in listing_data['ozellikler']:
+                        if feature_name in feature_dict:
+                            new_property.features.append(feature_dict[feature_name])
+
+                # Resmi ekle
+                if listing_data.get('resim'):
+                    image = PropertyImage(
+                        url=listing_data['resim'],
+                        is_primary=True
+                    )
+                    new_property.images.append(image)
+
+                db.add(new_property)
+                facet_counter.add(facet_key(new_property), 1)
+                location_counter.add(location_path_ids(new_property), 1)
+                seller_counter.add([new_property.seller_id], 1)
+                market_counter.add(market_snapshot(new_property), 1)
+                duplicate_index.add(new_property, listing_data.get('resim'))
+                if alert_matcher:
+                    alert_matcher.listing_saved(new_property)
+                touched_tags.add(listing_tags(new_property.location, new_property.property_type))
+                total_new += 1
+                logger.info(f"Yeni ilan eklendi: {listing_data['url']}")
+
+            # Her 50 işlemde bir commit yap
+            if (total_new + total_updated) % 50 == 0:
+                facet_counter.flush(db)
+                location_counter.flush(db)
+                seller_counter.flush(db)
+                market_counter.flush(db)
+                duplicate_index.flush(db)
+                if alert_matcher:
+                    alert_matcher.flush(db)
+                db.commit()
+                batch_metric.observe(time.perf_counter() - batch_started)
+                batch_started = time.perf_counter()
+                if on_commit is not None:
+                    on_commit(touched_tags)
+                touched_tags.clear()
+                logger.info(f"Ara commit yapıldı. Yeni: {total_new}, Güncellenen: {total_updated}, Değişmeyen: {total_unchanged}")
+
+        except Exception as e:
+            logger.error(f"İlan işlenirken hata: {str(e)}")
+            total_failed += 1
+            continue
+
+    # Final commit
+    try:
+        mark_seen(db, seen_ids, seen_at, search_url)
+        # Eksiksiz ve hatasız taramada görülmeyen ilanlar yayından kalkmış sayılır
+        if sweep and not replay and not total_failed:
+            touched_tags |= sweep_delisted(
+                db, search_url, seen_at, facet_counter, location_counter, seller_counter, market_counter
+            )
+        facet_counter.flush(db)
+        location_counter.flush(db)
+        seller_counter.flush(db)
+        market_counter.flush(db)
+        duplicate_index.flush(db)
+        if alert_matcher:
+            alert_matcher.flush(db)
+        db.commit()
+        batch_metric.observe(time.perf_counter() - batch_started)
+        if on_commit is not None:
+            on_commit(touched_tags)
+        logger.info(f"İşlem tamamlandı. Yeni: {total_new}, Güncellenen: {total_updated}, Değişmeyen: {total_unchanged}")
+    except Exception as e:
+        logger.error(f"Final commit hatası: {str(e)}")
+        db.rollback()
+    
+    totals = {
+        'new': total_new,
+        'updated': total_updated,
+        'unchanged': total_unchanged,
+        'failed': total_failed,
+    }
+    for result, count in totals.items():
+        INGEST_ROWS.labels(mode='replay' if replay else 'scrape', result=result).inc(count)
+    return totals
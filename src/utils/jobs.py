@@ -0,0 +1,191 @@
+from typing import Any, Callable, Dict, Optional
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from ..models.database import Property, BackgroundJob
+from ..models.schemas import PropertyCategory
+from .url_builder import listing_category
+from .counts import rebuild_facet_counts
+from .analytics import refresh_market_stats
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+RECLASSIFY = 'reclassify'
+
+# Çalışan iş her partide updated_at'i yeniler; bu süreden uzun sessiz kalan iş
+# (çöken worker) başka bir worker tarafından devralınabilir
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+
+def job_to_dict(job: BackgroundJob) -> Dict[str, Any]:
+    """İş kaydını ilerleme bilgisiyle birlikte dict'e çevirir"""
+    progress = None
+    if job.total:
+        progress = round(min(job.processed or 0, job.total) / job.total * 100, 1)
+    elif job.status == JOB_COMPLETED:
+        progress = 100.0
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed or 0,
+        'updated': job.updated or 0,
+        'progress': progress,
+        'last_id': job.last_id or 0,
+        'error': job.error,
+        'created_at': job.created_at,
+        'updated_at': job.updated_at,
+        'finished_at': job.finished_at
+    }
+
+def start_or_resume_job(db: Session, kind: str) -> BackgroundJob:
+    """Yarım kalmış işi devam ettirmek üzere döndürür, yoksa yeni iş oluşturur"""
+    job = db.query(BackgroundJob).filter(
+        BackgroundJob.kind == kind,
+        BackgroundJob.status.in_([JOB_PENDING, JOB_RUNNING, JOB_FAILED])
+    ).order_by(BackgroundJob.id.desc()).first()
+
+    if job:
+        logger.info(f"Yarım kalan iş devam ettiriliyor: {job.id} (son id: {job.last_id})")
+    else:
+        job = BackgroundJob(kind=kind, status=JOB_PENDING, last_id=0, processed=0, updated=0)
+        db.add(job)
+
+    # Kalan satır sayısı yerine toplam satır sayısı; ilerleme processed/total olarak raporlanır
+    job.total = db.query(Property.id).count()
+    # Çalışan işin updated_at'i heartbeat'tir; burada yenilenirse çöken iş devralınamaz
+    if job.status != JOB_RUNNING:
+        job.updated_at = datetime.utcnow()
+    db.commit()
+    return job
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+
+def is_job_active(job: BackgroundJob) -> bool:
+    """İş herhangi bir worker'da çalışıyor ve heartbeat'i güncel mi"""
+    return job.status == JOB_RUNNING and job.updated_at is not None and job.updated_at >= _stale_before()
+
+def claim_job(db: Session, job_id: int) -> bool:
+    """İşi veritabanında atomik olarak sahiplenir.
+
+    Koşullu UPDATE sadece çalışmayan (veya heartbeat'i eskimiş) işi
+    running'e çeker; aynı anda sahiplenmeye çalışan worker'lardan yalnızca
+    biri satırı günceller.
+    """
+    claimed = db.query(BackgroundJob).filter(
+        BackgroundJob.id == job_id,
+        BackgroundJob.status != JOB_COMPLETED,
+        or_(BackgroundJob.status != JOB_RUNNING, BackgroundJob.updated_at < _stale_before())
+    ).update(
+        {BackgroundJob.status: JOB_RUNNING, BackgroundJob.error: None, BackgroundJob.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return claimed == 1
+
+def run_reclassify_job(
+    session_factory: Callable[[], Session],
+    job_id: int,
+    batch_size: int = 1000,
+    on_commit: Optional[Callable[[], None]] = None
+) -> None:
+    """İlan kategorilerini id aralıkları halinde yeniden sınıflandırır.
+
+    Her parti sadece id, url ve property_type kolonlarını okur, değişen
+    satırları hedef kategoriye göre gruplayıp tek UPDATE ile yazar ve
+    devam noktasını (last_id) aynı transaction'da kaydeder. Süreç yarıda
+    kesilirse iş son commit edilen partiden devam eder.
+
+    İş önce claim_job ile veritabanında sahiplenilir; başka bir worker işi
+    çalıştırıyorsa çağrı hiçbir şey yapmadan döner. İlerleme yazımı
+    last_id'nin beklenen değerde olmasına bağlıdır; heartbeat'i eskidiği için
+    iş başka worker'a geçtiyse bu worker partiyi geri alıp durur.
+    """
+    db = session_factory()
+    try:
+        if not claim_job(db, job_id):
+            logger.info(f"İş {job_id} başka bir worker'da çalışıyor veya tamamlanmış, atlanıyor")
+            return
+
+        job = db.get(BackgroundJob, job_id)
+        last_id = job.last_id or 0
+        changed_any = False
+        while True:
+            rows = db.query(Property.id, Property.url, Property.property_type).filter(
+                Property.id > last_id
+            ).order_by(Property.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            # Yeni kategoriye göre grupla: her grup için tek UPDATE
+            changes = defaultdict(list)
+            for row in rows:
+                current = row.property_type or PropertyCategory.KONUT
+                new_type = listing_category(row.url or '', current)
+                if new_type != row.property_type:
+                    changes[new_type].append(row.id)
+
+            for new_type, ids in changes.items():
+                db.query(Property).filter(Property.id.in_(ids)).update(
+                    {Property.property_type: new_type}, synchronize_session=False
+                )
+
+            updated = sum(len(ids) for ids in changes.values())
+            owned = db.query(BackgroundJob).filter(
+                BackgroundJob.id == job_id,
+                BackgroundJob.status == JOB_RUNNING,
+                BackgroundJob.last_id == last_id
+            ).update({
+                BackgroundJob.last_id: rows[-1].id,
+                BackgroundJob.processed: func.coalesce(BackgroundJob.processed, 0) + len(rows),
+                BackgroundJob.updated: func.coalesce(BackgroundJob.updated, 0) + updated,
+                BackgroundJob.updated_at: datetime.utcnow()
+            }, synchronize_session=False)
+            if owned != 1:
+                db.rollback()
+                logger.warning(f"İş {job_id} başka bir worker tarafından devralındı, bu worker duruyor")
+                return
+            db.commit()
+            last_id = rows[-1].id
+
+            if updated:
+                changed_any = True
+                logger.info(f"Kategori güncellendi: {updated} ilan (iş {job_id}, son id {last_id})")
+                if on_commit:
+                    on_commit()
+
+        # Facet sayaçları kategoriye bağlı olduğu için set tabanlı olarak yeniden hesaplanır
+        db.refresh(job)
+        if changed_any:
+            rebuild_facet_counts(db.connection(), live_only=True)
+            # Piyasa istatistikleri de kategori bazında tutulur
+            refresh_market_stats(db)
+
+        job.status = JOB_COMPLETED
+        job.finished_at = datetime.utcnow()
+        job.updated_at = job.finished_at
+        db.commit()
+        if changed_any and on_commit:
+            on_commit()
+        logger.info(f"Yeniden sınıflandırma tamamlandı. İşlenen: {job.processed}, Güncellenen: {job.updated}")
+
+    except Exception as e:
+        logger.error(f"Yeniden sınıflandırma hatası (iş {job_id}): {str(e)}")
+        db.rollback()
+        job = db.get(BackgroundJob, job_id)
+        if job:
+            job.status = JOB_FAILED
+            job.error = str(e)
+            job.updated_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,118 @@
+from typing import List, Optional, Set, Tuple
+from datetime import datetime
+from sqlalchemy import insert, select, delete, literal
+from sqlalchemy.orm import Session
+from ..models.database import Property, PropertyArchive, PropertyImage, PropertyRawData, property_features
+from .counts import FacetCounter, ListingCounter, facet_key
+from .locations import LocationCounter, location_path_ids
+from .result_cache import listing_tags
+from .analytics import MarketCounter, market_snapshot
+from .dedup import remove_from_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Arşive taşınırken kopyalanan kolonlar (iki tabloda aynı isimde)
+ARCHIVE_COLUMNS = [
+    'id', 'url', 'title', 'price', 'currency', 'location', 'status', 'property_type',
+    'size', 'room_count', 'living_room_count', 'province_id', 'district_id',
+    'neighborhood_id', 'seller_id', 'latitude', 'longitude', 'created_at', 'first_seen_at',
+    'last_seen_at', 'delisted_at'
+]
+
+def live_only(query):
+    """Sorguyu yayındaki ilanlarla sınırlar"""
+    return query.filter(Property.delisted_at.is_(None))
+
+def mark_seen(db: Session, property_ids: List[int], seen_at: datetime, search_url: str, chunk_size: int = 500) -> None:
+    """Taramada görülen ilanların last_seen_at değerini toplu UPDATE ile günceller"""
+    for start in range(0, len(property_ids), chunk_size):
+        chunk = property_ids[start:start + chunk_size]
+        db.query(Property).filter(Property.id.in_(chunk)).update(
+            {
+                Property.last_seen_at: seen_at,
+                Property.last_search_url: search_url,
+                # onupdate tetiklenmesin: updated_at sadece içerik değişince ilerler
+                Property.updated_at: Property.updated_at
+            },
+            synchronize_session=False
+        )
+
+def sweep_delisted(
+    db: Session,
+    search_url: str,
+    crawl_started: datetime,
+    facet_counter: FacetCounter,
+    location_counter: LocationCounter,
+    seller_counter: ListingCounter,
+    market_counter: Optional[MarketCounter] = None
+) -> Set[Tuple[str, str]]:
+    """Eksiksiz bir taramada görülmeyen ilanları yayından kalkmış olarak işaretler.
+
+    Kapsam, ilanı en son aynı aramanın görmüş olmasıdır; sayaç
+    değişiklikleri verilen counter'lara eklenir, commit çağırana aittir.
+    Dönen değer sonuç önbelleğinden silinecek (ilçe, kategori) etiketleridir.
+    """
+    rows = live_only(db.query(
+        Property.id, Property.location, Property.status, Property.property_type,
+        Property.province_id, Property.district_id, Property.neighborhood_id, Property.seller_id,
+        Property.price, Property.currency, Property.size, Property.room_count,
+        Property.first_seen_at, Property.created_at
+    )).filter(
+        Property.last_search_url == search_url,
+        Property.last_seen_at < crawl_started
+    ).all()
+
+    touched = set()
+    for row in rows:
+        facet_counter.add(facet_key(row), -1)
+        location_counter.add(location_path_ids(row), -1)
+        seller_counter.add([row.seller_id], -1)
+        if market_counter is not None:
+            # Sadece yayındaki ilan istatistiklerinden düşülür; aylık geçmiş korunur
+            market_counter.add(market_snapshot(row), -1, history=False)
+        touched.add(listing_tags(row.location, row.property_type))
+
+    ids = [row.id for row in rows]
+    for start in range(0, len(ids), 500):
+        db.query(Property).filter(Property.id.in_(ids[start:start + 500])).update(
+            {Property.delisted_at: crawl_started, Property.updated_at: Property.updated_at},
+            synchronize_session=False
+        )
+
+    if ids:
+        logger.info(f"Yayından kalkan ilan sayısı: {len(ids)} ({search_url})")
+    return touched
+
+def archive_delisted(db: Session, delisted_before: datetime, batch_size: int = 500) -> int:
+    """Belirli tarihten önce yayından kalkan ilanları properties_archive tablosuna taşır"""
+    archived = 0
+    archive_columns = [PropertyArchive.__table__.c[name] for name in ARCHIVE_COLUMNS]
+    source_columns = [Property.__table__.c[name] for name in ARCHIVE_COLUMNS]
+
+    while True:
+        ids = [row.id for row in db.query(Property.id).filter(
+            Property.delisted_at < delisted_before
+        ).order_by(Property.id).limit(batch_size)]
+        if not ids:
+            break
+
+        now = datetime.utcnow()
+        # Sıkıştırılmış ham veri olduğu gibi arşive kopyalanır
+        db.execute(insert(PropertyArchive.__table__).from_select(
+            archive_columns + [PropertyArchive.__table__.c.raw_data, PropertyArchive.__table__.c.archived_at],
+            select(*source_columns, PropertyRawData.data, literal(now)).select_from(
+                Property.__table__.outerjoin(PropertyRawData.__table__, PropertyRawData.property_id == Property.id)
+            ).where(Property.id.in_(ids))
+        ))
+        db.execute(delete(PropertyRawData.__table__).where(PropertyRawData.property_id.in_(ids)))
+        remove_from_index(db, ids)
+        db.execute(delete(property_features).where(property_features.c.property_id.in_(ids)))
+        db.execute(delete(PropertyImage.__table__).where(PropertyImage.property_id.in_(ids)))
+        db.execute(delete(Property.__table__).where(Property.id.in_(ids)))
+        db.commit()
+        archived += len(ids)
+
+    if archived:
+        logger.info(f"Arşive taşınan ilan sayısı: {archived}")
+    return archived
@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.database import Location
+from .url_builder import format_location_name
+from .counts import ListingCounter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lokasyon hiyerarşisi seviyeleri
+PROVINCE = 1
+DISTRICT = 2
+NEIGHBORHOOD = 3
+
+def parse_location(konum: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """'İstanbul / Beşiktaş / Akat Mah.' formatındaki konumu il, ilçe ve mahalleye ayırır"""
+    if not konum:
+        return None, None, None
+
+    parts = [p.strip() for p in konum.split('/') if p.strip()]
+    parts += [None] * (3 - len(parts))
+    return parts[0], parts[1], parts[2]
+
+def location_slug(name: str) -> str:
+    """Lokasyon ismini karşılaştırma anahtarına (slug) çevirir"""
+    return format_location_name(name)
+
+class LocationResolver:
+    """İlan konumlarını locations tablosundaki il/ilçe/mahalle kayıtlarına eşler.
+
+    Çözülen kayıtlar süreç içinde önbelleğe alınır, böylece aynı taramadaki
+    ilanlar için tekrar sorgu atılmaz.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._cache: Dict[Tuple[int, Optional[int], str], int] = {}
+
+    def _find(self, level: int, parent_id: Optional[int], slug: str) -> Optional[Location]:
+        return self.db.query(Location).filter_by(level=level, parent_id=parent_id, slug=slug).first()
+
+    def _insert(self, name: str, slug: str, level: int, parent_id: Optional[int]) -> None:
+        """Lokasyonu ekler; aynı lokasyonu eşzamanlı ekleyen başka bir worker varsa hiçbir şey yapmaz.
+
+        Çakışma hedefi tablodaki benzersiz indekslerdir: illerde kısmi
+        (slug WHERE parent_id IS NULL) indeks, diğerlerinde (parent_id, slug).
+        """
+        table = Location.__table__
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in ('postgresql', 'sqlite'):
+            self.db.add(Location(name=name, slug=slug, level=level, parent_id=parent_id))
+            self.db.flush()
+            return
+
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table).values(name=name, slug=slug, level=level, parent_id=parent_id)
+        if parent_id is None:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['slug'], index_where=table.c.parent_id.is_(None))
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['parent_id', 'slug'])
+        self.db.execute(stmt)
+
+    def _get_or_create(self, name: str, level: int, parent_id: Optional[int]) -> int:
+        slug = location_slug(name)
+        key = (level, parent_id, slug)
+        if key in self._cache:
+            return self._cache[key]
+
+        location = self._find(level, parent_id, slug)
+        if not location:
+            self._insert(name, slug, level, parent_id)
+            location = self._find(level, parent_id, slug)
+            logger.info(f"Yeni lokasyon eklendi: {name} (seviye {level})")
+
+        self._cache[key] = location.id
+        return location.id
+
+    def resolve(self, konum: Optional[str]) -> Dict[str, Optional[int]]:
+        """Konum metnini province_id/district_id/neighborhood_id değerlerine çevirir"""
+        il, ilce, mahalle = parse_location(konum)
+        ids = {'province_id': None, 'district_id': None, 'neighborhood_id': None}
+
+        if il:
+            ids['province_id'] = self._get_or_create(il, PROVINCE, None)
+        if il and ilce:
+            ids['district_id'] = self._get_or_create(ilce, DISTRICT, ids['province_id'])
+        if il and ilce and mahalle:
+            ids['neighborhood_id'] = self._get_or_create(mahalle, NEIGHBORHOOD, ids['district_id'])
+
+        return ids
+
+def location_ids_query(db: Session, level: int, name: str, parent_ids=None):
+    """Verilen seviye ve isimle eşleşen lokasyon id'leri için alt sorgu döndürür"""
+    query = db.query(Location.id).filter(Location.level == level, Location.slug == location_slug(name))
+    if parent_ids is not None:
+        query = query.filter(Location.parent_id.in_(parent_ids))
+    return query
+
+def location_path_ids(prop) -> List[int]:
+    """İlanın bağlı olduğu il, ilçe ve mahalle kayıtlarının id'leri"""
+    return [i for i in (prop.province_id, prop.district_id, prop.neighborhood_id) if i is not None]
+
+class LocationCounter(ListingCounter):
+    """Ingestion sırasında lokasyon ağacındaki ilan sayısı değişikliklerini biriktirip toplu yazar"""
+
+    def __init__(self):
+        super().__init__(Location)
+
+REBUILD_LOCATION_COUNTS = """
+    UPDATE locations SET listing_count = CASE level
+        WHEN 1 THEN (SELECT COUNT(*) FROM properties WHERE properties.province_id = locations.id{live})
+        WHEN 2 THEN (SELECT COUNT(*) FROM properties WHERE properties.district_id = locations.id{live})
+        ELSE (SELECT COUNT(*) FROM properties WHERE properties.neighborhood_id = locations.id{live})
+    END
+"""
+
+def rebuild_location_counts(connection, live_only: bool = False) -> None:
+    """Lokasyon ilan sayılarını properties tablosundan baştan hesaplar (live_only: sadece yayındakiler)"""
+    live = " AND properties.delisted_at IS NULL" if live_only else ""
+    connection.execute(text(REBUILD_LOCATION_COUNTS.format(live=live)))
+
+def location_tree(db: Session, il: str) -> Dict[str, Any]:
+    """Sadece istenen ilin alt ağacını ilan sayılarıyla döndürür.
+
+    İl slug'ı, ilçeler ve mahalleler indeksli (level, slug) ve parent_id
+    üzerinden okunur; properties tablosuna hiç dokunulmaz.
+    """
+    tree = {'iller': [], 'ilceler': {}, 'mahalleler': {}, 'ilan_sayilari': {}}
+    province = db.query(Location).filter_by(level=PROVINCE, slug=location_slug(il), parent_id=None).first()
+    if not province:
+        return tree
+
+    tree['iller'].append(province.name)
+    tree['ilan_sayilari'][province.name] = province.listing_count or 0
+
+    districts = db.query(Location.id, Location.name, Location.listing_count).filter(
+        Location.parent_id == province.id
+    ).order_by(Location.name).all()
+    tree['ilceler'][province.name] = [d.name for d in districts]
+
+    district_names = {}
+    for district in districts:
+        district_names[district.id] = district.name
+        tree['mahalleler'][district.name] = []
+        tree['ilan_sayilari'][f"{province.name} / {district.name}"] = district.listing_count or 0
+
+    if district_names:
+        neighborhoods = db.query(Location.name, Location.parent_id, Location.listing_count).filter(
+            Location.parent_id.in_(list(district_names))
+        ).order_by(Location.name).all()
+        for neighborhood in neighborhoods:
+            district_name = district_names[neighborhood.parent_id]
+            tree['mahalleler'][district_name].append(neighborhood.name)
+            tree['ilan_sayilari'][f"{province.name} / {district_name} / {neighborhood.name}"] = neighborhood.listing_count or 0
+
+    return tree
@@ -0,0 +1,71 @@
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, multiprocess
+import os
+
+# Birden fazla uvicorn worker'ında PROMETHEUS_MULTIPROC_DIR ayarlanır; değerler dosyalardan birleştirilir
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+# Tarayıcı ile sayfa yükleme saniyeler, HTTP istekleri saniyenin altında sürer
+FETCH_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+PARSE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# Arama sayfası 24 ilan gösterir; daha azı son sayfa veya eksik yükleme demektir
+CARD_BUCKETS = (0, 1, 5, 10, 15, 20, 23, 24, 30, 50)
+API_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Scraper metrikleri 'scraper' etiketi ile backend sınıf adını taşır (SourceScraper, HTMLScraper, HepsiEmlakScraper)
+PAGE_FETCH_SECONDS = Histogram(
+    'scraper_page_fetch_seconds', 'Arama sayfasının yüklenip kaynağının alınma süresi',
+    ['scraper'], buckets=FETCH_BUCKETS
+)
+READINESS_WAIT_SECONDS = Histogram(
+    'scraper_readiness_wait_seconds', 'Sayfada ilan listesinin görünmesi için beklenen süre',
+    ['scraper'], buckets=FETCH_BUCKETS
+)
+CARDS_PER_PAGE = Histogram(
+    'scraper_cards_per_page', 'Bir arama sayfasından parse edilen ilan kartı sayısı',
+    ['scraper'], buckets=CARD_BUCKETS
+)
+PARSE_SECONDS = Histogram(
+    'scraper_parse_seconds', 'Bir arama sayfasının parse süresi',
+    ['scraper'], buckets=PARSE_BUCKETS
+)
+# Kullanım oranı: rate(scraper_pipeline_busy_seconds_total{stage="fetch"}) / scraper_webdriver_sessions
+WEBDRIVER_SESSIONS = Gauge(
+    'scraper_webdriver_sessions', 'Açık WebDriver (Chrome) oturumu sayısı',
+    ['scraper'], multiprocess_mode='livesum'
+)
+PIPELINE_BUSY_SECONDS = Counter(
+    'scraper_pipeline_busy_seconds', 'Pipeline aşamalarının iş yaparak geçirdiği toplam süre',
+    ['scraper', 'stage']
+)
+
+# Ingestion; mode 'scrape' veya arşivden yeniden çıkarım için 'replay'
+UPSERT_BATCH_SECONDS = Histogram(
+    'ingest_upsert_batch_seconds', 'Bir commit grubunun (en fazla 50 ilan) yazılma süresi',
+    ['mode'], buckets=PARSE_BUCKETS + (10, 30)
+)
+INGEST_ROWS = Counter(
+    'ingest_rows', 'Kaydedilen ilanlar; result: new, updated, unchanged, failed',
+    ['mode', 'result']
+)
+
+# API; endpoint etiketi route şablonudur (/properties/{property_id}), ham path değil
+API_REQUEST_SECONDS = Histogram(
+    'api_request_seconds', 'Endpoint başına istek süresi',
+    ['endpoint', 'method', 'status'], buckets=API_BUCKETS
+)
+API_PHASE_SECONDS = Histogram(
+    'api_phase_seconds', 'İstek süresinin aşamalara bölünmesi (query, serialization)',
+    ['endpoint', 'phase'], buckets=API_BUCKETS
+)
+
+def scraper_label(scraper) -> str:
+    """Metrik etiketinde kullanılan backend adı"""
+    return type(scraper).__name__
+
+def render_metrics() -> bytes:
+    """Prometheus metin formatı; çoklu worker modunda tüm süreçlerin değerleri birleştirilir"""
+    if os.getenv(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
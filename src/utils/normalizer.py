@@ -0,0 +1,167 @@
+from typing import Any, Dict, Optional, Tuple
+import re
+
+# Para birimi gösterimlerini ISO 4217 kodlarına eşle
+CURRENCY_CODES = {
+    'TL': 'TRY',
+    'TRY': 'TRY',
+    '₺': 'TRY',
+    'USD': 'USD',
+    '$': 'USD',
+    'DOLAR': 'USD',
+    'EUR': 'EUR',
+    '€': 'EUR',
+    'EURO': 'EUR',
+    'GBP': 'GBP',
+    '£': 'GBP',
+}
+
+# Giriş seviyesindeki kat isimleri; bodrum ve kot katları ayrıca negatif sayılır
+GROUND_FLOOR_NAMES = ('zemin', 'giris', 'bahce')
+
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+
+
+def fold_turkish(text: str) -> str:
+    """Karşılaştırma için Türkçe karakterleri sadeleştirip küçük harfe çevirir"""
+    replacements = {
+        'İ': 'i', 'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c',
+        'Ğ': 'g', 'Ü': 'u', 'Ş': 's', 'Ö': 'o', 'Ç': 'c',
+    }
+    folded = ''.join(replacements.get(ch, ch) for ch in text).lower()
+    return re.sub(r'\s+', ' ', folded).strip()
+
+
+def _parse_number(text: str) -> Optional[float]:
+    """Türkçe formatlı sayıyı (1.250.000,50) float'a çevirir"""
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+
+    number = match.group(0)
+    if ',' in number:
+        # Virgül ondalık ayırıcıdır, noktalar binlik ayırıcı
+        number = number.replace('.', '').replace(',', '.')
+    else:
+        number = number.replace('.', '')
+
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def parse_price(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """Kart fiyatını (örn. '29.200.000 TL TL') fiyat ve para birimi koduna ayırır"""
+    if not text:
+        return None, None
+
+    price = _parse_number(text)
+
+    currency = None
+    for token in re.findall(r'[A-Za-z]+|[₺$€£]', text):
+        code = CURRENCY_CODES.get(token.upper())
+        if code:
+            currency = code
+            break
+
+    if price is not None and currency is None:
+        # Kartlarda para birimi yazmıyorsa HepsiEmlak varsayılanı TL
+        currency = 'TRY'
+
+    return price, currency
+
+
+def parse_size(text: Optional[str]) -> Optional[float]:
+    """Metrekare bilgisini (örn. '510.000 m²') sayıya çevirir"""
+    if not text:
+        return None
+    return _parse_number(text)
+
+
+def parse_room_count(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Oda sayısını (örn. '3 + 1', 'Stüdyo') oda ve salon sayısına ayırır"""
+    if not text:
+        return None, None
+
+    folded = fold_turkish(text)
+    if 'studyo' in folded:
+        return 1, 0
+
+    numbers = re.findall(r'\d+(?:[.,]5)?', folded)
+    if not numbers:
+        return None, None
+
+    rooms = int(float(numbers[0].replace(',', '.')))
+    living_rooms = int(float(numbers[1].replace(',', '.'))) if len(numbers) > 1 else 0
+    return rooms, living_rooms
+
+
+def parse_room_filter(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Oda filtresini ayırır; salon kısmı verilmemişse ('3') salon sayısı None döner.
+
+    Ayırıcıya değil sayı adedine bakılır: sorgu dizesinde kodlanmamış '+' boşluğa
+    dönüştüğünden '?room_count=3+2' sunucuya '3 2' olarak gelir.
+    """
+    rooms, living_rooms = parse_room_count(text)
+    if rooms is None or len(re.findall(r'\d+(?:[.,]5)?', fold_turkish(text))) < 2:
+        return rooms, None
+    return rooms, living_rooms
+
+
+def parse_floor(text: Optional[str]) -> Optional[int]:
+    """Kat bilgisini tam sayıya çevirir; giriş katları 0, bodrum/kot katları negatiftir"""
+    if not text:
+        return None
+
+    folded = fold_turkish(text)
+    number = re.search(r'-?\d+', folded)
+
+    if folded.startswith('kot') or 'bodrum' in folded:
+        depth = abs(int(number.group(0))) if number else 1
+        return -depth
+
+    if number:
+        return int(number.group(0))
+
+    if any(name in folded for name in GROUND_FLOOR_NAMES):
+        return 0
+
+    # 'Ara Kat', 'En Üst Kat', 'Çatı Katı' gibi değerler sayıya çevrilemez
+    return None
+
+
+def parse_building_age(text: Optional[str]) -> Optional[int]:
+    """Bina yaşını (örn. '5 Yaşında', 'Sıfır Bina') tam sayıya çevirir"""
+    if not text:
+        return None
+
+    folded = fold_turkish(text)
+    if 'sifir' in folded or 'yeni' in folded:
+        return 0
+
+    number = re.search(r'\d+', folded)
+    return int(number.group(0)) if number else None
+
+
+def format_room_count(room_count: Optional[int], living_room_count: Optional[int]) -> Optional[str]:
+    """Tipli oda bilgisini '3+1' formatına geri çevirir"""
+    if room_count is None:
+        return None
+    return f"{room_count}+{living_room_count or 0}"
+
+
+def normalize_listing(listing_data: Dict[str, Any]) -> Dict[str, Any]:
+    """İlan kartındaki metin alanlarını tipli Property kolonlarına dönüştürür"""
+    price, currency = parse_price(listing_data.get('fiyat'))
+    room_count, living_room_count = parse_room_count(listing_data.get('oda_sayisi'))
+
+    return {
+        'price': price,
+        'currency': currency,
+        'size': parse_size(listing_data.get('metrekare')),
+        'room_count': room_count,
+        'living_room_count': living_room_count,
+        'floor': parse_floor(listing_data.get('kat')),
+        'building_age': parse_building_age(listing_data.get('bina_yasi')),
+    }
@@ -0,0 +1,56 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.orm import Session
+from ..models.database import ArchivedPage
+from .raw_store import compress_bytes, decompress_bytes
+import hashlib
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAGE_ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", "./page_archive")
+# Sayfalar bir kez yazılıp çok okunduğu için daha yüksek seviye kullanılır
+PAGE_COMPRESSION_LEVEL = 19
+
+def page_path(sha256: str, root: str = PAGE_ARCHIVE_DIR) -> str:
+    """İçerik özetinden dosya yolu: <root>/ab/abcdef....html.z"""
+    return os.path.join(root, sha256[:2], f"{sha256}.html.z")
+
+def store_page(html: str, root: str = PAGE_ARCHIVE_DIR) -> str:
+    """Sayfayı sıkıştırıp içerik özetiyle yazar; aynı içerik zaten varsa tekrar yazmaz"""
+    payload = html.encode('utf-8')
+    sha256 = hashlib.sha256(payload).hexdigest()
+    path = page_path(sha256, root)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Yarım kalmış dosya okunmasın diye önce geçici dosyaya yazılır
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(compress_bytes(payload, PAGE_COMPRESSION_LEVEL))
+        os.replace(temp_path, path)
+    return sha256
+
+def load_page(sha256: str, root: str = PAGE_ARCHIVE_DIR) -> str:
+    with open(page_path(sha256, root), 'rb') as f:
+        return decompress_bytes(f.read()).decode('utf-8')
+
+def archive_page(
+    db: Session,
+    url: str,
+    html: str,
+    search_url: Optional[str] = None,
+    run_id: Optional[int] = None,
+    fetched_at: Optional[datetime] = None
+) -> ArchivedPage:
+    """Sayfayı arşive yazar ve kaydını session'a ekler (commit çağırana aittir)"""
+    page = ArchivedPage(
+        sha256=store_page(html),
+        url=url,
+        search_url=search_url,
+        run_id=run_id,
+        size=len(html.encode('utf-8')),
+        fetched_at=fetched_at or datetime.now()
+    )
+    db.add(page)
+    return page
@@ -0,0 +1,26 @@
+from typing import Tuple
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from ..models.database import Property
+import base64
+import json
+
+def encode_cursor(created_at: datetime, property_id: int) -> str:
+    """Son ilanın (created_at, id) değerlerinden opak bir cursor üretir"""
+    payload = json.dumps([created_at.isoformat(), property_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Cursor'ı (created_at, id) değerlerine çevirir; geçersizse ValueError fırlatır"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, property_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(property_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def apply_keyset(query: Query, cursor: str) -> Query:
+    """Cursor'dan sonraki ilanları (created_at, id) azalan sırada getirecek filtreyi uygular"""
+    created_at, property_id = decode_cursor(cursor)
+    return query.filter(tuple_(Property.created_at, Property.id) < tuple_(created_at, property_id))
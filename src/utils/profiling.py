@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, List, Optional
+from collections import Counter
+from datetime import datetime
+import os
+import re
+import sys
+import threading
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+# Örnekleme aralığı; taramalar dakikalar sürer, istekler milisaniyeler (kısa istekte de örnek düşsün)
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000
+REQUEST_SAMPLE_INTERVAL = float(os.getenv("PROFILE_REQUEST_INTERVAL_MS", "1")) / 1000
+# Tür başına (istek/tarama) saklanan en fazla profil; eskiler kaydetme sırasında silinir
+MAX_PROFILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+# Profil istemek için istek başlığı (X-Profile: 1) veya sorgu parametresi (?profile=1)
+PROFILE_HEADER = 'x-profile'
+PROFILE_QUERY_PARAM = 'profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+REQUEST_PREFIX = 'request'
+RUN_PREFIX = 'run'
+PROFILE_ID_PATTERN = re.compile(r'^(request|run)-[0-9a-f]+$')
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    # Satır yerine fonksiyonun ilk satırı; aynı fonksiyonun örnekleri tek kutuda toplanır
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+class StackSampler:
+    """Thread'lerin çağrı yığınlarını arka plandaki bir thread'den belirli aralıklarla örnekler.
+
+    cProfile'dan farklı olarak profillenen koda ek çağrı maliyeti eklemez ve
+    tüm thread'leri (pipeline aşamaları dahil) görür. Sonuç, flamegraph.pl ve
+    speedscope'un okuduğu 'katlanmış yığın' biçimindedir: her satırda kökten
+    yaprağa ';' ile ayrılmış çerçeveler ve örnek sayısı. Duvar saati örneklemesi
+    olduğundan bekleyen thread'ler de (kilit, ağ, kuyruk) görünür.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, thread_ids: Optional[Iterable[int]] = None):
+        self.interval = interval
+        # None ise sampler dışındaki tüm thread'ler örneklenir
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self, own_ident: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or (self.thread_ids is not None and ident not in self.thread_ids):
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_name(frame))
+                frame = frame.f_back
+            frames.append(names.get(ident, str(ident)).replace(';', ':'))
+            self.stacks[';'.join(reversed(frames))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_ident)
+
+    def start(self) -> 'StackSampler':
+        self.started_at = datetime.now()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'StackSampler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.finished_at = datetime.now()
+        return self
+
+    def folded(self) -> str:
+        """Katlanmış yığın çıktısı (en sık yığın önce)"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def profile_requested(headers, query_params) -> bool:
+    """İstek profil istiyor mu; kapalıyken sadece bu kontrolün maliyeti vardır"""
+    value = headers.get(PROFILE_HEADER) or query_params.get(PROFILE_QUERY_PARAM)
+    return value is not None and value.lower() in TRUE_VALUES
+
+def request_profile_id() -> str:
+    return f"{REQUEST_PREFIX}-{uuid.uuid4().hex[:16]}"
+
+def run_profile_id(run_id: int) -> str:
+    return f"{RUN_PREFIX}-{run_id}"
+
+def profile_path(profile_id: str, root: str = PROFILE_DIR) -> Optional[str]:
+    """Geçersiz id (yol geçişi dahil) için None"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    return os.path.join(root, f"{profile_id}.folded")
+
+def prune_profiles(prefix: str, keep: int = MAX_PROFILES, root: str = PROFILE_DIR) -> int:
+    """Verilen türdeki (request/run) profillerden en yeni keep tanesi dışındakileri siler"""
+    profiles = [profile for profile in list_profiles(root) if profile['id'].startswith(f"{prefix}-")]
+    removed = 0
+    for profile in profiles[keep:]:
+        try:
+            os.remove(os.path.join(root, f"{profile['id']}.folded"))
+            removed += 1
+        except FileNotFoundError:
+            # Başka bir worker aynı anda silmiş olabilir
+            pass
+    return removed
+
+def save_profile(profile_id: str, sampler: StackSampler, root: str = PROFILE_DIR) -> str:
+    """Profili <root>/<id>.folded dosyasına yazar; aynı id'li eski profilin üzerine yazılır.
+
+    Aynı türde MAX_PROFILES'tan fazla profil varsa en eskiler silinir.
+    """
+    path = profile_path(profile_id, root)
+    if path is None:
+        raise ValueError(f"Invalid profile id: {profile_id}")
+    os.makedirs(root, exist_ok=True)
+    # Yarım kalmış dosya indirilmesin diye önce geçici dosyaya yazılır
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(sampler.folded())
+    os.replace(temp_path, path)
+    prune_profiles(profile_id.split('-', 1)[0], root=root)
+    logger.info(f"Profil kaydedildi: {profile_id} ({sampler.samples} örnek)")
+    return path
+
+def list_profiles(root: str = PROFILE_DIR) -> List[Dict]:
+    """Kayıtlı profiller, en yeni önce"""
+    if not os.path.isdir(root):
+        return []
+    profiles = []
+    for name in os.listdir(root):
+        profile_id, extension = os.path.splitext(name)
+        if extension != '.folded' or not PROFILE_ID_PATTERN.match(profile_id):
+            continue
+        stat = os.stat(os.path.join(root, name))
+        profiles.append({
+            'id': profile_id,
+            'size': stat.st_size,
+            'created_at': datetime.fromtimestamp(stat.st_mtime),
+        })
+    return sorted(profiles, key=lambda profile: profile['created_at'], reverse=True)
@@ -0,0 +1,144 @@
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..models.database import PropertyRawData, RawDataDictionary
+import hashlib
+import json
+import struct
+import threading
+import zlib
+import logging
+
+try:
+    import zstandard
+except ImportError:  # zstandard opsiyonel; yoksa zlib kullanılır
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Sıkıştırılmış verinin ilk byte'ı kodlamayı belirtir
+RAW_JSON = 0
+RAW_ZLIB = 1
+RAW_ZSTD = 2
+RAW_ZSTD_DICT = 3  # Ardından 4 byte sözlük id'si gelir
+
+ZSTD_LEVEL = 10
+DICTIONARY_SIZE = 16 * 1024
+# Sözlük eğitimi için gereken en az örnek sayısı
+MIN_TRAINING_SAMPLES = 500
+
+def canonical_json(data: Dict[str, Any]) -> bytes:
+    """Aynı içerik için her zaman aynı byte'ları üreten JSON"""
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def raw_data_hash(data: Dict[str, Any]) -> str:
+    """Ham verinin değişip değişmediğini anlamak için özet"""
+    return hashlib.sha1(canonical_json(data)).hexdigest()
+
+def compress_bytes(payload: bytes, level: int = ZSTD_LEVEL) -> bytes:
+    """Sözlüksüz sıkıştırma; ilk byte kodlamayı belirtir (zstd, yoksa zlib)"""
+    if zstandard is None:
+        return bytes([RAW_ZLIB]) + zlib.compress(payload, 6)
+    return bytes([RAW_ZSTD]) + zstandard.ZstdCompressor(level=level).compress(payload)
+
+def decompress_bytes(blob: bytes) -> bytes:
+    """compress_bytes çıktısını açar"""
+    codec, body = blob[0], blob[1:]
+    if codec == RAW_JSON:
+        return body
+    if codec == RAW_ZLIB:
+        return zlib.decompress(body)
+    if codec == RAW_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd ile sıkıştırılmış veri için zstandard paketi gerekli")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"Bilinmeyen sıkıştırma kodlaması: {codec}")
+
+class RawDataCodec:
+    """Ham ilan verisini sıkıştırır/açar.
+
+    zstandard kurulu ve eğitilmiş bir sözlük varsa küçük JSON kayıtlar
+    sözlükle sıkıştırılır; yoksa sözlüksüz zstd, o da yoksa zlib kullanılır.
+    Sözlükler raw_data_dictionaries tablosundan süreç başına bir kez okunur.
+    """
+
+    def __init__(self):
+        self._dictionaries: Dict[int, Any] = {}
+        self._active_id: Optional[int] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, force: bool = False) -> None:
+        if zstandard is None or (self._loaded and not force):
+            return
+        with self._lock:
+            for row in db.query(RawDataDictionary).order_by(RawDataDictionary.id):
+                if row.id not in self._dictionaries:
+                    self._dictionaries[row.id] = zstandard.ZstdCompressionDict(row.data)
+                self._active_id = row.id
+            self._loaded = True
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        payload = canonical_json(data)
+        if zstandard is not None and self._active_id is not None:
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self._dictionaries[self._active_id])
+            return bytes([RAW_ZSTD_DICT]) + struct.pack('>I', self._active_id) + compressor.compress(payload)
+        return compress_bytes(payload)
+
+    def decode(self, blob: bytes, db: Optional[Session] = None) -> Dict[str, Any]:
+        codec, body = blob[0], blob[1:]
+        if codec != RAW_ZSTD_DICT:
+            payload = decompress_bytes(blob)
+        elif zstandard is None:
+            raise ValueError("zstd ile sıkıştırılmış veri için zstandard paketi gerekli")
+        else:
+            dictionary_id = struct.unpack('>I', body[:4])[0]
+            if dictionary_id not in self._dictionaries and db is not None:
+                # Başka bir süreçte eğitilmiş sözlük olabilir
+                self.load(db, force=True)
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionaries[dictionary_id])
+            payload = decompressor.decompress(body[4:])
+        return json.loads(payload)
+
+    def train(self, db: Session, samples: Iterable[Dict[str, Any]]) -> Optional[int]:
+        """Örnek kayıtlardan zstd sözlüğü eğitip kaydeder; yeni kayıtlar bu sözlükle sıkıştırılır"""
+        if zstandard is None:
+            return None
+        payloads = [canonical_json(sample) for sample in samples]
+        if len(payloads) < MIN_TRAINING_SAMPLES:
+            return None
+
+        dictionary = zstandard.train_dictionary(DICTIONARY_SIZE, payloads)
+        row = RawDataDictionary(data=dictionary.as_bytes())
+        db.add(row)
+        db.flush()
+        with self._lock:
+            self._dictionaries[row.id] = dictionary
+            self._active_id = row.id
+        logger.info(f"Ham veri sözlüğü eğitildi: {row.id} ({len(payloads)} örnek)")
+        return row.id
+
+    def maybe_train(self, db: Session) -> Optional[int]:
+        """Henüz sözlük yoksa ve yeterli kayıt biriktiyse son kayıtlardan sözlük eğitir"""
+        if zstandard is None:
+            return None
+        self.load(db)
+        if self._active_id is not None:
+            return None
+        if db.query(func.count(PropertyRawData.property_id)).scalar() < MIN_TRAINING_SAMPLES:
+            return None
+        rows = db.query(PropertyRawData.data).order_by(PropertyRawData.property_id.desc()).limit(MIN_TRAINING_SAMPLES * 4)
+        return self.train(db, (self.decode(row.data, db) for row in rows))
+
+raw_codec = RawDataCodec()
+
+def load_raw_data(db: Session, property_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Verilen ilanların ham verisini tek sorguda yükleyip açar"""
+    ids = list(property_ids)
+    if not ids:
+        return {}
+    raw_codec.load(db)
+    return {
+        row.property_id: raw_codec.decode(row.data, db)
+        for row in db.query(PropertyRawData).filter(PropertyRawData.property_id.in_(ids))
+    }
@@ -0,0 +1,222 @@
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import logging
+from .locations import parse_location, location_slug
+
+logger = logging.getLogger(__name__)
+
+# Filtre verilmemiş boyut için etiket: o boyuttaki her yazım bu girdiyi geçersiz kılar
+ANY = '*'
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        district TEXT NOT NULL,
+        category TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        last_access REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_entries_tags ON entries (district, category)",
+    "CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)",
+    """CREATE TABLE IF NOT EXISTS stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )""",
+]
+
+STAT_NAMES = ('hits', 'misses', 'evictions', 'invalidations')
+# Okumalarda son erişim zamanı ve hit/miss sayaçları bellekte biriktirilip bu aralıkla
+# (veya bu kadar girdi birikince) tek yazımda dosyaya aktarılır; her hit yazma kilidi almaz
+ACCESS_FLUSH_SECONDS = 5.0
+ACCESS_FLUSH_ENTRIES = 200
+
+# Her invalidate/clear'da artan sayaç; süreç içi önbellekler (kesin sayımlar) bununla tazelik kontrol eder
+GENERATION = 'generation'
+
+def cache_key(*parts) -> str:
+    """Normalize edilmiş filtre ve sayfa parametrelerinden sabit bir anahtar üretir"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def listing_tags(konum: Optional[str], property_type) -> Tuple[str, str]:
+    """İlanın konum ve kategorisinden (ilçe, kategori) geçersiz kılma etiketini üretir"""
+    _, district, _ = parse_location(konum)
+    category = getattr(property_type, 'value', property_type)
+    return (location_slug(district) if district else ANY, category or ANY)
+
+class ResultCache:
+    """/properties yanıtları için SQLite dosyası üzerinde paylaşılan LRU + TTL önbellek.
+
+    Aynı dosyayı kullanan tüm uvicorn worker'ları girdileri ve istatistikleri
+    paylaşır. Her girdi ilçe ve kategori etiketi taşır; ingestion sadece
+    yazdığı ilçe/kategori çiftlerine uyan girdileri siler. Her geçersiz kılma
+    ayrıca paylaşılan nesil sayacını artırır (bkz. generation()).
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, ttl_seconds: int = 300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._pending_access: Dict[str, float] = {}
+        self._pending_stats: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        with self._connection() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.executemany("INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)", [(n,) for n in STAT_NAMES + (GENERATION,)])
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def _record_access(self, key: Optional[str], stat: str) -> None:
+        with self._pending_lock:
+            if key is not None:
+                self._pending_access[key] = time.time()
+            self._pending_stats[stat] = self._pending_stats.get(stat, 0) + 1
+            due = (
+                len(self._pending_access) >= ACCESS_FLUSH_ENTRIES
+                or time.monotonic() - self._last_flush >= ACCESS_FLUSH_SECONDS
+            )
+        if due:
+            self.flush_access()
+
+    def flush_access(self) -> None:
+        """Biriken son erişim zamanlarını ve hit/miss sayaçlarını tek işlemde yazar"""
+        with self._pending_lock:
+            access, stats = self._pending_access, self._pending_stats
+            self._pending_access, self._pending_stats = {}, {}
+            self._last_flush = time.monotonic()
+        if not access and not stats:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                    [(accessed, key) for key, accessed in access.items()]
+                )
+                for name, amount in stats.items():
+                    self._bump(conn, name, amount)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Önbellek erişim bilgileri yazılamadı: {str(e)}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Geçerli bir girdi varsa içeriğini döndürür; son erişim zamanı toplu olarak güncellenir"""
+        try:
+            row = self._connection().execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Sonuç önbelleği okunamadı: {str(e)}")
+            return None
+        if row is None or row[1] < time.time():
+            self._record_access(None, 'misses')
+            return None
+        self._record_access(key, 'hits')
+        return row[0]
+
+    def set(self, key: str, value: bytes, district: str = ANY, category: str = ANY,
+            generation: Optional[int] = None) -> None:
+        """Girdiyi yazar; kapasite aşılırsa en uzun süredir erişilmeyenleri siler.
+
+        generation, yanıt için veritabanı okunmadan önce alınan generation()
+        değeridir; bu arada bir geçersiz kılma olduysa yanıt eski veriyi
+        yansıtıyor olabileceğinden yazılmaz.
+        """
+        try:
+            conn = self._connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if generation is not None and self._generation(conn) != generation:
+                    conn.execute("ROLLBACK")
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, district, category, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, value, district, category, now + self.ttl_seconds, now)
+                )
+                conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+                overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._bump(conn, 'evictions', overflow)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Sonuç önbelleğine yazılamadı: {str(e)}")
+
+    def invalidate(self, touched: Iterable[Tuple[str, str]]) -> int:
+        """Yazılan (ilçe, kategori) çiftlerinden etkilenen girdileri siler"""
+        pairs = set(touched)
+        if not pairs:
+            return 0
+        try:
+            conn = self._connection()
+            removed = 0
+            for district, category in pairs:
+                cursor = conn.execute(
+                    "DELETE FROM entries WHERE district IN (?, ?) AND category IN (?, ?)",
+                    (district or ANY, ANY, category or ANY, ANY)
+                )
+                removed += cursor.rowcount
+            self._bump(conn, 'invalidations', removed)
+            self._bump(conn, GENERATION)
+            return removed
+        except sqlite3.Error as e:
+            logger.warning(f"Sonuç önbelleği temizlenemedi: {str(e)}")
+            return 0
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM entries")
+        self._bump(conn, GENERATION)
+
+    def _generation(self, conn: sqlite3.Connection) -> Optional[int]:
+        row = conn.execute("SELECT value FROM stats WHERE name = ?", (GENERATION,)).fetchone()
+        return row[0] if row else None
+
+    def generation(self) -> Optional[int]:
+        """Paylaşılan nesil sayacı; herhangi bir süreçteki yazım sonrası değişir (okunamazsa None)"""
+        try:
+            return self._generation(self._connection())
+        except sqlite3.Error as e:
+            logger.warning(f"Önbellek nesli okunamadı: {str(e)}")
+            return None
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss sayaçları, doluluk ve isabet oranı (diğer worker'ların son birkaç saniyesi henüz yazılmamış olabilir)"""
+        self.flush_access()
+        conn = self._connection()
+        stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        stats['entries'] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        stats['hit_ratio'] = round(stats.get('hits', 0) / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,123 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from sqlalchemy import insert, select, literal, func, and_
+from sqlalchemy.orm import Session
+from ..models.database import Property, ScrapeRun, scrape_run_listings
+import logging
+
+logger = logging.getLogger(__name__)
+
+RUN_RUNNING = 'running'
+RUN_COMPLETED = 'completed'
+RUN_FAILED = 'failed'
+
+def start_run(db: Session, search_url: str, started_at: datetime) -> ScrapeRun:
+    """Tarama kaydını oluşturur"""
+    run = ScrapeRun(search_url=search_url, status=RUN_RUNNING, started_at=started_at)
+    db.add(run)
+    db.commit()
+    return run
+
+def snapshot_run(db: Session, run: ScrapeRun, crawl_started: datetime) -> int:
+    """Taramada görülen ilanları tek INSERT ... SELECT ile anlık görüntü tablosuna yazar.
+
+    Görülen her ilanın last_seen_at değeri crawl_started ve last_search_url
+    değeri taramanın URL'i olduğu için Python tarafında id listesi gerekmez.
+    """
+    db.execute(insert(scrape_run_listings).from_select(
+        ['run_id', 'property_id', 'price', 'currency'],
+        select(literal(run.id), Property.id, Property.price, Property.currency).where(
+            Property.last_search_url == run.search_url,
+            Property.last_seen_at == crawl_started
+        )
+    ))
+    return db.query(func.count()).select_from(scrape_run_listings).filter(
+        scrape_run_listings.c.run_id == run.id
+    ).scalar()
+
+def previous_run(db: Session, run: ScrapeRun) -> Optional[ScrapeRun]:
+    """Aynı aramanın bundan önceki, tüm sayfaları taranmış (complete) taraması.
+
+    Yarım kalan taramalar karşılaştırma tabanı olamaz; görülmeyen ilanlar
+    kalkmış değil taranmamış olabilir.
+    """
+    return db.query(ScrapeRun).filter(
+        ScrapeRun.search_url == run.search_url,
+        ScrapeRun.id < run.id,
+        ScrapeRun.status == RUN_COMPLETED,
+        ScrapeRun.complete.is_(True)
+    ).order_by(ScrapeRun.id.desc()).first()
+
+def run_to_dict(run: ScrapeRun) -> Dict[str, Any]:
+    return {
+        'id': run.id,
+        'search_url': run.search_url,
+        'status': run.status,
+        'complete': bool(run.complete),
+        'listing_count': run.listing_count or 0,
+        'new_count': run.new_count or 0,
+        'updated_count': run.updated_count or 0,
+        'unchanged_count': run.unchanged_count or 0,
+        'started_at': run.started_at,
+        'finished_at': run.finished_at
+    }
+
+def run_diff(db: Session, run: ScrapeRun, limit: int = 1000) -> Dict[str, Any]:
+    """Taramayı aynı aramanın önceki taramasıyla karşılaştırır.
+
+    Yeni, kalkan ve fiyatı değişen ilan kümeleri anlık görüntü tablosu
+    üzerinde (run_id, property_id) birincil anahtarıyla yapılan join'lerle
+    veritabanında hesaplanır.
+
+    Tarama yarım kaldıysa (complete=False) görülmeyen ilanların kalktığı
+    bilinemez; kalkan kümesi hesaplanmaz ve None olarak raporlanır.
+    """
+    prev = previous_run(db, run)
+    prev_id = prev.id if prev else -1
+    current = scrape_run_listings.alias('cur')
+    before = scrape_run_listings.alias('prev')
+
+    # Yeni: bu taramada var, öncekinde yok
+    new_from = current.outerjoin(before, and_(before.c.run_id == prev_id, before.c.property_id == current.c.property_id))
+    new_where = and_(current.c.run_id == run.id, before.c.property_id.is_(None))
+
+    # Kalkan: öncekinde var, bu taramada yok
+    removed_from = before.outerjoin(current, and_(current.c.run_id == run.id, current.c.property_id == before.c.property_id))
+    removed_where = and_(before.c.run_id == prev_id, current.c.property_id.is_(None))
+
+    # Fiyatı değişen: ikisinde de var, fiyat veya para birimi farklı
+    changed_from = current.join(before, and_(before.c.run_id == prev_id, before.c.property_id == current.c.property_id))
+    changed_where = and_(
+        current.c.run_id == run.id,
+        current.c.price.is_distinct_from(before.c.price) | current.c.currency.is_distinct_from(before.c.currency)
+    )
+
+    def count(from_clause, where) -> int:
+        return db.execute(select(func.count()).select_from(from_clause).where(where)).scalar()
+
+    def items(from_clause, where, snapshot, with_old_price=False) -> list:
+        columns = [snapshot.c.property_id, Property.url, Property.title, snapshot.c.price, snapshot.c.currency]
+        if with_old_price:
+            columns.append(before.c.price.label('old_price'))
+        query = select(*columns).select_from(
+            from_clause.outerjoin(Property, Property.id == snapshot.c.property_id)
+        ).where(where).order_by(snapshot.c.property_id).limit(limit)
+        return [dict(row._mapping) for row in db.execute(query)]
+
+    complete = bool(run.complete)
+    if not complete:
+        logger.info(f"Tarama {run.id} yarım kaldı, kalkan ilanlar raporlanmıyor")
+
+    return {
+        'run': run_to_dict(run),
+        'previous_run_id': prev.id if prev else None,
+        'removed_reported': complete,
+        'counts': {
+            'new': count(new_from, new_where),
+            'removed': count(removed_from, removed_where) if complete else None,
+            'price_changed': count(changed_from, changed_where)
+        },
+        'new': items(new_from, new_where, current),
+        'removed': items(removed_from, removed_where, before) if complete else None,
+        'price_changed': items(changed_from, changed_where, current, with_old_price=True)
+    }
@@ -0,0 +1,96 @@
+from typing import List, Optional
+from sqlalchemy import text, func, table, column, select, literal_column
+from sqlalchemy.orm import Query
+from ..models.database import Property
+from .normalizer import fold_turkish
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'properties_fts'
+
+properties_fts = table(FTS_TABLE, column('rowid'), column('search_text'))
+
+SQLITE_FTS_SETUP = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        search_text, content='properties', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_fts_ai AFTER INSERT ON properties BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_fts_ad AFTER DELETE ON properties BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS properties_fts_au AFTER UPDATE OF search_text ON properties BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    # Mevcut satırları indexe yükle
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_properties_search_text ON properties "
+    "USING GIN (to_tsvector('simple', coalesce(search_text, '')))"
+)
+
+def build_search_text(*parts: Optional[str]) -> str:
+    """Başlık ve açıklamadan Türkçe karakterleri sadeleştirilmiş arama metni üretir"""
+    folded = fold_turkish(' '.join(p for p in parts if p))
+    return re.sub(r'[^a-z0-9]+', ' ', folded).strip()
+
+def search_terms(keyword: str) -> List[str]:
+    """Arama kelimesini sadeleştirilmiş terimlere ayırır"""
+    return build_search_text(keyword).split()
+
+def setup_search_index(connection) -> None:
+    """Veritabanına göre tam metin arama indexini oluşturur (SQLite: FTS5, PostgreSQL: GIN)"""
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first()
+        if exists:
+            return
+        for statement in SQLITE_FTS_SETUP:
+            connection.execute(text(statement))
+        logger.info("FTS5 arama tablosu oluşturuldu")
+
+    elif dialect == 'postgresql':
+        connection.execute(text(POSTGRES_SEARCH_INDEX))
+
+def apply_keyword_search(query: Query, keyword: str, ranked: bool = True) -> Query:
+    """Sorguyu anahtar kelimeye göre filtreler; ranked ise alaka düzeyine göre sıralar"""
+    terms = search_terms(keyword)
+    if not terms:
+        return query
+
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # Her terim için önek eşleşmesi: "deniz"* AND "manz"*
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        matches = (
+            select(
+                properties_fts.c.rowid.label('id'),
+                func.bm25(literal_column(FTS_TABLE)).label('rank')
+            )
+            .where(text(f'{FTS_TABLE} MATCH :fts_match').bindparams(fts_match=match))
+            .subquery('fts_ranked')
+        )
+        query = query.join(matches, matches.c.id == Property.id)
+        return query.order_by(matches.c.rank) if ranked else query
+
+    if dialect == 'postgresql':
+        vector = func.to_tsvector('simple', func.coalesce(Property.search_text, ''))
+        ts_query = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        query = query.filter(vector.op('@@')(ts_query))
+        return query.order_by(func.ts_rank(vector, ts_query).desc()) if ranked else query
+
+    # Diğer veritabanları için sadeleştirilmiş kolon üzerinde LIKE
+    for term in terms:
+        query = query.filter(Property.search_text.like(f'%{term}%'))
+    return query
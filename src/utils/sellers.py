@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..models.database import Seller
+from .counts import ListingCounter, dialect_insert
+import logging
+
+logger = logging.getLogger(__name__)
+
+def seller_fields(listing: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """İlan kartındaki emlak ofisi bilgilerini Seller alanlarına çevirir.
+
+    Satıcı satırı ofisi temsil eder; ilanı giren danışmanın adı ilana göre
+    değiştiği için ofis satırına yazılmaz.
+    """
+    profile_url = listing.get('emlak_ofisi_url')
+    if not profile_url:
+        return None
+    phones = listing.get('telefon_numaralari') or []
+    return {
+        'profile_url': profile_url,
+        'company': listing.get('emlak_ofisi') or None,
+        'name': listing.get('emlak_ofisi') or None,
+        'phone': phones[0] if phones else None,
+        'logo_url': listing.get('emlak_ofisi_logo') or None,
+    }
+
+class SellerResolver:
+    """İlanların emlak ofislerini profil URL'ine göre tekilleştirip sellers tablosuna eşler.
+
+    preload() bir taramadaki tüm ofisleri tek sorguyla okur, eksikleri toplu
+    ekler ve değişen alanları günceller; resolve() sonrasında sadece süreç
+    içi önbellekten okur. Eksikler INSERT ... ON CONFLICT (profile_url) DO
+    NOTHING ile eklenip yeniden okunur; aynı ofisi eşzamanlı ekleyen başka
+    bir worker varsa onun satırı kullanılır.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._cache: Dict[str, int] = {}
+
+    def preload(self, listings: List[Dict[str, Any]]) -> None:
+        incoming: Dict[str, Dict[str, Any]] = {}
+        for listing in listings:
+            fields = seller_fields(listing)
+            if fields and fields['profile_url'] not in self._cache:
+                # Aynı ofis birden çok ilanda geçer; dolu alanlar birleştirilir
+                merged = incoming.setdefault(fields['profile_url'], {})
+                merged.update({k: v for k, v in fields.items() if v})
+        if not incoming:
+            return
+
+        existing = self._load(list(incoming))
+        missing = [fields for profile_url, fields in incoming.items() if profile_url not in existing]
+        if missing:
+            stmt = dialect_insert(self.db)(Seller.__table__).on_conflict_do_nothing(index_elements=['profile_url'])
+            # Toplu insert'te tüm satırlar aynı kolonlara sahip olmalı
+            columns = ('profile_url', 'company', 'name', 'phone', 'logo_url')
+            self.db.execute(stmt, [
+                dict({column: fields.get(column) for column in columns}, listing_count=0) for fields in missing
+            ])
+            existing.update(self._load([fields['profile_url'] for fields in missing]))
+            logger.info(f"Yeni emlak ofisi sayısı: {len(missing)}")
+
+        for profile_url, fields in incoming.items():
+            seller = existing[profile_url]
+            for column, value in fields.items():
+                if value and getattr(seller, column) != value:
+                    setattr(seller, column, value)
+
+        self.db.flush()
+        self._cache.update({profile_url: seller.id for profile_url, seller in existing.items()})
+
+    def _load(self, urls: List[str]) -> Dict[str, Seller]:
+        sellers = {}
+        for start in range(0, len(urls), 500):
+            for seller in self.db.query(Seller).filter(Seller.profile_url.in_(urls[start:start + 500])):
+                sellers[seller.profile_url] = seller
+        return sellers
+
+    def resolve(self, listing: Dict[str, Any]) -> Optional[int]:
+        """İlanın satıcı id'si; ofis bilgisi yoksa None"""
+        fields = seller_fields(listing)
+        if not fields:
+            return None
+        if fields['profile_url'] not in self._cache:
+            self.preload([listing])
+        return self._cache.get(fields['profile_url'])
+
+class SellerCounter(ListingCounter):
+    """Satıcıların yayındaki ilan sayısı değişikliklerini biriktirip toplu yazar"""
+
+    def __init__(self):
+        super().__init__(Seller)
+
+REBUILD_SELLER_COUNTS = """
+    UPDATE sellers SET listing_count = (
+        SELECT COUNT(*) FROM properties
+        WHERE properties.seller_id = sellers.id AND properties.delisted_at IS NULL
+    )
+"""
+
+def rebuild_seller_counts(connection) -> None:
+    """Satıcı ilan sayılarını properties tablosundan baştan hesaplar"""
+    connection.execute(text(REBUILD_SELLER_COUNTS))
+
+def seller_to_dict(seller: Seller) -> Dict[str, Any]:
+    return {
+        'id': seller.id,
+        'name': seller.name,
+        'company': seller.company,
+        'phone': seller.phone,
+        'membership_status': seller.membership_status,
+        'profile_url': seller.profile_url,
+        'logo_url': seller.logo_url,
+        'listing_count': seller.listing_count or 0
+    }
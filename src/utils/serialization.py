@@ -0,0 +1,31 @@
+from typing import Any
+from datetime import date, datetime
+from enum import Enum
+from fastapi.responses import Response
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson opsiyonel; yoksa standart json kullanılır
+    orjson = None
+
+def _default(value: Any) -> Any:
+    """Standart json modülünün tanımadığı tipleri çevirir"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """İçeriği doğrudan JSON byte'larına çevirir (orjson varsa onunla)"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class FastJSONResponse(Response):
+    """Pydantic doğrulaması yapmadan dict/list içeriği JSON olarak döndüren response"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,7 +1,7 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from ..models.schemas import PropertyStatus, PropertyCategory
 import re
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +29,71 @@ def format_location_name(name: str) -> str:
     
     return formatted
 
+# İlan URL'indeki kategori parçalarının kanonik kategorilere karşılığı; burada olmayan
+# alt türler (örn. 'bina') tanınmaz ve kategori istekten gelen değer olarak kalır
+CATEGORY_SLUGS = {
+    'konut': PropertyCategory.KONUT,
+    'daire': PropertyCategory.KONUT,
+    'residence': PropertyCategory.KONUT,
+    'villa': PropertyCategory.KONUT,
+    'mustakil-ev': PropertyCategory.KONUT,
+    'yazlik': PropertyCategory.KONUT,
+    'ciftlik-evi': PropertyCategory.KONUT,
+    'arsa': PropertyCategory.ARSA,
+    'muhtelif-arsa': PropertyCategory.ARSA,
+    'imarli-konut': PropertyCategory.ARSA,
+    'imarli-ticari': PropertyCategory.ARSA,
+    'konutticaret': PropertyCategory.ARSA,
+    'ozel-kullanim': PropertyCategory.ARSA,
+    'tarla': PropertyCategory.ARSA,
+    'isyeri': PropertyCategory.ISYERI,
+    'dukkan': PropertyCategory.ISYERI,
+    'plaza': PropertyCategory.ISYERI,
+    'ofis': PropertyCategory.ISYERI,
+    'depo': PropertyCategory.ISYERI,
+    'cafe': PropertyCategory.ISYERI,
+    'devremulk': PropertyCategory.DEVREMULK,
+    'turistik-isletme': PropertyCategory.TURISTIK,
+    'turistik': PropertyCategory.TURISTIK,
+}
+
+def classify_listing_url(url: str) -> Tuple[Optional[PropertyStatus], Optional[PropertyCategory]]:
+    """İlan veya arama URL'inden durum (satılık/kiralık) ve kanonik kategoriyi çıkarır.
+
+    Durumdan sonra parça yoksa (/beykoz-satilik) arama konut aramasıdır;
+    parça tanınmıyorsa kategori None döner.
+    """
+    # URL formatı: /istanbul-besiktas-ortakoy-satilik/daire/6231-12711 veya /beykoz-satilik/isyeri
+    segments = [s for s in urlparse(url.lower()).path.split('/') if s]
+
+    status = None
+    category = None
+    for index, segment in enumerate(segments):
+        for candidate in PropertyStatus:
+            if segment == candidate.value or segment.endswith(f"-{candidate.value}"):
+                status = candidate
+                break
+        if status:
+            # Durumdan sonraki parça kategoriyi belirtir (isyeri-bina -> isyeri)
+            if index + 1 < len(segments):
+                category_slug = segments[index + 1]
+                category = CATEGORY_SLUGS.get(category_slug) or CATEGORY_SLUGS.get(category_slug.split('-')[0])
+            else:
+                category = PropertyCategory.KONUT
+            break
+
+    return status, category
+
+def listing_category(url: str, default: PropertyCategory) -> PropertyCategory:
+    """İlan URL'indeki kategori parçası tanınıyorsa ondan çıkan kategoriyi, tanınmıyorsa varsayılanı döndürür.
+
+    Ingestion ve yeniden sınıflandırma aynı kuralı kullanır; böylece kaydedilen
+    kategori sonradan değiştirilmeye ihtiyaç duymaz. Tanınmayan alt türler
+    (örn. 'bina') istenen/kayıtlı kategoriyi asla konuta çevirmez.
+    """
+    status, category = classify_listing_url(url)
+    return category if status and category else PropertyCategory(default)
+
 def create_hepsiemlak_url(
     ilce: str,
     durum: PropertyStatus,
@@ -0,0 +1,143 @@
+import itertools
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.models.database import Base, Property, Seller
+from src.models.schemas import PropertyStatus, PropertyCategory
+from src.utils.alerts import SavedSearchIndex, SearchPredicate, clean_filters, listing_facts
+from src.utils.filters import apply_property_filters
+from src.utils.locations import LocationResolver
+from src.utils.search import build_search_text, setup_search_index
+
+# Aynı isimli ilçe/mahalleler farklı illerde; Türkçe karakterli ve tireli isimler
+LOCATIONS = [
+    'İstanbul / Beşiktaş / Ortaköy Mah.',
+    'İstanbul / Beşiktaş / Akat Mah.',
+    'İstanbul / Kadıköy / Caferağa Mah.',
+    'İstanbul / Şile / Ağva Mah.',
+    'Ankara / Çankaya / Çayyolu Mah.',
+    'Ankara / Merkez / Akat Mah.',
+    'Bolu / Merkez / Ortaköy Mah.',
+    'İstanbul / Beşiktaş',
+    'İstanbul',
+]
+
+TITLES = [
+    'Deniz manzaralı 3+1 daire',
+    'Boğaz manzaralı satılık villa',
+    'Denizli taşından yapılmış müstakil ev',
+    'Ortaköy sahilinde işyeri',
+    'Çarşıya yakın ŞIK stüdyo',
+    'Geniş bahçeli arsa',
+]
+
+ROOM_COUNTS = [(1, 0), (2, 1), (3, 1), (3, 2), (4, 1), (None, None)]
+FLOORS = [-2, 0, 1, 3, 7, None]
+BUILDING_AGES = [0, 5, 12, 30, None]
+SIZES = [45.0, 85.0, 120.0, 120.5, 250.0, None]
+PRICES = [0.0, 2000.0, 15000.0, 1250000.0, 4500000.0, 29200000.0, None]
+CURRENCIES = ['TRY', 'TRY', 'USD', 'EUR']
+
+# Kayıtlı aramalarda kullanılabilen filtre değerleri; sınır değerleri ilanlardaki değerlerle aynı
+FILTER_VALUES = {
+    'local_kw': ['deniz', 'manzara', 'ortakoy', 'şık', 'Boğaz villa', 'yok'],
+    'min_price': [0, 2000, 15000.5, 1250000],
+    'max_price': [15000, 1250000, 4500000, 10 ** 9],
+    'category': ['konut', 'arsa', 'is-yeri', 'isyeri'],
+    'province': ['İstanbul', 'istanbul', 'Ankara', 'Bolu'],
+    'district': ['Beşiktaş', 'besiktas-satilik', 'Merkez', 'Şile'],
+    'neighborhood': ['Akat Mah.', 'Ortaköy Mah.', 'Çayyolu Mah.'],
+    'status': ['satilik', 'kiralik'],
+    'room_count': ['3+1', '3', '3 2', '1+0', 'Stüdyo'],
+    'min_size': [85, 120.5],
+    'max_size': [120, 250],
+    'min_floor': [0, 3],
+    'max_floor': [-1, 3],
+    'max_building_age': [0, 12],
+    'currency': ['TRY', 'usd'],
+    'seller_id': [1, 2],
+}
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('alerts') / 'alerts.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        setup_search_index(connection)
+
+    session = Session(engine)
+    session.add_all([Seller(id=1, name='Eti Emlak'), Seller(id=2, name='Remax Hane')])
+    resolver = LocationResolver(session)
+    rng = random.Random(20250226)
+    for index in range(400):
+        location = rng.choice(LOCATIONS)
+        title = rng.choice(TITLES)
+        room_count, living_room_count = rng.choice(ROOM_COUNTS)
+        session.add(Property(
+            url=f"https://www.hepsiemlak.com/ilan/{index}",
+            title=title,
+            search_text=build_search_text(title),
+            location=location,
+            status=rng.choice(list(PropertyStatus)),
+            property_type=rng.choice(list(PropertyCategory)),
+            price=rng.choice(PRICES),
+            currency=rng.choice(CURRENCIES),
+            size=rng.choice(SIZES),
+            room_count=room_count,
+            living_room_count=living_room_count,
+            floor=rng.choice(FLOORS),
+            building_age=rng.choice(BUILDING_AGES),
+            seller_id=rng.choice([1, 2, None]),
+            **resolver.resolve(location)
+        ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def saved_searches():
+    """Tek filtreli, tüm konum/oda kombinasyonlu ve rastgele çok filtreli aramalar"""
+    searches = [{name: value} for name, values in FILTER_VALUES.items() for value in values]
+    searches += [
+        {'province': province, 'district': district, 'neighborhood': neighborhood}
+        for province, district, neighborhood in itertools.product(
+            ['', 'İstanbul', 'Ankara'], ['', 'Beşiktaş', 'Merkez'], ['', 'Akat Mah.', 'Ortaköy Mah.']
+        )
+    ]
+    rng = random.Random(47)
+    for _ in range(300):
+        names = rng.sample(sorted(FILTER_VALUES), rng.randint(2, 5))
+        searches.append({name: rng.choice(FILTER_VALUES[name]) for name in names})
+    # min > max aramalar /properties'te hata verir; kayıtlı arama olarak da kaydedilemez
+    return [
+        search for search in searches
+        if not ('min_price' in search and 'max_price' in search and search['max_price'] < search['min_price'])
+        and not ('min_size' in search and 'max_size' in search and search['max_size'] < search['min_size'])
+    ]
+
+
+def test_saved_search_index_matches_sql_filters(db):
+    searches = [clean_filters(filters) for filters in saved_searches()]
+    index = SavedSearchIndex(SearchPredicate(search_id, filters) for search_id, filters in enumerate(searches))
+
+    matched_by_index = {search_id: set() for search_id in range(len(searches))}
+    for prop in db.query(Property):
+        for search_id in index.match(listing_facts(prop)):
+            matched_by_index[search_id].add(prop.id)
+
+    for search_id, filters in enumerate(searches):
+        query, _ = apply_property_filters(db, db.query(Property.id), filters, ranked=False)
+        assert matched_by_index[search_id] == {row.id for row in query}, filters
+
+
+def test_index_does_not_report_a_search_twice(db):
+    searches = [clean_filters(filters) for filters in saved_searches()]
+    index = SavedSearchIndex(SearchPredicate(search_id, filters) for search_id, filters in enumerate(searches))
+    for prop in db.query(Property):
+        matched = index.match(listing_facts(prop))
+        assert len(matched) == len(set(matched))
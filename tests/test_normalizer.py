@@ -0,0 +1,86 @@
+import pytest
+
+from src.utils.normalizer import parse_price, parse_room_count, parse_room_filter, parse_floor, parse_building_age, parse_size
+
+# Kart metinleri HTML'den girinti ve satır sonlarıyla gelir
+CARD_WHITESPACE = "\n                  "
+
+
+@pytest.mark.parametrize('text, expected', [
+    (f"29.200.000{CARD_WHITESPACE}TL TL", (29200000.0, 'TRY')),
+    (f"2.000{CARD_WHITESPACE}TL TL", (2000.0, 'TRY')),
+    ("437.100.000.000 TL", (437100000000.0, 'TRY')),
+    ("1.250.000,50 TL", (1250000.5, 'TRY')),
+    ("350.000 USD", (350000.0, 'USD')),
+    ("€ 1.200", (1200.0, 'EUR')),
+    ("12.500", (12500.0, 'TRY')),
+    ("Fiyat sorunuz", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("3 +\n                          1", (3, 1)),
+    ("8 +\n                          8", (8, 8)),
+    ("3+1", (3, 1)),
+    ("4,5 + 1", (4, 1)),
+    ("2", (2, 0)),
+    ("Stüdyo", (1, 0)),
+    ("STÜDYO (1+0)", (1, 0)),
+    ("Belirtilmemiş", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_room_count(text, expected):
+    assert parse_room_count(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("3+2", (3, 2)),
+    # Sorgu dizesinde kodlanmamış '+' boşluğa dönüşür
+    ("3 2", (3, 2)),
+    ("3 + 0", (3, 0)),
+    ("3", (3, None)),
+    ("Stüdyo", (1, None)),
+    ("abc", (None, None)),
+    ("", (None, None)),
+])
+def test_parse_room_filter(text, expected):
+    assert parse_room_filter(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("1. Kat", 1),
+    ("12. Kat", 12),
+    ("Bahçe Katı", 0),
+    ("Yüksek Giriş", 0),
+    ("Zemin Kat", 0),
+    ("Giriş Katı", 0),
+    ("Bodrum", -1),
+    ("Bodrum Kat 2", -2),
+    ("Kot 1", -1),
+    ("Kot 3", -3),
+    ("Çatı Katı", None),
+    ("Ara Kat", None),
+    (None, None),
+])
+def test_parse_floor(text, expected):
+    assert parse_floor(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("12\n                        Yaşında", 12),
+    ("Sıfır Bina", 0),
+    ("Yeni", 0),
+    (None, None),
+])
+def test_parse_building_age(text, expected):
+    assert parse_building_age(text) == expected
+
+
+def test_parse_size():
+    assert parse_size("510.000 m²") == 510000.0
+    assert parse_size("120 m²") == 120.0
+    assert parse_size(None) is None